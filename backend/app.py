@@ -22,7 +22,7 @@ if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
 from backend.config import Config
-from backend.db import init_db
+from backend.migrations import verify_schema_on_startup
 
 # 初始化配置
 config = Config()
@@ -50,12 +50,13 @@ app.config['JSON_AS_ASCII'] = False  # 支持中文
 # 支持跨域资源共享，允许前端应用从不同域名访问API
 CORS(app, origins=config.cors_allow_origins or ['*'])  # 允许所有来源，生产环境应限制具体域名
 
-# 初始化数据库结构与索引（幂等）
+# 检查数据库结构版本（迁移在部署时由 scripts/migrate.py 执行，这里只读取 schema_version）
 try:
-    init_db()
-    logger.info("数据库初始化/迁移完成")
+    schema_status = verify_schema_on_startup(auto_migrate=config.db_auto_migrate, cfg=config)
+    if schema_status.up_to_date:
+        logger.info(f"数据库结构版本: {schema_status.current}")
 except Exception as e:
-    logger.error(f"数据库初始化/迁移失败: {e}")
+    logger.error(f"数据库结构版本检查失败: {e}")
 
 # 初始化Redis连接
 # 用于缓存API响应，提升性能并减少数据库压力
@@ -151,12 +152,33 @@ def health_check() -> tuple[Any, int]:
         "version": "0.1.0"
     }), 200
 
-# 导入并注册路由
-from backend.routes import articles, auth, ai
+# 进程内指标（Prometheus 文本格式），需显式开启
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint() -> Any:
+    """指标导出端点"""
+    if not config.metrics_enabled:
+        return jsonify({"error": "资源不存在"}), 404
+    from backend.utils.telemetry import metrics
+    return app.response_class(metrics.render_prometheus(), mimetype='text/plain; version=0.0.4')
 
-app.register_blueprint(auth.bp, url_prefix='/api/auth')
-app.register_blueprint(articles.bp, url_prefix='/api/articles')
-app.register_blueprint(ai.bp, url_prefix='/api/ai')
+# 导入并注册路由
+# API_BLUEPRINTS 可把 AI 接口拆到独立的 worker 池（如 gthread/gevent worker），
+# 避免慢速的大模型请求占满文章接口所在的 worker。
+# 只导入列出的路由模块，未列出的模块不会在本进程中初始化（如 auth 的会话压缩线程）。
+import importlib
+
+blueprints = {
+    'auth': ('backend.routes.auth', '/api/auth'),
+    'articles': ('backend.routes.articles', '/api/articles'),
+    'ai': ('backend.routes.ai', '/api/ai'),
+}
+for name in config.api_blueprints:
+    if name not in blueprints:
+        logger.warning(f"未知的蓝图配置: {name}")
+        continue
+    module_name, url_prefix = blueprints[name]
+    app.register_blueprint(importlib.import_module(module_name).bp, url_prefix=url_prefix)
+logger.info(f"已注册蓝图: {', '.join(name for name in config.api_blueprints if name in blueprints)}")
 
 if __name__ == '__main__':
     # 开发环境运行
@@ -16,15 +16,40 @@ class Config:
 
         # 默认值
         self.database_url: Optional[str] = None
+        self.db_pool_min_size: int = 1
+        self.db_pool_max_size: int = 10
+        self.db_pool_timeout: float = 5.0
+        self.db_auto_migrate: bool = False
+        self.db_prepared_statements: bool = True
+        self.database_replica_urls: list[str] = []
+        self.db_replica_max_lag: float = 5.0  # seconds
+        self.db_replica_lag_check_interval: float = 2.0  # seconds
+        self.db_replica_retry_after: float = 30.0  # seconds
         self.auth_access_token_ttl: timedelta = timedelta(days=7)
         self.auth_refresh_token_ttl: timedelta = timedelta(days=7)
         self.auth_jwt_secret: Optional[str] = None
         self.auth_password_cost: int = 12
+        self.auth_bcrypt_workers: Optional[int] = None  # 默认按 CPU 核数 / WEB_CONCURRENCY
+        self.auth_bcrypt_max_queue: int = 8  # 主机级在途上限 = CPU 核数 + 该值
+        self.auth_bcrypt_retry_after: int = 2  # seconds
         self.auth_refresh_hash_key: Optional[str] = None
         self.auth_allow_auto_user_creation: bool = True
+        self.auth_session_store: str = "postgres"  # postgres | redis
+        self.auth_token_cache_size: int = 4096  # 0 关闭已验证令牌缓存
+        self.auth_token_revocation_check: bool = False
+        self.auth_session_tombstone_seconds: int = 86400  # 下限，墓碑至少保留到会话原定过期时间
+        self.auth_session_flush_interval: float = 1.0  # seconds
+        self.auth_session_flush_batch: int = 500
+        self.auth_session_compact_interval: int = 0  # seconds，0 表示不在进程内调度
+        self.auth_session_compact_batch: int = 1000
+        self.auth_session_revoked_grace: int = 86400  # seconds
         self.campus_auth_enabled: bool = True
         self.campus_auth_url: Optional[str] = "http://a.stu.edu.cn/ac_portal/login.php"
         self.campus_auth_timeout: int = 10  # seconds
+        self.campus_auth_max_concurrency: int = 4
+        self.campus_auth_queue_timeout: float = 5.0  # seconds
+        self.campus_auth_failure_window: int = 60  # seconds，0 关闭失败计数
+        self.campus_auth_max_failures: int = 5
         self.redis_host: str = "localhost"
         self.redis_port: int = 6379
         self.redis_db: int = 0
@@ -42,8 +67,41 @@ class Config:
         self.api_key: Optional[str] = None
         self.ai_vector_limit_days: Optional[int] = None
         self.ai_vector_limit_count: Optional[int] = None
+        # 向量索引：hnsw / ivfflat，构建参数在重建时生效（scripts/vector_index.py）
+        self.vector_index_type: str = "hnsw"
+        self.vector_index_hnsw_m: int = 16
+        self.vector_index_hnsw_ef_construction: int = 64
+        self.vector_index_ivfflat_lists: int = 0  # 0 表示按各分区行数自动估算
+        # 索引中的向量表示：none（原始 vector）/ halfvec / binary，量化时对候选用原始向量精排
+        self.vector_quantization: str = "none"
+        self.vector_rescore_factor: int = 4
+        # 查询参数：hnsw.ef_search 取 候选数 × 系数，并限制在 [下限, 上限] 内
+        self.vector_search_ef_search: int = 40
+        self.vector_search_ef_search_max: int = 200
+        self.vector_search_ef_factor: float = 2.0
+        self.vector_search_probes: int = 10
         self.ai_recency_half_life_days: float = 180.0
         self.ai_recency_weight: float = 0.2
+        self.ai_context_token_budget: int = 6000
+        self.ai_memory_token_budget: int = 2000
+        # 召回结果重排序：none（默认，保持原排序）/ lexical / onnx
+        self.ai_reranker: str = "none"
+        self.ai_rerank_model_path: Optional[str] = None
+        self.ai_rerank_weight: float = 0.3
+        self.ai_rerank_candidates: int = 20
+        self.ai_rerank_batch_size: int = 16
+        # 完整 messages 调试日志的采样率（0 表示关闭）
+        self.ai_debug_log_sample_rate: float = 0.0
+        self.metrics_enabled: bool = False
+        # AI 上游 HTTP 客户端（连接池、超时、重试、熔断）
+        self.ai_http_timeout: float = 60.0
+        self.embed_http_timeout: float = 10.0
+        self.ai_http_pool_size: int = 10
+        self.ai_http_max_retries: int = 2
+        self.ai_circuit_failure_threshold: int = 5
+        self.ai_circuit_reset_seconds: float = 30.0
+        # 当前进程注册的蓝图，可用于把 AI 接口拆到独立的 worker 池
+        self.api_blueprints: list[str] = ["auth", "articles", "ai"]
 
         self.load()
 
@@ -76,15 +134,40 @@ class Config:
     def _override_with_environment(self) -> None:
         keys = [
             "DATABASE_URL",
+            "DB_POOL_MIN_SIZE",
+            "DB_POOL_MAX_SIZE",
+            "DB_POOL_TIMEOUT",
+            "DB_AUTO_MIGRATE",
+            "DB_PREPARED_STATEMENTS",
+            "DATABASE_REPLICA_URLS",
+            "DB_REPLICA_MAX_LAG",
+            "DB_REPLICA_LAG_CHECK_INTERVAL",
+            "DB_REPLICA_RETRY_AFTER",
             "AUTH_ACCESS_TOKEN_TTL",
             "AUTH_REFRESH_TOKEN_TTL",
             "AUTH_JWT_SECRET",
             "AUTH_PASSWORD_COST",
+            "AUTH_BCRYPT_WORKERS",
+            "AUTH_BCRYPT_MAX_QUEUE",
+            "AUTH_BCRYPT_RETRY_AFTER",
             "AUTH_REFRESH_HASH_KEY",
             "AUTH_ALLOW_AUTO_USER_CREATION",
+            "AUTH_SESSION_STORE",
+            "AUTH_TOKEN_CACHE_SIZE",
+            "AUTH_TOKEN_REVOCATION_CHECK",
+            "AUTH_SESSION_TOMBSTONE_SECONDS",
+            "AUTH_SESSION_FLUSH_INTERVAL",
+            "AUTH_SESSION_FLUSH_BATCH",
+            "AUTH_SESSION_COMPACT_INTERVAL",
+            "AUTH_SESSION_COMPACT_BATCH",
+            "AUTH_SESSION_REVOKED_GRACE",
             "CAMPUS_AUTH_ENABLED",
             "CAMPUS_AUTH_URL",
             "CAMPUS_AUTH_TIMEOUT",
+            "CAMPUS_AUTH_MAX_CONCURRENCY",
+            "CAMPUS_AUTH_QUEUE_TIMEOUT",
+            "CAMPUS_AUTH_FAILURE_WINDOW",
+            "CAMPUS_AUTH_MAX_FAILURES",
             "REDIS_HOST",
             "REDIS_PORT",
             "REDIS_DB",
@@ -101,8 +184,34 @@ class Config:
             "API_KEY",
             "AI_VECTOR_LIMIT_DAYS",
             "AI_VECTOR_LIMIT_COUNT",
+            "VECTOR_INDEX_TYPE",
+            "VECTOR_INDEX_HNSW_M",
+            "VECTOR_INDEX_HNSW_EF_CONSTRUCTION",
+            "VECTOR_INDEX_IVFFLAT_LISTS",
+            "VECTOR_QUANTIZATION",
+            "VECTOR_RESCORE_FACTOR",
+            "VECTOR_SEARCH_EF_SEARCH",
+            "VECTOR_SEARCH_EF_SEARCH_MAX",
+            "VECTOR_SEARCH_EF_FACTOR",
+            "VECTOR_SEARCH_PROBES",
             "AI_RECENCY_HALF_LIFE_DAYS",
             "AI_RECENCY_WEIGHT",
+            "AI_CONTEXT_TOKEN_BUDGET",
+            "AI_MEMORY_TOKEN_BUDGET",
+            "AI_RERANKER",
+            "AI_RERANK_MODEL_PATH",
+            "AI_RERANK_WEIGHT",
+            "AI_RERANK_CANDIDATES",
+            "AI_RERANK_BATCH_SIZE",
+            "AI_DEBUG_LOG_SAMPLE_RATE",
+            "METRICS_ENABLED",
+            "AI_HTTP_TIMEOUT",
+            "EMBED_HTTP_TIMEOUT",
+            "AI_HTTP_POOL_SIZE",
+            "AI_HTTP_MAX_RETRIES",
+            "AI_CIRCUIT_FAILURE_THRESHOLD",
+            "AI_CIRCUIT_RESET_SECONDS",
+            "API_BLUEPRINTS",
         ]
         for key in keys:
             value = os.getenv(key)
@@ -113,6 +222,42 @@ class Config:
         value = raw_value.strip()
         if key == "DATABASE_URL":
             self.database_url = value or None
+        elif key == "DB_POOL_MIN_SIZE":
+            try:
+                self.db_pool_min_size = max(int(value), 0)
+            except ValueError:
+                pass
+        elif key == "DB_POOL_MAX_SIZE":
+            try:
+                self.db_pool_max_size = max(int(value), 1)
+            except ValueError:
+                pass
+        elif key == "DB_POOL_TIMEOUT":
+            try:
+                self.db_pool_timeout = float(value)
+            except ValueError:
+                pass
+        elif key == "DB_AUTO_MIGRATE":
+            self.db_auto_migrate = value.lower() in ("1", "true", "yes", "on")
+        elif key == "DB_PREPARED_STATEMENTS":
+            self.db_prepared_statements = value.lower() in ("1", "true", "yes", "on")
+        elif key == "DATABASE_REPLICA_URLS":
+            self.database_replica_urls = [part.strip() for part in value.split(",") if part.strip()]
+        elif key == "DB_REPLICA_MAX_LAG":
+            try:
+                self.db_replica_max_lag = max(float(value), 0.0)
+            except ValueError:
+                pass
+        elif key == "DB_REPLICA_LAG_CHECK_INTERVAL":
+            try:
+                self.db_replica_lag_check_interval = max(float(value), 0.0)
+            except ValueError:
+                pass
+        elif key == "DB_REPLICA_RETRY_AFTER":
+            try:
+                self.db_replica_retry_after = max(float(value), 0.0)
+            except ValueError:
+                pass
         elif key == "AUTH_ACCESS_TOKEN_TTL":
             self.auth_access_token_ttl = self._parse_ttl(value, fallback=self.auth_access_token_ttl)
         elif key == "AUTH_REFRESH_TOKEN_TTL":
@@ -124,10 +269,65 @@ class Config:
                 self.auth_password_cost = int(value)
             except ValueError:
                 pass
+        elif key == "AUTH_BCRYPT_WORKERS":
+            try:
+                self.auth_bcrypt_workers = max(int(value), 1)
+            except ValueError:
+                pass
+        elif key == "AUTH_BCRYPT_MAX_QUEUE":
+            try:
+                self.auth_bcrypt_max_queue = max(int(value), 0)
+            except ValueError:
+                pass
+        elif key == "AUTH_BCRYPT_RETRY_AFTER":
+            try:
+                self.auth_bcrypt_retry_after = max(int(value), 1)
+            except ValueError:
+                pass
         elif key == "AUTH_REFRESH_HASH_KEY":
             self.auth_refresh_hash_key = value or None
         elif key == "AUTH_ALLOW_AUTO_USER_CREATION":
             self.auth_allow_auto_user_creation = value.lower() in ("1", "true", "yes", "on")
+        elif key == "AUTH_TOKEN_CACHE_SIZE":
+            try:
+                self.auth_token_cache_size = max(int(value), 0)
+            except ValueError:
+                pass
+        elif key == "AUTH_TOKEN_REVOCATION_CHECK":
+            self.auth_token_revocation_check = value.lower() in ("1", "true", "yes", "on")
+        elif key == "AUTH_SESSION_STORE":
+            if value.lower() in ("redis", "postgres"):
+                self.auth_session_store = value.lower()
+        elif key == "AUTH_SESSION_TOMBSTONE_SECONDS":
+            try:
+                self.auth_session_tombstone_seconds = max(int(value), 60)
+            except ValueError:
+                pass
+        elif key == "AUTH_SESSION_FLUSH_INTERVAL":
+            try:
+                self.auth_session_flush_interval = max(float(value), 0.1)
+            except ValueError:
+                pass
+        elif key == "AUTH_SESSION_FLUSH_BATCH":
+            try:
+                self.auth_session_flush_batch = max(int(value), 1)
+            except ValueError:
+                pass
+        elif key == "AUTH_SESSION_COMPACT_INTERVAL":
+            try:
+                self.auth_session_compact_interval = max(int(value), 0)
+            except ValueError:
+                pass
+        elif key == "AUTH_SESSION_COMPACT_BATCH":
+            try:
+                self.auth_session_compact_batch = max(int(value), 1)
+            except ValueError:
+                pass
+        elif key == "AUTH_SESSION_REVOKED_GRACE":
+            try:
+                self.auth_session_revoked_grace = max(int(value), 0)
+            except ValueError:
+                pass
         elif key == "CAMPUS_AUTH_ENABLED":
             self.campus_auth_enabled = value.lower() in ("1", "true", "yes", "on")
         elif key == "CAMPUS_AUTH_URL":
@@ -137,6 +337,26 @@ class Config:
                 self.campus_auth_timeout = int(value)
             except ValueError:
                 pass
+        elif key == "CAMPUS_AUTH_MAX_CONCURRENCY":
+            try:
+                self.campus_auth_max_concurrency = max(int(value), 1)
+            except ValueError:
+                pass
+        elif key == "CAMPUS_AUTH_QUEUE_TIMEOUT":
+            try:
+                self.campus_auth_queue_timeout = max(float(value), 0.0)
+            except ValueError:
+                pass
+        elif key == "CAMPUS_AUTH_FAILURE_WINDOW":
+            try:
+                self.campus_auth_failure_window = max(int(value), 0)
+            except ValueError:
+                pass
+        elif key == "CAMPUS_AUTH_MAX_FAILURES":
+            try:
+                self.campus_auth_max_failures = max(int(value), 1)
+            except ValueError:
+                pass
         elif key == "REDIS_HOST":
             self.redis_host = value
         elif key == "REDIS_PORT":
@@ -192,6 +412,52 @@ class Config:
                 self.ai_vector_limit_count = int(value)
             except ValueError:
                 pass
+        elif key == "VECTOR_INDEX_TYPE":
+            if value.lower() in ("hnsw", "ivfflat"):
+                self.vector_index_type = value.lower()
+        elif key == "VECTOR_INDEX_HNSW_M":
+            try:
+                self.vector_index_hnsw_m = min(max(int(value), 2), 100)
+            except ValueError:
+                pass
+        elif key == "VECTOR_INDEX_HNSW_EF_CONSTRUCTION":
+            try:
+                self.vector_index_hnsw_ef_construction = min(max(int(value), 4), 1000)
+            except ValueError:
+                pass
+        elif key == "VECTOR_INDEX_IVFFLAT_LISTS":
+            try:
+                self.vector_index_ivfflat_lists = min(max(int(value), 0), 32768)
+            except ValueError:
+                pass
+        elif key == "VECTOR_QUANTIZATION":
+            if value.lower() in ("none", "halfvec", "binary"):
+                self.vector_quantization = value.lower()
+        elif key == "VECTOR_RESCORE_FACTOR":
+            try:
+                self.vector_rescore_factor = min(max(int(value), 1), 50)
+            except ValueError:
+                pass
+        elif key == "VECTOR_SEARCH_EF_SEARCH":
+            try:
+                self.vector_search_ef_search = min(max(int(value), 1), 1000)
+            except ValueError:
+                pass
+        elif key == "VECTOR_SEARCH_EF_SEARCH_MAX":
+            try:
+                self.vector_search_ef_search_max = min(max(int(value), 1), 1000)
+            except ValueError:
+                pass
+        elif key == "VECTOR_SEARCH_EF_FACTOR":
+            try:
+                self.vector_search_ef_factor = max(float(value), 1.0)
+            except ValueError:
+                pass
+        elif key == "VECTOR_SEARCH_PROBES":
+            try:
+                self.vector_search_probes = max(int(value), 1)
+            except ValueError:
+                pass
         elif key == "AI_RECENCY_HALF_LIFE_DAYS":
             try:
                 self.ai_recency_half_life_days = float(value)
@@ -202,6 +468,78 @@ class Config:
                 self.ai_recency_weight = float(value)
             except ValueError:
                 pass
+        elif key == "AI_CONTEXT_TOKEN_BUDGET":
+            try:
+                budget = int(value)
+                if budget > 0:
+                    self.ai_context_token_budget = budget
+            except ValueError:
+                pass
+        elif key == "AI_MEMORY_TOKEN_BUDGET":
+            try:
+                budget = int(value)
+                if budget > 0:
+                    self.ai_memory_token_budget = budget
+            except ValueError:
+                pass
+        elif key == "AI_RERANKER":
+            self.ai_reranker = (value or "none").lower()
+        elif key == "AI_RERANK_MODEL_PATH":
+            self.ai_rerank_model_path = value or None
+        elif key == "AI_RERANK_WEIGHT":
+            try:
+                self.ai_rerank_weight = float(value)
+            except ValueError:
+                pass
+        elif key == "AI_RERANK_CANDIDATES":
+            try:
+                self.ai_rerank_candidates = max(int(value), 1)
+            except ValueError:
+                pass
+        elif key == "AI_RERANK_BATCH_SIZE":
+            try:
+                self.ai_rerank_batch_size = max(int(value), 1)
+            except ValueError:
+                pass
+        elif key == "AI_DEBUG_LOG_SAMPLE_RATE":
+            try:
+                self.ai_debug_log_sample_rate = min(max(float(value), 0.0), 1.0)
+            except ValueError:
+                pass
+        elif key == "METRICS_ENABLED":
+            self.metrics_enabled = value.lower() in ("1", "true", "yes", "on")
+        elif key == "AI_HTTP_TIMEOUT":
+            try:
+                self.ai_http_timeout = float(value)
+            except ValueError:
+                pass
+        elif key == "EMBED_HTTP_TIMEOUT":
+            try:
+                self.embed_http_timeout = float(value)
+            except ValueError:
+                pass
+        elif key == "AI_HTTP_POOL_SIZE":
+            try:
+                self.ai_http_pool_size = max(int(value), 1)
+            except ValueError:
+                pass
+        elif key == "AI_HTTP_MAX_RETRIES":
+            try:
+                self.ai_http_max_retries = max(int(value), 0)
+            except ValueError:
+                pass
+        elif key == "AI_CIRCUIT_FAILURE_THRESHOLD":
+            try:
+                self.ai_circuit_failure_threshold = max(int(value), 1)
+            except ValueError:
+                pass
+        elif key == "AI_CIRCUIT_RESET_SECONDS":
+            try:
+                self.ai_circuit_reset_seconds = float(value)
+            except ValueError:
+                pass
+        elif key == "API_BLUEPRINTS":
+            self.api_blueprints = [part.strip().lower() for part in value.split(",") if part.strip()]
 
     @staticmethod
     def _parse_ttl(raw: str, fallback: timedelta) -> timedelta:
@@ -1,15 +1,54 @@
 from __future__ import annotations
 
 import contextlib
+import itertools
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Iterator
 
 import psycopg
 from psycopg.rows import dict_row
+from psycopg_pool import ConnectionPool, PoolTimeout
 
 from backend.config import Config
+from backend.utils import telemetry
 
 
 cfg = Config()
 
+_pool: ConnectionPool | None = None
+_pool_pid: int | None = None
+_pool_lock = threading.Lock()
+
+# 副本回放延迟（秒）：已收到的 WAL 全部回放完毕时视为 0，否则取最近一次回放的事务距今的时间
+REPLICA_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END AS lag
+"""
+
+# 副本连接池繁忙时最多等待这么久，随后改走主库
+REPLICA_CHECKOUT_TIMEOUT = 1.0
+
+
+@dataclass
+class _Replica:
+    name: str
+    pool: ConnectionPool
+    lag: float = 0.0
+    checked_at: float | None = None  # time.monotonic()，None 表示尚未检测
+    down_until: float = 0.0
+    connect_errors: int = 0  # 上次观察到的连接池建连失败次数
+
+
+_replicas: list[_Replica] = []
+_replicas_pid: int | None = None
+_replica_cursor = itertools.count()
+
 
 def get_connection() -> psycopg.Connection:
     if not cfg.database_url:
@@ -17,52 +56,154 @@ def get_connection() -> psycopg.Connection:
     return psycopg.connect(cfg.database_url, row_factory=dict_row, connect_timeout=5)
 
 
+def get_pool() -> ConnectionPool:
+    """获取进程内共享的连接池（按 PID 懒加载，fork 后的子进程会重建）。"""
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+    with _pool_lock:
+        if _pool is None or _pool_pid != pid:
+            if not cfg.database_url:
+                raise RuntimeError("DATABASE_URL 未配置，无法连接数据库")
+            _pool = ConnectionPool(
+                cfg.database_url,
+                min_size=cfg.db_pool_min_size,
+                max_size=max(cfg.db_pool_max_size, cfg.db_pool_min_size),
+                timeout=cfg.db_pool_timeout,
+                kwargs={"row_factory": dict_row, "connect_timeout": 5},
+                name="oap-backend",
+                open=True,
+            )
+            _pool_pid = pid
+    return _pool
+
+
 @contextlib.contextmanager
 def db_session():
-    conn = get_connection()
-    try:
+    """从连接池借出连接；正常退出时提交，异常时回滚，随后归还连接池。"""
+    with get_pool().connection() as conn:
         yield conn
-    finally:
-        conn.close()
 
-def init_db() -> None:
-    dim = cfg.embed_dim
-    statements = [
-        "CREATE EXTENSION IF NOT EXISTS vector;",
-        """
-        CREATE TABLE IF NOT EXISTS articles (
-            id BIGSERIAL PRIMARY KEY,
-            title TEXT NOT NULL,
-            unit TEXT,
-            link TEXT NOT NULL UNIQUE,
-            published_on DATE NOT NULL,
-            content TEXT NOT NULL,
-            summary TEXT NOT NULL,
-            attachments JSONB DEFAULT '[]'::jsonb,
-            created_at TIMESTAMPTZ DEFAULT NOW(),
-            updated_at TIMESTAMPTZ DEFAULT NOW()
-        );
-        """,
-        "CREATE INDEX IF NOT EXISTS idx_articles_published_on ON articles (published_on);",
-        f"""
-        CREATE TABLE IF NOT EXISTS vectors (
-            id BIGSERIAL PRIMARY KEY,
-            article_id BIGINT REFERENCES articles(id) ON DELETE CASCADE,
-            embedding vector({dim}),
-            published_on DATE NOT NULL,
-            created_at TIMESTAMPTZ DEFAULT NOW(),
-            updated_at TIMESTAMPTZ DEFAULT NOW()
-        );
-        """,
-        "CREATE INDEX IF NOT EXISTS idx_vectors_published_on ON vectors (published_on);",
-        "CREATE UNIQUE INDEX IF NOT EXISTS idx_vectors_article ON vectors(article_id);",
-        "CREATE INDEX IF NOT EXISTS idx_vectors_embedding_hnsw ON vectors USING hnsw (embedding vector_cosine_ops);",
+
+def _configure_replica(conn: psycopg.Connection) -> None:
+    conn.read_only = True
+
+
+def _get_replicas() -> list[_Replica]:
+    """获取进程内的副本连接池（按 PID 懒加载，与主库连接池一致）。"""
+    global _replicas, _replicas_pid
+    pid = os.getpid()
+    if _replicas_pid == pid:
+        return _replicas
+    with _pool_lock:
+        if _replicas_pid != pid:
+            _replicas = [
+                _Replica(
+                    name=f"replica-{index}",
+                    pool=ConnectionPool(
+                        url,
+                        min_size=cfg.db_pool_min_size,
+                        max_size=max(cfg.db_pool_max_size, cfg.db_pool_min_size),
+                        timeout=cfg.db_pool_timeout,
+                        kwargs={"row_factory": dict_row, "connect_timeout": 5},
+                        configure=_configure_replica,
+                        name=f"oap-backend-replica-{index}",
+                        open=True,
+                    ),
+                )
+                for index, url in enumerate(cfg.database_replica_urls)
+            ]
+            _replicas_pid = pid
+    return _replicas
+
+
+def _replica_candidates() -> list[_Replica]:
+    """按轮询顺序列出可尝试的副本：跳过暂停中的副本，以及最近一次检测已超出延迟预算的副本。"""
+    replicas = _get_replicas()
+    if not replicas:
+        return []
+    now = time.monotonic()
+    start = next(_replica_cursor) % len(replicas)
+    candidates = []
+    for replica in replicas[start:] + replicas[:start]:
+        if replica.down_until > now:
+            continue
+        fresh = replica.checked_at is not None and now - replica.checked_at < cfg.db_replica_lag_check_interval
+        if fresh and replica.lag > cfg.db_replica_max_lag:
+            continue
+        candidates.append(replica)
+    return candidates
+
+
+def _within_lag(replica: _Replica, conn: psycopg.Connection) -> bool:
+    """检测结果过期时在借出的连接上重新查询回放延迟，并判断是否在预算内。"""
+    now = time.monotonic()
+    if replica.checked_at is None or now - replica.checked_at >= cfg.db_replica_lag_check_interval:
+        row = conn.execute(REPLICA_LAG_SQL).fetchone()
+        replica.lag = float(row["lag"] or 0)
+        replica.checked_at = now
+    return replica.lag <= cfg.db_replica_max_lag
+
+
+def _mark_down(replica: _Replica) -> None:
+    replica.down_until = time.monotonic() + cfg.db_replica_retry_after
+    telemetry.incr("oap_db_replica_errors_total", labels={"replica": replica.name})
+
+
+@contextlib.contextmanager
+def read_session() -> Iterator[psycopg.Connection]:
+    """借出只读连接：优先使用回放延迟在预算内的副本，否则回落到主库。
+
+    副本连接不上时暂停使用该副本 DB_REPLICA_RETRY_AFTER 秒；副本连接池繁忙时本次改走主库。
+    只用于可以容忍 DB_REPLICA_MAX_LAG 秒旧数据的读取（文章列表、详情、向量检索）。
+    认证相关的读写始终经 db_session() 访问主库，刚写入的用户与会话随即可读。
+    """
+    for replica in _replica_candidates():
+        with contextlib.ExitStack() as stack:
+            try:
+                conn = stack.enter_context(replica.pool.connection(timeout=REPLICA_CHECKOUT_TIMEOUT))
+                usable = _within_lag(replica, conn)
+            except PoolTimeout:
+                # 等待期间池内新建连接又失败了说明副本连不上；否则只是繁忙，短暂让出给其他副本或主库
+                errors = replica.pool.get_stats().get("connections_errors", 0)
+                if errors > replica.connect_errors:
+                    _mark_down(replica)
+                else:
+                    replica.down_until = time.monotonic() + cfg.db_replica_lag_check_interval
+                replica.connect_errors = errors
+                continue
+            except psycopg.OperationalError:
+                _mark_down(replica)
+                continue
+            if usable:
+                telemetry.incr("oap_db_read_sessions_total", labels={"target": replica.name})
+                yield conn
+                return
+    if _replicas:
+        telemetry.incr("oap_db_read_sessions_total", labels={"target": "primary"})
+    with db_session() as conn:
+        yield conn
+
+
+def replica_status() -> list[dict[str, Any]]:
+    """各副本最近一次检测到的回放延迟与可用状态。"""
+    now = time.monotonic()
+    return [
+        {
+            "name": replica.name,
+            "lag_seconds": replica.lag if replica.checked_at is not None else None,
+            "within_budget": replica.lag <= cfg.db_replica_max_lag,
+            "down": replica.down_until > now,
+        }
+        for replica in _get_replicas()
     ]
 
-    with get_connection() as conn, conn.cursor() as cur:
-        for stmt in statements:
-            cur.execute(stmt)
-        conn.commit()
+def init_db() -> None:
+    """执行所有待执行的结构迁移（见 backend/migrations.py）。"""
+    from backend.migrations import apply_migrations
+
+    apply_migrations()
 
 
-__all__ = ["db_session", "get_connection", "init_db"]
+__all__ = ["db_session", "get_connection", "get_pool", "init_db", "read_session", "replica_status"]
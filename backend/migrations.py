@@ -0,0 +1,659 @@
+"""数据库结构版本化迁移。
+
+所有 DDL 集中在 MIGRATIONS 中，按版本号顺序执行，已执行的版本记录在 schema_version 表。
+迁移只在部署时通过 backend/scripts/migrate.py 执行（持有咨询锁，多个部署任务并发时
+只有一个真正执行）；应用进程启动时只做一次版本检查，不再逐个 worker 执行 CREATE 语句。
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Optional
+
+import psycopg
+
+from backend.config import Config
+from backend.db import db_session, get_connection
+from backend.vector_index import check_quantization_support, index_name, index_status
+
+
+logger = logging.getLogger(__name__)
+
+# 迁移咨询锁的键，与会话压缩任务的锁互不冲突
+MIGRATION_LOCK_KEY = 704_202_042
+# 列表索引：INCLUDE 只带定长列，避免超长文本超过 B-tree 单条索引项上限
+SCHEMA_VERSION_DDL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INT PRIMARY KEY,
+    name TEXT NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    statements: Callable[[Config], list[str]]
+
+
+@dataclass
+class SchemaStatus:
+    current: int
+    latest: int
+
+    @property
+    def pending(self) -> int:
+        return max(self.latest - self.current, 0)
+
+    @property
+    def up_to_date(self) -> bool:
+        return self.current >= self.latest
+
+
+def _articles_and_vectors(cfg: Config) -> list[str]:
+    return [
+        "CREATE EXTENSION IF NOT EXISTS vector;",
+        """
+        CREATE TABLE IF NOT EXISTS articles (
+            id BIGSERIAL PRIMARY KEY,
+            title TEXT NOT NULL,
+            unit TEXT,
+            link TEXT NOT NULL UNIQUE,
+            published_on DATE NOT NULL,
+            content TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            attachments JSONB DEFAULT '[]'::jsonb,
+            created_at TIMESTAMPTZ DEFAULT NOW(),
+            updated_at TIMESTAMPTZ DEFAULT NOW()
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_articles_published_on ON articles (published_on);",
+        f"""
+        CREATE TABLE IF NOT EXISTS vectors (
+            id BIGSERIAL PRIMARY KEY,
+            article_id BIGINT REFERENCES articles(id) ON DELETE CASCADE,
+            embedding vector({cfg.embed_dim}),
+            published_on DATE NOT NULL,
+            created_at TIMESTAMPTZ DEFAULT NOW(),
+            updated_at TIMESTAMPTZ DEFAULT NOW()
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_vectors_published_on ON vectors (published_on);",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_vectors_article ON vectors(article_id);",
+        "CREATE INDEX IF NOT EXISTS idx_vectors_embedding_hnsw ON vectors USING hnsw (embedding vector_cosine_ops);",
+    ]
+
+
+def _users_and_sessions(cfg: Config) -> list[str]:
+    return [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id UUID PRIMARY KEY,
+            username TEXT NOT NULL UNIQUE,
+            display_name TEXT NOT NULL,
+            password_hash TEXT NOT NULL,
+            password_algo TEXT NOT NULL,
+            password_cost INT NOT NULL,
+            roles TEXT[] NOT NULL DEFAULT '{}',
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+            last_login_at TIMESTAMPTZ
+        );
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS sessions (
+            id UUID PRIMARY KEY,
+            user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+            refresh_token_sha TEXT NOT NULL UNIQUE,
+            expires_at TIMESTAMPTZ NOT NULL,
+            user_agent TEXT,
+            ip TEXT,
+            revoked_at TIMESTAMPTZ,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        """,
+        "CREATE INDEX IF NOT EXISTS sessions_user_id_idx ON sessions(user_id);",
+    ]
+
+
+def _session_compaction(cfg: Config) -> list[str]:
+    # 部分索引只覆盖待清理的行，供会话压缩任务按批定位
+    return [
+        "CREATE INDEX IF NOT EXISTS sessions_active_expires_at_idx ON sessions(expires_at) WHERE revoked_at IS NULL;",
+        "CREATE INDEX IF NOT EXISTS sessions_revoked_at_idx ON sessions(revoked_at) WHERE revoked_at IS NOT NULL;",
+        "CREATE TABLE IF NOT EXISTS sessions_archive (LIKE sessions);",
+    ]
+
+
+def _partition_articles(cfg: Config) -> list[str]:
+    """把 articles / vectors 改为按 published_on 按月声明式分区。
+
+    分区表的主键与唯一约束必须包含分区键，因此主键变为 (id, published_on)，
+    link 唯一约束变为 (link, published_on)（全局去重由迁移 9 的 article_links 恢复），
+    vectors 通过 (article_id, published_on) 引用 articles。HNSW 索引建在父表上，每个分区各自维护一份本地索引。
+    原表改名后整体搬迁，沿用原有的 id 序列。
+    """
+    return [
+        """
+        CREATE OR REPLACE FUNCTION ensure_article_partitions(from_date DATE, to_date DATE)
+        RETURNS INT
+        LANGUAGE plpgsql AS $$
+        DECLARE
+            month_start DATE := date_trunc('month', from_date)::date;
+            suffix TEXT;
+            created INT := 0;
+        BEGIN
+            WHILE month_start <= to_date LOOP
+                suffix := to_char(month_start, 'YYYY_MM');
+                IF to_regclass('articles_p' || suffix) IS NULL THEN
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF articles FOR VALUES FROM (%L) TO (%L)',
+                        'articles_p' || suffix, month_start, (month_start + INTERVAL '1 month')::date
+                    );
+                    created := created + 1;
+                END IF;
+                IF to_regclass('vectors_p' || suffix) IS NULL THEN
+                    EXECUTE format(
+                        'CREATE TABLE %I PARTITION OF vectors FOR VALUES FROM (%L) TO (%L)',
+                        'vectors_p' || suffix, month_start, (month_start + INTERVAL '1 month')::date
+                    );
+                    created := created + 1;
+                END IF;
+                month_start := (month_start + INTERVAL '1 month')::date;
+            END LOOP;
+            RETURN created;
+        END;
+        $$;
+        """,
+        "DROP INDEX IF EXISTS idx_vectors_embedding_hnsw;",
+        "DROP INDEX IF EXISTS idx_vectors_published_on;",
+        "DROP INDEX IF EXISTS idx_vectors_article;",
+        "DROP INDEX IF EXISTS idx_articles_published_on;",
+        "ALTER TABLE vectors RENAME TO vectors_legacy;",
+        "ALTER TABLE vectors_legacy RENAME CONSTRAINT vectors_pkey TO vectors_legacy_pkey;",
+        "ALTER TABLE articles RENAME TO articles_legacy;",
+        "ALTER TABLE articles_legacy RENAME CONSTRAINT articles_pkey TO articles_legacy_pkey;",
+        "ALTER TABLE articles_legacy RENAME CONSTRAINT articles_link_key TO articles_legacy_link_key;",
+        """
+        CREATE TABLE articles (
+            id BIGINT NOT NULL DEFAULT nextval('articles_id_seq'),
+            title TEXT NOT NULL,
+            unit TEXT,
+            link TEXT NOT NULL,
+            published_on DATE NOT NULL,
+            content TEXT NOT NULL,
+            summary TEXT NOT NULL,
+            attachments JSONB DEFAULT '[]'::jsonb,
+            created_at TIMESTAMPTZ DEFAULT NOW(),
+            updated_at TIMESTAMPTZ DEFAULT NOW(),
+            CONSTRAINT articles_pkey PRIMARY KEY (id, published_on),
+            CONSTRAINT articles_link_key UNIQUE (link, published_on)
+        ) PARTITION BY RANGE (published_on);
+        """,
+        "ALTER SEQUENCE articles_id_seq OWNED BY articles.id;",
+        f"""
+        CREATE TABLE vectors (
+            id BIGINT NOT NULL DEFAULT nextval('vectors_id_seq'),
+            article_id BIGINT NOT NULL,
+            embedding vector({cfg.embed_dim}),
+            published_on DATE NOT NULL,
+            created_at TIMESTAMPTZ DEFAULT NOW(),
+            updated_at TIMESTAMPTZ DEFAULT NOW(),
+            CONSTRAINT vectors_pkey PRIMARY KEY (id, published_on),
+            CONSTRAINT idx_vectors_article UNIQUE (article_id, published_on),
+            CONSTRAINT vectors_article_fkey FOREIGN KEY (article_id, published_on)
+                REFERENCES articles (id, published_on) ON DELETE CASCADE
+        ) PARTITION BY RANGE (published_on);
+        """,
+        "ALTER SEQUENCE vectors_id_seq OWNED BY vectors.id;",
+        """
+        SELECT ensure_article_partitions(
+            LEAST(
+                COALESCE((SELECT MIN(published_on) FROM articles_legacy), CURRENT_DATE),
+                CURRENT_DATE
+            ),
+            GREATEST(
+                COALESCE((SELECT MAX(published_on) FROM articles_legacy), CURRENT_DATE),
+                (CURRENT_DATE + INTERVAL '3 months')::date
+            )
+        );
+        """,
+        """
+        INSERT INTO articles (id, title, unit, link, published_on, content, summary, attachments, created_at, updated_at)
+        SELECT id, title, unit, link, published_on, content, summary, attachments, created_at, updated_at
+        FROM articles_legacy;
+        """,
+        """
+        INSERT INTO vectors (id, article_id, embedding, published_on, created_at, updated_at)
+        SELECT v.id, v.article_id, v.embedding, a.published_on, v.created_at, v.updated_at
+        FROM vectors_legacy v
+        JOIN articles_legacy a ON a.id = v.article_id;
+        """,
+        "DROP TABLE vectors_legacy;",
+        "DROP TABLE articles_legacy;",
+        "CREATE INDEX idx_articles_published_on ON articles (published_on);",
+        "CREATE INDEX idx_vectors_published_on ON vectors (published_on);",
+        # 建在父表上的索引会在每个分区（包括之后新建的分区）上各建一份
+        "CREATE INDEX idx_vectors_embedding_hnsw ON vectors USING hnsw (embedding vector_cosine_ops);",
+    ]
+
+
+def _article_stats(cfg: Config) -> list[str]:
+    """每日文章数与 ID 边界，由爬虫入库时维护，供列表接口计算 has_more / total。"""
+    return [
+        """
+        CREATE TABLE IF NOT EXISTS article_stats (
+            published_on DATE PRIMARY KEY,
+            article_count INT NOT NULL DEFAULT 0,
+            min_id BIGINT,
+            max_id BIGINT,
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        """,
+        """
+        INSERT INTO article_stats (published_on, article_count, min_id, max_id)
+        SELECT published_on, COUNT(*), MIN(id), MAX(id)
+        FROM articles
+        GROUP BY published_on
+        ON CONFLICT (published_on) DO UPDATE
+        SET article_count = EXCLUDED.article_count,
+            min_id = EXCLUDED.min_id,
+            max_id = EXCLUDED.max_id,
+            updated_at = now();
+        """,
+    ]
+
+
+def _list_indexes(cfg: Config) -> list[str]:
+    """列表查询的复合覆盖索引（已并入迁移 10）。
+
+    原先在这里建 idx_articles_published_on_id，迁移 10 又以新定义重建一遍，新库会白建一次索引。
+    索引只在 _list_index_bounded() 中定义，本版本保留为空以维持版本号连续。
+    """
+    return []
+
+
+def _list_index_bounded(cfg: Config) -> list[str]:
+    """重建列表索引，INCLUDE 只保留定长列。
+
+    早先的定义 INCLUDE 了 title / unit / link，这些 TEXT 列没有长度上限，超长标题会让
+    INSERT 因超过 B-tree 单条索引项上限而失败；而 API 列表还要读 summary / attachments，
+    本来也做不到仅索引扫描。现在只带 created_at / updated_at：爬虫按日期取 (id, updated_at)
+    比对缓存版本时是仅索引扫描，列表查询仍按索引顺序回表。
+
+    (published_on, id DESC) 同时服务按日期取列表（today、爬虫去重与缓存刷新）与
+    published_on < ? 的边界判断，替代原先单列的 published_on 索引。
+    """
+    return [
+        "DROP INDEX IF EXISTS idx_articles_published_on;",
+        "DROP INDEX IF EXISTS idx_articles_published_on_id;",
+        "CREATE INDEX idx_articles_published_on_id ON articles (published_on, id DESC) INCLUDE (created_at, updated_at);",
+    ]
+
+
+def _vector_quantization(cfg: Config) -> list[str]:
+    """更新 pgvector 扩展对象。
+
+    ALTER EXTENSION ... UPDATE 让升级了共享库（>= 0.7）的实例获得 halfvec 与 binary_quantize。
+    迁移的结构不随配置变化：量化索引不在这里建（事务内的 CREATE INDEX 会在整个构建期间阻塞
+    vectors 的写入），配置 VECTOR_QUANTIZATION 后由 scripts/vector_index.py --rebuild 在线建立；
+    配置与现有索引不一致时启动检查会告警。
+    """
+    return ["ALTER EXTENSION vector UPDATE;"]
+
+
+def _article_search(cfg: Config) -> list[str]:
+    """关键词检索：中文按相邻二字切分（bigram），英文与数字按整词，建立表达式 GIN 索引。
+
+    不依赖 zhparser 等分词扩展与外部服务。检索词同样切分后以 AND 组合；单个汉字与英文、
+    数字词按前缀匹配，因此“奖”“cet”也能命中“奖学金”“cet4”。爬虫每次只写入少量文章，
+    索引关闭 fastupdate，新文章直接进入索引，检索不必线性扫描待合并列表。
+    """
+    return [
+        r"""
+        CREATE OR REPLACE FUNCTION search_terms(doc text) RETURNS text[]
+        LANGUAGE plpgsql IMMUTABLE PARALLEL SAFE AS $$
+        DECLARE
+            run text;
+            terms text[] := ARRAY[]::text[];
+        BEGIN
+            FOR run IN
+                SELECT m[1]
+                FROM regexp_matches(
+                    lower(COALESCE(doc, '')),
+                    '([a-z0-9]+|[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+)',
+                    'g'
+                ) AS m
+            LOOP
+                IF run ~ '^[a-z0-9]+$' OR char_length(run) = 1 THEN
+                    terms := terms || run;
+                ELSE
+                    FOR i IN 1 .. char_length(run) - 1 LOOP
+                        terms := terms || substr(run, i, 2);
+                    END LOOP;
+                END IF;
+            END LOOP;
+            RETURN terms;
+        END;
+        $$;
+        """,
+        """
+        CREATE OR REPLACE FUNCTION article_search_vector(title text, unit text, summary text) RETURNS tsvector
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+            SELECT array_to_tsvector(ARRAY(
+                SELECT DISTINCT unnest(search_terms(
+                    COALESCE(title, '') || ' ' || COALESCE(unit, '') || ' ' || COALESCE(summary, '')
+                ))
+            ))
+        $$;
+        """,
+        """
+        CREATE OR REPLACE FUNCTION article_search_query(q text) RETURNS tsquery
+        LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+            SELECT string_agg(
+                quote_literal(term)
+                    || CASE WHEN term ~ '^[a-z0-9]+$' OR char_length(term) = 1 THEN ':*' ELSE '' END,
+                ' & '
+            )::tsquery
+            FROM (SELECT DISTINCT unnest(search_terms(q)) AS term) AS terms
+        $$;
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_articles_search
+        ON articles USING gin (article_search_vector(title, unit, summary))
+        WITH (fastupdate = off);
+        """,
+    ]
+
+
+def _article_links(cfg: Config) -> list[str]:
+    """按链接全局去重的登记表。
+
+    分区后 articles 上的唯一约束只能是 (link, published_on)，同一链接改期重发或跨日重爬时
+    会插入重复文章（并随之生成重复向量）。article_links 不分区，以 link 为主键，爬虫入库时
+    先在这里登记链接并领取文章 id，登记冲突即视为已存在。已有数据中同一链接的多篇文章保留
+    各自的行，登记表只记录最早的一篇。
+    """
+    return [
+        """
+        CREATE TABLE IF NOT EXISTS article_links (
+            link TEXT PRIMARY KEY,
+            article_id BIGINT NOT NULL,
+            published_on DATE NOT NULL,
+            CONSTRAINT article_links_article_fkey FOREIGN KEY (article_id, published_on)
+                REFERENCES articles (id, published_on) ON DELETE CASCADE
+        );
+        """,
+        """
+        INSERT INTO article_links (link, article_id, published_on)
+        SELECT DISTINCT ON (link) link, id, published_on
+        FROM articles
+        ORDER BY link, published_on, id
+        ON CONFLICT (link) DO NOTHING;
+        """,
+    ]
+
+
+# 版本号只增不改；已上线的迁移不要修改，新的结构变更追加新版本。
+# 前几个版本使用 IF NOT EXISTS，已有数据库首次执行时会被平滑地记为已迁移。
+MIGRATIONS: list[Migration] = [
+    Migration(1, "articles_and_vectors", _articles_and_vectors),
+    Migration(2, "users_and_sessions", _users_and_sessions),
+    Migration(3, "session_compaction", _session_compaction),
+    Migration(4, "partition_articles", _partition_articles),
+    Migration(5, "article_stats", _article_stats),
+    Migration(6, "list_indexes", _list_indexes),
+    Migration(7, "vector_quantization", _vector_quantization),
+    Migration(8, "article_search", _article_search),
+    Migration(9, "article_links", _article_links),
+    Migration(10, "list_index_bounded", _list_index_bounded),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+# 自该版本起 articles / vectors 为分区表
+PARTITIONED_SINCE_VERSION = 4
+
+# 热点查询依赖的索引：(表, 索引名)。分区表上还会检查每个分区都有有效的本地索引。
+# 向量索引随 VECTOR_INDEX_TYPE 而定，由 check_indexes() 追加。
+REQUIRED_INDEXES: list[tuple[str, str]] = [
+    ("articles", "articles_pkey"),
+    ("articles", "articles_link_key"),
+    ("article_links", "article_links_pkey"),
+    ("articles", "idx_articles_published_on_id"),
+    ("articles", "idx_articles_search"),
+    ("vectors", "idx_vectors_article"),
+    ("vectors", "idx_vectors_published_on"),
+    ("sessions", "sessions_user_id_idx"),
+    ("sessions", "sessions_active_expires_at_idx"),
+    ("sessions", "sessions_revoked_at_idx"),
+]
+
+
+def current_version(conn: psycopg.Connection) -> int:
+    """读取已执行的最高版本；schema_version 表不存在时返回 0。"""
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('schema_version') IS NOT NULL AS present")
+        row = cur.fetchone()
+        if not row or not row["present"]:
+            return 0
+        cur.execute("SELECT COALESCE(MAX(version), 0) AS version FROM schema_version")
+        row = cur.fetchone()
+    return int(row["version"]) if row else 0
+
+
+def check_schema(conn: Optional[psycopg.Connection] = None) -> SchemaStatus:
+    """只读的版本检查，应用启动时的快速路径。"""
+    if conn is not None:
+        return SchemaStatus(current=current_version(conn), latest=LATEST_VERSION)
+    with db_session() as pooled:
+        return SchemaStatus(current=current_version(pooled), latest=LATEST_VERSION)
+
+
+def apply_migrations(target: Optional[int] = None, cfg: Optional[Config] = None) -> list[int]:
+    """在咨询锁内执行所有待执行的迁移，返回本次执行的版本号。
+
+    每个版本在独立事务中执行并写入 schema_version；并发的部署任务会在锁上等待，
+    拿到锁后发现已无待执行版本直接返回。
+    """
+    cfg = cfg or Config()
+    target = LATEST_VERSION if target is None else target
+    applied: list[int] = []
+    with get_connection() as conn:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_lock(%s)", (MIGRATION_LOCK_KEY,))
+        try:
+            with conn.cursor() as cur:
+                cur.execute(SCHEMA_VERSION_DDL)
+            done = current_version(conn)
+            for migration in MIGRATIONS:
+                if migration.version <= done or migration.version > target:
+                    continue
+                with conn.transaction(), conn.cursor() as cur:
+                    for stmt in migration.statements(cfg):
+                        cur.execute(stmt)
+                    cur.execute(
+                        "INSERT INTO schema_version (version, name) VALUES (%s, %s)",
+                        (migration.version, migration.name),
+                    )
+                logger.info("已执行迁移 %s_%s", migration.version, migration.name)
+                applied.append(migration.version)
+        finally:
+            with conn.cursor() as cur:
+                cur.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_KEY,))
+    return applied
+
+
+def ensure_partitions(months_ahead: int = 3, from_date: Optional[date] = None) -> int:
+    """为 articles / vectors 预建从 from_date（默认今天）起 months_ahead 个月的分区，返回新建数量。"""
+    with get_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            "SELECT ensure_article_partitions(%s, (%s::date + make_interval(months => %s))::date) AS created",
+            (from_date or date.today(), from_date or date.today(), max(months_ahead, 0)),
+        )
+        row = cur.fetchone()
+        conn.commit()
+    return int(row["created"]) if row else 0
+
+
+def detach_partitions_before(cutoff: date) -> list[str]:
+    """分离整月早于 cutoff 的分区（先 vectors 后 articles），返回被分离的表名。
+
+    分离后的表仍在库中，可按需归档（pg_dump）后删除；分离只修改目录信息，不搬迁数据。
+    articles 分区只有在没有外键引用其中的行时才能分离，因此同一事务内先删除该月的
+    article_links 登记，并去掉已分离的 vectors 表上仍指向 articles 的外键。
+    """
+    detached: list[str] = []
+    with get_connection() as conn, conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT c.relname AS name
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = 'articles'::regclass
+            ORDER BY c.relname
+            """
+        )
+        suffixes = [row["name"][len("articles_p"):] for row in cur.fetchall()]
+        for suffix in suffixes:
+            year, month = (int(part) for part in suffix.split("_"))
+            month_end = date(year + month // 12, month % 12 + 1, 1)
+            if month_end > cutoff:
+                continue
+            vectors_partition = f"vectors_p{suffix}"
+            cur.execute("SELECT to_regclass(%s) IS NOT NULL AS present", (vectors_partition,))
+            if cur.fetchone()["present"]:
+                cur.execute(f'ALTER TABLE vectors DETACH PARTITION "{vectors_partition}"')
+                cur.execute(
+                    """
+                    SELECT conname FROM pg_constraint
+                    WHERE conrelid = %s::regclass AND confrelid = 'articles'::regclass AND contype = 'f'
+                    """,
+                    (vectors_partition,),
+                )
+                for row in cur.fetchall():
+                    cur.execute(f'ALTER TABLE "{vectors_partition}" DROP CONSTRAINT "{row["conname"]}"')
+                detached.append(vectors_partition)
+            cur.execute("SELECT to_regclass('article_links') IS NOT NULL AS present")
+            if cur.fetchone()["present"]:
+                cur.execute(
+                    f"""
+                    DELETE FROM article_links AS l
+                    USING "articles_p{suffix}" AS a
+                    WHERE l.link = a.link AND l.article_id = a.id
+                    """
+                )
+            cur.execute(f'ALTER TABLE articles DETACH PARTITION "articles_p{suffix}"')
+            detached.append(f"articles_p{suffix}")
+        conn.commit()
+    return detached
+
+
+def check_indexes(conn: psycopg.Connection, cfg: Optional[Config] = None) -> list[str]:
+    """检查 REQUIRED_INDEXES，返回问题描述列表（空列表表示全部就绪）。
+
+    会发现缺失的索引、无效索引（例如中断的 CREATE INDEX CONCURRENTLY），以及分区表上
+    尚未建出本地索引的分区。
+    """
+    cfg = cfg or Config()
+    required = [*REQUIRED_INDEXES, ("vectors", index_name(cfg.vector_index_type, cfg.vector_quantization))]
+    problems: list[str] = []
+    unsupported = check_quantization_support(conn, cfg)
+    if unsupported:
+        problems.append(unsupported)
+    with conn.cursor() as cur:
+        for table, index in required:
+            cur.execute(
+                """
+                SELECT i.indexrelid AS oid, i.indisvalid AS valid, c.relkind AS kind
+                FROM pg_index i
+                JOIN pg_class c ON c.oid = i.indrelid
+                WHERE i.indexrelid = to_regclass(%s) AND i.indrelid = to_regclass(%s)
+                """,
+                (index, table),
+            )
+            row = cur.fetchone()
+            if row is None:
+                problems.append(f"{table}.{index}: 缺失")
+                continue
+            if row["kind"] != "p":
+                if not row["valid"]:
+                    problems.append(f"{table}.{index}: 无效")
+                continue
+            cur.execute(
+                """
+                SELECT p.relname AS partition
+                FROM pg_inherits t
+                JOIN pg_class p ON p.oid = t.inhrelid
+                WHERE t.inhparent = %s::regclass
+                  AND NOT EXISTS (
+                      SELECT 1
+                      FROM pg_inherits ii
+                      JOIN pg_index pi ON pi.indexrelid = ii.inhrelid
+                      WHERE ii.inhparent = %s AND pi.indrelid = p.oid AND pi.indisvalid
+                  )
+                ORDER BY p.relname
+                """,
+                (table, row["oid"]),
+            )
+            for missing in cur.fetchall():
+                problems.append(f"{missing['partition']}.{index}: 分区缺少有效的本地索引")
+    return problems
+
+
+def check_vector_index(conn: psycopg.Connection, cfg: Optional[Config] = None) -> Optional[str]:
+    """现有向量索引与 VECTOR_INDEX_TYPE / VECTOR_QUANTIZATION 不一致时返回问题描述。"""
+    cfg = cfg or Config()
+    expected = index_name(cfg.vector_index_type, cfg.vector_quantization)
+    existing = [row["name"] for row in index_status(conn)]
+    if expected in existing:
+        return None
+    return (
+        f"向量索引与配置不一致：配置需要 {expected}，现有 {', '.join(existing) or '无'}，"
+        "请运行 backend/scripts/vector_index.py --rebuild"
+    )
+
+
+def verify_schema_on_startup(auto_migrate: bool = False, cfg: Optional[Config] = None) -> SchemaStatus:
+    """启动时检查结构版本；落后时按 auto_migrate 决定自动迁移或仅告警。
+
+    版本就绪后再检查向量索引是否与配置一致，不一致只告警（重建需要在线执行，不在启动时做）。
+    """
+    status = check_schema()
+    if not status.up_to_date and auto_migrate:
+        apply_migrations()
+        status = check_schema()
+    if status.up_to_date:
+        with db_session() as conn:
+            problem = check_vector_index(conn, cfg)
+        if problem:
+            logger.warning(problem)
+        return status
+    logger.error(
+        "数据库结构版本落后（当前 %s，最新 %s），请先运行 backend/scripts/migrate.py",
+        status.current,
+        status.latest,
+    )
+    return status
+
+
+__all__ = [
+    "LATEST_VERSION",
+    "MIGRATIONS",
+    "PARTITIONED_SINCE_VERSION",
+    "REQUIRED_INDEXES",
+    "Migration",
+    "SchemaStatus",
+    "apply_migrations",
+    "check_indexes",
+    "check_schema",
+    "check_vector_index",
+    "current_version",
+    "detach_partitions_before",
+    "ensure_partitions",
+    "verify_schema_on_startup",
+]
@@ -0,0 +1,53 @@
+"""热点查询登记表。
+
+列表、详情、向量检索与认证中反复执行的 SQL 通过 hot_query() 登记。执行时在每个池化连接上
+首次使用即服务端预备（PREPARE），之后同一连接只发送语句名与参数，省去重复的解析与规划。
+经 PgBouncer 等事务级连接池访问数据库时，可用 DB_PREPARED_STATEMENTS=false 关闭预备。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Optional, Sequence
+
+import psycopg
+
+from backend.config import Config
+
+
+cfg = Config()
+
+
+@dataclass(frozen=True)
+class Query:
+    name: str
+    sql: str
+
+
+_REGISTRY: dict[str, Query] = {}
+
+
+def hot_query(name: str, sql: str) -> Query:
+    """登记一条热点查询；同名重复登记必须是同一条 SQL。"""
+    query = Query(name=name, sql=sql)
+    existing = _REGISTRY.get(name)
+    if existing is not None and existing.sql != sql:
+        raise ValueError(f"热点查询 {name} 重复登记且 SQL 不一致")
+    _REGISTRY[name] = query
+    return query
+
+
+def registered_queries() -> list[Query]:
+    return list(_REGISTRY.values())
+
+
+def execute(
+    cur: psycopg.Cursor,
+    query: Query,
+    params: Optional[Sequence[Any] | dict[str, Any]] = None,
+) -> psycopg.Cursor:
+    """执行登记的查询：启用预备语句时首次执行即在当前连接上 PREPARE。"""
+    return cur.execute(query.sql, params, prepare=cfg.db_prepared_statements)
+
+
+__all__ = ["Query", "execute", "hot_query", "registered_queries"]
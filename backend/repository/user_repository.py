@@ -1,56 +1,47 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from typing import Optional
 from uuid import UUID, uuid4
 
 from backend.models.auth import Session, User, UserCredential
 from backend.db import db_session
+from backend.queries import execute, hot_query
 
 
 class NotFoundError(Exception):
     pass
 
 
-class UserRepository:
-    def __init__(self) -> None:
-        self._ensure_tables()
+_USER_COLUMNS = """
+    id, username, display_name, password_hash, password_algo, password_cost,
+    roles, created_at, updated_at, last_login_at
+"""
+_SESSION_COLUMNS = "id, user_id, refresh_token_sha, expires_at, user_agent, ip, revoked_at, created_at"
+
+USER_BY_USERNAME = hot_query(
+    "users.by_username",
+    f"SELECT {_USER_COLUMNS} FROM users WHERE username = %s",
+)
+USER_BY_ID = hot_query(
+    "users.by_id",
+    f"SELECT {_USER_COLUMNS} FROM users WHERE id = %s",
+)
+USER_BY_SESSION_HASH = hot_query(
+    "users.by_session_hash",
+    f"SELECT {_USER_COLUMNS} FROM users WHERE id = (SELECT user_id FROM sessions WHERE refresh_token_sha = %s)",
+)
+SESSION_BY_HASH = hot_query(
+    "sessions.by_hash",
+    f"SELECT {_SESSION_COLUMNS} FROM sessions WHERE refresh_token_sha = %s",
+)
+SESSION_REVOKE = hot_query(
+    "sessions.revoke",
+    "UPDATE sessions SET revoked_at = %s WHERE id = %s AND revoked_at IS NULL",
+)
 
-    def _ensure_tables(self) -> None:
-        with db_session() as conn:
-            with conn.cursor() as cur:
-                cur.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS users (
-                        id UUID PRIMARY KEY,
-                        username TEXT NOT NULL UNIQUE,
-                        display_name TEXT NOT NULL,
-                        password_hash TEXT NOT NULL,
-                        password_algo TEXT NOT NULL,
-                        password_cost INT NOT NULL,
-                        roles TEXT[] NOT NULL DEFAULT '{}',
-                        created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
-                        updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
-                        last_login_at TIMESTAMPTZ
-                    );
-                    """
-                )
-                cur.execute(
-                    """
-                    CREATE TABLE IF NOT EXISTS sessions (
-                        id UUID PRIMARY KEY,
-                        user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
-                        refresh_token_sha TEXT NOT NULL UNIQUE,
-                        expires_at TIMESTAMPTZ NOT NULL,
-                        user_agent TEXT,
-                        ip TEXT,
-                        revoked_at TIMESTAMPTZ,
-                        created_at TIMESTAMPTZ NOT NULL DEFAULT now()
-                    );
-                    """
-                )
-                cur.execute("CREATE INDEX IF NOT EXISTS sessions_user_id_idx ON sessions(user_id);")
-            conn.commit()
 
+class UserRepository:
     def get_credential(self, username: str) -> UserCredential:
         with db_session() as conn, conn.cursor() as cur:
             cur.execute(
@@ -72,17 +63,18 @@ class UserRepository:
             password_cost=row["password_cost"],
         )
 
+    def get_login_user(self, username: str) -> User:
+        """按用户名一次性读取用户资料与密码凭据（登录热路径）。"""
+        with db_session() as conn, conn.cursor() as cur:
+            execute(cur, USER_BY_USERNAME, (username,))
+            row = cur.fetchone()
+        if not row:
+            raise NotFoundError("user not found")
+        return self._row_to_user(row)
+
     def get_by_id(self, user_id: UUID) -> User:
         with db_session() as conn, conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT id, username, display_name, password_hash, password_algo, password_cost,
-                       roles, created_at, updated_at, last_login_at
-                FROM users
-                WHERE id = %s
-                """,
-                (user_id,),
-            )
+            execute(cur, USER_BY_ID, (user_id,))
             row = cur.fetchone()
         if not row:
             raise NotFoundError("user not found")
@@ -140,34 +132,188 @@ class UserRepository:
             )
             conn.commit()
 
-    def get_session_by_hash(self, refresh_token_sha: str) -> Session:
+    def create_session_with_login(self, session: Session) -> None:
+        """记录登录时间并创建会话，单条语句（CTE）在同一事务内完成。"""
         with db_session() as conn, conn.cursor() as cur:
             cur.execute(
                 """
-                SELECT id, user_id, refresh_token_sha, expires_at, user_agent, ip, revoked_at, created_at
-                FROM sessions
-                WHERE refresh_token_sha = %s
+                WITH touched AS (
+                    UPDATE users
+                    SET last_login_at = %(now)s, updated_at = %(now)s
+                    WHERE id = %(user_id)s
+                    RETURNING id
+                )
+                INSERT INTO sessions (
+                    id, user_id, refresh_token_sha, expires_at, user_agent, ip, revoked_at, created_at
+                )
+                SELECT %(id)s, touched.id, %(refresh_token_sha)s, %(expires_at)s, %(user_agent)s,
+                       %(ip)s, %(revoked_at)s, %(created_at)s
+                FROM touched
                 """,
-                (refresh_token_sha,),
+                {
+                    "now": session.created_at,
+                    "id": session.id,
+                    "user_id": session.user_id,
+                    "refresh_token_sha": session.refresh_token_sha,
+                    "expires_at": session.expires_at,
+                    "user_agent": session.user_agent,
+                    "ip": session.ip,
+                    "revoked_at": session.revoked_at,
+                    "created_at": session.created_at,
+                },
             )
+            inserted = cur.rowcount
+            conn.commit()
+        if not inserted:
+            raise NotFoundError("user not found")
+
+    def get_session_by_hash(self, refresh_token_sha: str) -> Session:
+        with db_session() as conn, conn.cursor() as cur:
+            execute(cur, SESSION_BY_HASH, (refresh_token_sha,))
             row = cur.fetchone()
         if not row:
             raise NotFoundError("session not found")
         return self._row_to_session(row)
 
+    def get_session_with_user(self, refresh_token_sha: str) -> tuple[Session, Optional[User]]:
+        """以 pipeline 模式同时读取会话与其所属用户，两条查询一次往返。
+
+        会话不存在时抛出 NotFoundError；用户已被删除时返回 (会话, None)。
+        """
+        with db_session() as conn:
+            session_cur = conn.cursor()
+            user_cur = conn.cursor()
+            with conn.pipeline():
+                execute(session_cur, SESSION_BY_HASH, (refresh_token_sha,))
+                execute(user_cur, USER_BY_SESSION_HASH, (refresh_token_sha,))
+            session_row = session_cur.fetchone()
+            user_row = user_cur.fetchone()
+        if not session_row:
+            raise NotFoundError("session not found")
+        return self._row_to_session(session_row), self._row_to_user(user_row) if user_row else None
+
     def revoke_session(self, session_id: UUID) -> None:
         now = datetime.now(timezone.utc)
         with db_session() as conn, conn.cursor() as cur:
-            cur.execute(
-                """
-                UPDATE sessions
-                SET revoked_at = %s
-                WHERE id = %s AND revoked_at IS NULL
-                """,
-                (now, session_id),
-            )
+            execute(cur, SESSION_REVOKE, (now, session_id))
+            conn.commit()
+
+    def apply_session_events(
+        self,
+        created: list[Session],
+        revoked: list[Session],
+        revoked_ids: Optional[list[tuple[UUID, datetime]]] = None,
+    ) -> None:
+        """批量落库会话写回事件，同一事务内完成。
+
+        不同进程的批次落库顺序不确定，吊销以 upsert 写入：会话行尚未插入时直接插入已吊销的行，
+        其后到达的插入因主键冲突被忽略，因此与落库顺序无关。revoked_ids 为只带 id 的旧格式吊销事件。
+        """
+        revoked_ids = revoked_ids or []
+        if not created and not revoked and not revoked_ids:
+            return
+        with db_session() as conn, conn.cursor() as cur:
+            # 用户已被删除时跳过，避免外键错误让整批反复失败
+            if created:
+                cur.execute(
+                    """
+                    INSERT INTO sessions (
+                        id, user_id, refresh_token_sha, expires_at, user_agent, ip, revoked_at, created_at
+                    )
+                    SELECT v.id, v.user_id, v.refresh_token_sha, v.expires_at, v.user_agent, v.ip, v.revoked_at, v.created_at
+                    FROM unnest(
+                        %s::uuid[], %s::uuid[], %s::text[], %s::timestamptz[],
+                        %s::text[], %s::text[], %s::timestamptz[], %s::timestamptz[]
+                    ) AS v(id, user_id, refresh_token_sha, expires_at, user_agent, ip, revoked_at, created_at)
+                    JOIN users u ON u.id = v.user_id
+                    ON CONFLICT DO NOTHING
+                    """,
+                    (
+                        [item.id for item in created],
+                        [item.user_id for item in created],
+                        [item.refresh_token_sha for item in created],
+                        [item.expires_at for item in created],
+                        [item.user_agent for item in created],
+                        [item.ip for item in created],
+                        [item.revoked_at for item in created],
+                        [item.created_at for item in created],
+                    ),
+                )
+            if revoked:
+                cur.execute(
+                    """
+                    INSERT INTO sessions (id, user_id, refresh_token_sha, expires_at, revoked_at, created_at)
+                    SELECT v.id, v.user_id, v.refresh_token_sha, v.expires_at, v.revoked_at, v.created_at
+                    FROM unnest(%s::uuid[], %s::uuid[], %s::text[], %s::timestamptz[], %s::timestamptz[], %s::timestamptz[])
+                        AS v(id, user_id, refresh_token_sha, expires_at, revoked_at, created_at)
+                    JOIN users u ON u.id = v.user_id
+                    ON CONFLICT (id) DO UPDATE
+                    SET revoked_at = COALESCE(sessions.revoked_at, EXCLUDED.revoked_at)
+                    """,
+                    (
+                        [item.id for item in revoked],
+                        [item.user_id for item in revoked],
+                        [item.refresh_token_sha for item in revoked],
+                        [item.expires_at for item in revoked],
+                        [item.revoked_at for item in revoked],
+                        [item.created_at for item in revoked],
+                    ),
+                )
+            if revoked_ids:
+                cur.execute(
+                    """
+                    UPDATE sessions AS s
+                    SET revoked_at = v.revoked_at
+                    FROM unnest(%s::uuid[], %s::timestamptz[]) AS v(id, revoked_at)
+                    WHERE s.id = v.id AND s.revoked_at IS NULL
+                    """,
+                    ([item[0] for item in revoked_ids], [item[1] for item in revoked_ids]),
+                )
             conn.commit()
 
+    def purge_sessions(
+        self,
+        expired_before: datetime,
+        revoked_before: datetime,
+        batch_size: int = 1000,
+        archive: bool = False,
+    ) -> tuple[int, int]:
+        """删除（或归档）一批过期与已吊销的会话，返回 (过期行数, 吊销行数)。
+
+        每批独立短事务，使用 FOR UPDATE SKIP LOCKED 跳过正被刷新的行，不阻塞在线请求。
+        """
+        target = (
+            "INSERT INTO sessions_archive SELECT * FROM removed"
+            if archive
+            else "SELECT 1 FROM removed"
+        )
+        counts: list[int] = []
+        with db_session() as conn, conn.cursor() as cur:
+            for condition, bound in (
+                ("revoked_at IS NULL AND expires_at < %s ORDER BY expires_at", expired_before),
+                ("revoked_at IS NOT NULL AND revoked_at < %s ORDER BY revoked_at", revoked_before),
+            ):
+                cur.execute(
+                    f"""
+                    WITH doomed AS (
+                        SELECT id FROM sessions
+                        WHERE {condition}
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    ), removed AS (
+                        DELETE FROM sessions s
+                        USING doomed
+                        WHERE s.id = doomed.id
+                        RETURNING s.*
+                    )
+                    {target}
+                    """,
+                    (bound, batch_size),
+                )
+                counts.append(cur.rowcount)
+                conn.commit()
+        return counts[0], counts[1]
+
     def record_login(self, user_id: UUID) -> None:
         now = datetime.now(timezone.utc)
         with db_session() as conn, conn.cursor() as cur:
@@ -184,7 +330,7 @@ class UserRepository:
         password_algo: str,
         password_cost: int,
         display_name: str | None = None,
-    ) -> None:
+    ) -> User:
         now = datetime.now(timezone.utc)
         with db_session() as conn, conn.cursor() as cur:
             cur.execute(
@@ -196,10 +342,16 @@ class UserRepository:
                     display_name = COALESCE(%s, display_name),
                     updated_at = %s
                 WHERE id = %s
+                RETURNING id, username, display_name, password_hash, password_algo, password_cost,
+                          roles, created_at, updated_at, last_login_at
                 """,
                 (password_hash, password_algo, password_cost, display_name, now, user_id),
             )
+            row = cur.fetchone()
             conn.commit()
+        if not row:
+            raise NotFoundError("user not found")
+        return self._row_to_user(row)
 
     def _row_to_user(self, row: dict) -> User:
         return User(
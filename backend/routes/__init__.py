@@ -1,9 +1,7 @@
 """API路由模块。
 
 该模块包含所有API路由的蓝图定义，包括认证、文章和AI问答等功能。
+子模块由 backend/app.py 按 API_BLUEPRINTS 按需导入，这里不预先导入。
 """
 
-# 导入各个路由蓝图
-from . import auth, articles, ai
-
-__all__ = ['auth', 'articles', 'ai']
\ No newline at end of file
+__all__ = ['auth', 'articles', 'ai']
@@ -6,14 +6,13 @@
 from __future__ import annotations
 
 import logging
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from typing import Any, Iterable, TypedDict, Annotated
 import json
 from functools import lru_cache
 from datetime import datetime
 
-from flask import Blueprint, jsonify, request
-import requests
+from flask import Blueprint, jsonify, make_response, request
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
 from langchain_core.tools import tool
@@ -21,10 +20,16 @@ from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 from langgraph.prebuilt import ToolNode, tools_condition
 
-from backend.db import db_session
+from backend.db import read_session
+from backend.queries import execute, hot_query
 from backend.routes.auth import login_required
 from backend.config import Config
+from backend.services.reranker import build_reranker, rerank
+from backend.utils.context_builder import build_context, estimate_tokens
+from backend.utils.http_client import CircuitBreaker, CircuitOpenError, build_httpx_client, get_service_client
 from backend.utils.redis_cache import get_cache
+from backend.utils import telemetry
+from backend.vector_index import ann_distance, approx_limit, search_setting_query
 
 # 初始化蓝图
 bp = Blueprint('ai', __name__)
@@ -39,6 +44,27 @@ cache = get_cache()
 MEMORY_TTL_SECONDS = 24 * 60 * 60
 MEMORY_MAX_ITEMS = 5
 
+# 召回结果重排序器（AI_RERANKER=none 时为 None）
+reranker = build_reranker(config, logger=logger)
+
+# 对话模型熔断器：上游持续失败时快速失败，避免请求线程堆积
+chat_breaker = CircuitBreaker(
+    "chat",
+    failure_threshold=config.ai_circuit_failure_threshold,
+    reset_timeout=config.ai_circuit_reset_seconds,
+)
+
+
+def _embedding_client():
+    return get_service_client(
+        "embedding",
+        timeout=config.embed_http_timeout,
+        pool_size=config.ai_http_pool_size,
+        max_retries=config.ai_http_max_retries,
+        failure_threshold=config.ai_circuit_failure_threshold,
+        reset_timeout=config.ai_circuit_reset_seconds,
+    )
+
 
 def _normalize_ai_base_url(raw_url: str | None) -> str | None:
     if not raw_url:
@@ -70,7 +96,15 @@ def _format_message_for_log(message: BaseMessage) -> dict[str, Any]:
     return payload
 
 
+def _debug_sampled() -> bool:
+    trace = telemetry.current_trace()
+    return bool(trace and trace.sampled)
+
+
 def _log_messages(stage: str, messages: list[BaseMessage]) -> None:
+    # 完整消息体很大，仅在被采样的请求中输出（AI_DEBUG_LOG_SAMPLE_RATE）
+    if not _debug_sampled():
+        return
     logger.info(
         "AI请求messages(%s): %s",
         stage,
@@ -103,10 +137,8 @@ def generate_embedding(text: str) -> list[float] | None:
                 "input": text
             }
             
-            response = requests.post(config.embed_base_url, headers=headers, json=payload, timeout=10)
-            response.raise_for_status()
-            
-            result = response.json()
+            with telemetry.span("embedding"):
+                result = _embedding_client().post_json(config.embed_base_url, payload, headers=headers)
             return result["data"][0]["embedding"]
         else:
             logger.error("嵌入服务配置不完整")
@@ -117,14 +149,57 @@ def generate_embedding(text: str) -> list[float] | None:
         return None
 
 
-def search_similar_articles(query_embedding: list[float], top_k: int = 3) -> list[dict[str, Any]]:
+def _vector_search_sql(windowed: bool) -> str:
+    """两阶段检索：先按索引上的（可能量化的）距离取近似候选，再用原始向量精确计算相似度。
+
+    未量化时两阶段的距离一致，精排只是对已排好序的候选再排一次。
+    """
+    vector_window = "WHERE v.published_on >= %(window_start)s" if windowed else ""
+    article_window = "WHERE a.published_on >= %(window_start)s" if windowed else ""
+    return f"""
+    WITH approx AS (
+        SELECT v.article_id, v.published_on, v.embedding
+        FROM vectors v
+        {vector_window}
+        ORDER BY {ann_distance(config, "v.embedding", "%(query)s")}
+        LIMIT %(approx_limit)s
+    ),
+    candidate AS (
+        SELECT a.id, a.title, a.unit, a.published_on, a.summary, a.content,
+               x.embedding <=> %(query)s::vector AS similarity
+        FROM approx x
+        JOIN articles a ON a.id = x.article_id AND a.published_on = x.published_on
+        {article_window}
+        ORDER BY similarity
+        LIMIT %(candidate_limit)s
+    )
+    SELECT id, title, unit, published_on, summary, content, similarity,
+           similarity - %(recency_weight)s * exp(-GREATEST(CURRENT_DATE - published_on, 0)::float / %(half_life_days)s) AS score
+    FROM candidate
+    ORDER BY score ASC
+    LIMIT %(result_limit)s
+    """
+
+
+_QUANTIZED_SUFFIX = "" if config.vector_quantization == "none" else f"_{config.vector_quantization}"
+VECTOR_SEARCH = hot_query("ai.vector_search" + _QUANTIZED_SUFFIX, _vector_search_sql(False))
+VECTOR_SEARCH_WINDOWED = hot_query("ai.vector_search_windowed" + _QUANTIZED_SUFFIX, _vector_search_sql(True))
+
+
+def search_similar_articles(
+    query_embedding: list[float],
+    top_k: int = 3,
+    query: str | None = None,
+) -> list[dict[str, Any]]:
     """搜索与查询向量相似的文章。
     
     使用pgvector的向量相似度搜索功能，基于余弦相似度算法。
+    提供 query 且启用了重排序器时，先多取一批候选，再经本地打分器重排。
     
     参数：
         query_embedding: 查询文本的向量嵌入
         top_k: 返回的最大相似文章数
+        query: 原始查询文本（用于重排序）
         
     返回：
         包含相似文章信息的列表
@@ -137,27 +212,29 @@ def search_similar_articles(query_embedding: list[float], top_k: int = 3) -> lis
         recency_weight = max(config.ai_recency_weight, 0.0)
         half_life_days = max(config.ai_recency_half_life_days, 1.0)
         candidate_limit = min(max(top_k * 5, top_k), 50)
-
-        sql = """
-        WITH candidate AS (
-            SELECT a.id, a.title, a.unit, a.published_on, a.summary, a.content,
-                   v.embedding <=> %s::vector AS similarity
-            FROM vectors v
-            JOIN articles a ON v.article_id = a.id
-            ORDER BY v.embedding <=> %s::vector
-            LIMIT %s
-        )
-        SELECT id, title, unit, published_on, summary, content, similarity,
-               similarity - %s * exp(-GREATEST(CURRENT_DATE - published_on, 0)::float / %s) AS score
-        FROM candidate
-        ORDER BY score ASC
-        LIMIT %s
-        """
-        params: list[Any] = [vector_str, vector_str, candidate_limit, recency_weight, half_life_days, top_k]
-        
-        # 3. 执行查询
-        with db_session() as conn, conn.cursor() as cur:
-            cur.execute(sql, params)
+        use_rerank = bool(reranker and query)
+        result_limit = max(top_k, min(config.ai_rerank_candidates, candidate_limit)) if use_rerank else top_k
+
+        # 配置了检索窗口时按 published_on 过滤，articles / vectors 只扫描窗口内的月分区
+        search_query = VECTOR_SEARCH
+        params: dict[str, Any] = {
+            "query": vector_str,
+            "approx_limit": approx_limit(candidate_limit, config),
+            "candidate_limit": candidate_limit,
+            "recency_weight": recency_weight,
+            "half_life_days": half_life_days,
+            "result_limit": result_limit,
+        }
+        if config.ai_vector_limit_days and config.ai_vector_limit_days > 0:
+            search_query = VECTOR_SEARCH_WINDOWED
+            params["window_start"] = date.today() - timedelta(days=config.ai_vector_limit_days)
+
+        # 3. 执行查询：先在同一事务内设置本次的 ef_search / probes，两条语句经 pipeline 一次发送
+        setting_query, setting_params = search_setting_query(candidate_limit, config)
+        with telemetry.span("sql.vector_search"), read_session() as conn, conn.cursor() as cur:
+            with conn.pipeline():
+                execute(cur, setting_query, setting_params)
+                execute(cur, search_query, params)
             results = cur.fetchall()
         
         # 转换结果
@@ -174,7 +251,23 @@ def search_similar_articles(query_embedding: list[float], top_k: int = 3) -> lis
                 "score": float(row["score"])
             }
             articles.append(article)
-        
+
+        if use_rerank and articles:
+            with telemetry.span("rerank", reranker=reranker.name, candidates=len(articles)):
+                articles, rerank_ms = rerank(query, articles, reranker, config.ai_rerank_weight, top_k)
+            logger.info(
+                "AI重排序: %s",
+                json.dumps(
+                    {
+                        "reranker": reranker.name,
+                        "candidates": len(results),
+                        "top_k": top_k,
+                        "latency_ms": round(rerank_ms, 2),
+                    },
+                    ensure_ascii=False,
+                ),
+            )
+
         return articles
         
     except Exception as e:
@@ -183,28 +276,46 @@ def search_similar_articles(query_embedding: list[float], top_k: int = 3) -> lis
 
 
 def _memory_key(user_id: str) -> str:
+    return f"ai:mem:list:{user_id}"
+
+
+def _legacy_memory_key(user_id: str) -> str:
+    # 旧版整块 JSON 记忆的键，仅用于清理
     return f"ai:mem:{user_id}"
 
 
-def _load_short_memory(user_id: str) -> list[dict[str, str]]:
+def _load_short_memory(user_id: str) -> list[dict[str, Any]]:
+    """读取短期记忆，从最新一轮往前按 token 预算截取。"""
     if not cache:
         return []
-    raw = cache.get(_memory_key(user_id), default=[])
-    if isinstance(raw, list):
-        return [item for item in raw if isinstance(item, dict)]
-    return []
+    items = [item for item in cache.get_list(_memory_key(user_id), -MEMORY_MAX_ITEMS, -1) if isinstance(item, dict)]
+    selected: list[dict[str, Any]] = []
+    used = 0
+    for item in reversed(items):
+        tokens = item.get("tokens")
+        if not isinstance(tokens, int):
+            tokens = estimate_tokens(item.get("user")) + estimate_tokens(item.get("assistant"))
+        # 至少保留最近一轮，其余按预算裁剪
+        if selected and used + tokens > config.ai_memory_token_budget:
+            break
+        selected.append(item)
+        used += tokens
+    selected.reverse()
+    return selected
 
 
 def _save_short_memory(user_id: str, question: str, answer: str) -> None:
     if not cache:
         return
-    history = _load_short_memory(user_id)
-    history.append({"user": question, "assistant": answer})
-    history = history[-MEMORY_MAX_ITEMS:]
-    cache.set(_memory_key(user_id), history, expire_seconds=MEMORY_TTL_SECONDS)
+    entry = {
+        "user": question,
+        "assistant": answer,
+        "tokens": estimate_tokens(question) + estimate_tokens(answer),
+    }
+    cache.push_list(_memory_key(user_id), [entry], max_len=MEMORY_MAX_ITEMS, expire_seconds=MEMORY_TTL_SECONDS)
 
 
-def _build_memory_messages(history: list[dict[str, str]]) -> list[BaseMessage]:
+def _build_memory_messages(history: list[dict[str, Any]]) -> list[BaseMessage]:
     messages: list[BaseMessage] = []
     for item in history:
         user_text = (item.get("user") or "").strip()
@@ -242,6 +353,11 @@ f"""
 @tool("vector_search")
 def vector_search_tool(query: str, top_k: int = 3, detail_level: str = "brief") -> str:
     """OA向量检索工具：返回相关文章内容与摘要。"""
+    with telemetry.span("tool.vector_search", detail_level=detail_level):
+        return _run_vector_search(query, top_k, detail_level)
+
+
+def _run_vector_search(query: str, top_k: int, detail_level: str) -> str:
     normalized_top_k = max(1, min(10, int(top_k)))
     normalized_level = "full" if detail_level == "full" else "brief"
     logger.info(
@@ -257,7 +373,7 @@ def vector_search_tool(query: str, top_k: int = 3, detail_level: str = "brief")
         payload = {"error": "embedding_failed", "documents": [], "related_articles": []}
         return json.dumps(payload, ensure_ascii=False)
 
-    articles = search_similar_articles(embedding, normalized_top_k)
+    articles = search_similar_articles(embedding, normalized_top_k, query=query)
     related_articles = _build_related_articles(articles)
     documents = []
     for article in articles:
@@ -275,20 +391,43 @@ def vector_search_tool(query: str, top_k: int = 3, detail_level: str = "brief")
             doc["summary_snippet"] = _truncate_text(article.get("summary"))
         documents.append(doc)
 
+    context_tokens = None
+    if normalized_level == "full":
+        # 全文模式按 token 预算装配，避免多篇长文直接撑爆提示词
+        context = build_context(documents, query, config.ai_context_token_budget)
+        documents = context.documents
+        context_tokens = context.tokens_used
+        logger.info(
+            "AI上下文装配: %s",
+            json.dumps(
+                {
+                    "budget": context.budget,
+                    "tokens_used": context.tokens_used,
+                    "truncated_ids": context.truncated_ids,
+                    "dropped_ids": context.dropped_ids,
+                },
+                ensure_ascii=False,
+                default=str,
+            ),
+        )
+
     payload = {
         "detail_level": normalized_level,
         "documents": documents,
         "related_articles": related_articles,
     }
+    if context_tokens is not None:
+        payload["context_tokens"] = context_tokens
     payload_text = json.dumps(payload, ensure_ascii=False, default=str)
-    logger.info(
-        "AI工具返回 vector_search: %s",
-        json.dumps(
-            {"len": len(payload_text), "preview": payload_text[:500]},
-            ensure_ascii=False,
-            default=str,
-        ),
-    )
+    if _debug_sampled():
+        logger.info(
+            "AI工具返回 vector_search: %s",
+            json.dumps(
+                {"len": len(payload_text), "preview": payload_text[:500]},
+                ensure_ascii=False,
+                default=str,
+            ),
+        )
     return payload_text
 
 
@@ -304,12 +443,22 @@ def _build_agent() -> Any:
         base_url=_normalize_ai_base_url(config.ai_base_url),
         model=config.ai_model,
         temperature=0.2,
+        timeout=config.ai_http_timeout,
+        max_retries=config.ai_http_max_retries,
+        http_client=build_httpx_client(pool_size=config.ai_http_pool_size, timeout=config.ai_http_timeout),
     )
     llm_with_tools = llm.bind_tools(tools)
 
     def agent_node(state: AgentState) -> dict[str, list[BaseMessage]]:
         _log_messages("before_llm", state["messages"])
-        response = llm_with_tools.invoke(state["messages"])
+        telemetry.incr("oap_agent_iterations_total")
+        with telemetry.span("llm", model=config.ai_model) as attrs:
+            response = chat_breaker.call(llm_with_tools.invoke, state["messages"])
+            usage = getattr(response, "usage_metadata", None) or {}
+            attrs["prompt_tokens"] = usage.get("input_tokens", 0)
+            attrs["completion_tokens"] = usage.get("output_tokens", 0)
+        telemetry.incr("oap_llm_prompt_tokens_total", attrs["prompt_tokens"])
+        telemetry.incr("oap_llm_completion_tokens_total", attrs["completion_tokens"])
         _log_messages("after_llm", state["messages"] + [response])
         return {"messages": state["messages"] + [response]}
 
@@ -392,6 +541,7 @@ def ask_question():
     """基于向量的问答API。
     
     根据用户的问题，使用向量相似度搜索找到相关文章，然后生成回答。
+    每次请求分配 trace id（响应头 X-Trace-Id），结束时输出各步骤耗时与 token 汇总。
     
     请求体：
         {"question": "你的问题", "top_k": 3, "display_name": "张三"}  # top_k是可选的
@@ -399,6 +549,21 @@ def ask_question():
     返回：
         包含回答和相关文章的JSON响应
     """
+    trace = telemetry.start_trace(
+        request.headers.get("X-Request-ID"),
+        sample_rate=config.ai_debug_log_sample_rate,
+    )
+    try:
+        response = make_response(_answer_question())
+    finally:
+        telemetry.end_trace()
+    telemetry.metrics.observe("oap_ai_ask_duration_ms", trace.elapsed_ms(), {"status": str(response.status_code)})
+    logger.info("AI请求追踪: %s", json.dumps(trace.summary(), ensure_ascii=False, default=str))
+    response.headers["X-Trace-Id"] = trace.trace_id
+    return response
+
+
+def _answer_question():
     try:
         data = request.get_json()
         
@@ -463,7 +628,12 @@ def ask_question():
             "answer": answer,
             "related_articles": related_articles
         }), 200
-        
+
+    except CircuitOpenError as e:
+        logger.warning(f"AI问答熔断: {e}")
+        response = jsonify({"error": "AI服务繁忙，请稍后再试"})
+        response.headers['Retry-After'] = str(int(config.ai_circuit_reset_seconds))
+        return response, 503
     except Exception as e:
         logger.error(f"AI问答失败: {e}")
         return jsonify({"error": "AI问答失败"}), 500
@@ -479,6 +649,7 @@ def clear_memory():
         if not user_id:
             return jsonify({"error": "用户信息缺失"}), 400
         if cache:
+            cache.delete(_legacy_memory_key(user_id))
             cleared = cache.delete(_memory_key(user_id))
         else:
             cleared = True
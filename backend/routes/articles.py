@@ -1,19 +1,26 @@
 """文章API路由模块。
 
 该模块提供文章相关的API端点，包括文章列表、详情查询等功能。
-新缓存策略：articles:today（24h）、articles:page:{before_id}:{limit}（3天）
+新缓存策略：articles:today（24h，crawler 由有序集合物化并原子交换）、articles:page:{before_id}:{limit}（3天）
+缓存键嵌入代数 articles:v{n}:...，整体失效只需 INCR articles:gen；
+每篇文章有标签集合 articles:v{n}:tag:{id}，登记包含该文章的 today/page/detail 键。
+has_more / total 由 articles:stats 哈希（crawler 入库时维护，缺失时回源 article_stats）直接给出。
+关键词检索 /search 走 article_search_vector 表达式 GIN 索引，热门检索词的结果缓存 10 分钟。
 """
 
 from __future__ import annotations
 
+import hashlib
 import logging
+import re
 import threading
 from datetime import datetime, date, timezone
 from typing import Any
 
 from flask import Blueprint, jsonify, request, make_response, current_app
 
-from backend.db import db_session
+from backend.db import read_session
+from backend.queries import Query, execute, hot_query
 from backend.utils.redis_cache import get_cache
 
 # 初始化蓝图
@@ -25,6 +32,119 @@ logger = logging.getLogger(__name__)
 # 获取缓存实例
 cache = get_cache()
 
+# 缓存代数键与各类缓存的 TTL（秒）
+ARTICLES_GEN_KEY = "articles:gen"
+TODAY_TTL = 86400
+PAGE_TTL = 259200
+DETAIL_TTL = 259200
+
+# 关键词检索：结果缓存时间较短，新入库的文章最迟在 SEARCH_TTL 后出现在缓存的检索结果中；
+# 只缓存窗口内被查过至少 SEARCH_POPULAR_HITS 次的检索词，长尾检索词直接查库
+SEARCH_TTL = 600
+SEARCH_POPULAR_HITS = 2
+SEARCH_POPULAR_WINDOW = 3600
+SEARCH_MAX_QUERY_LENGTH = 64
+SEARCH_NO_BEFORE_ID = 2**63 - 1
+# 与数据库函数 search_terms 的切分范围一致：英文、数字与 CJK 统一表意文字
+SEARCH_TERM_PATTERN = re.compile(r"[0-9a-z\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]")
+
+# 文章边界与计数，由 crawler 写入，不随缓存代数变化
+STATS_KEY = "articles:stats"
+STATS_FIELDS = ["min_id", "max_id", "oldest_date", "newest_date", "total"]
+
+ARTICLES_TODAY = hot_query(
+    "articles.today",
+    """
+    SELECT id, title, unit, link, published_on, summary, attachments, created_at
+    FROM articles
+    WHERE published_on = %s
+    ORDER BY id DESC
+    """,
+)
+ARTICLES_PAGE = hot_query(
+    "articles.page",
+    """
+    SELECT id, title, unit, link, published_on, summary, attachments, created_at
+    FROM articles
+    WHERE id < %s
+    ORDER BY id DESC
+    LIMIT %s
+    """,
+)
+ARTICLE_DETAIL = hot_query(
+    "articles.detail",
+    """
+    SELECT id, title, unit, link, published_on, content, summary, attachments, created_at, updated_at
+    FROM articles
+    WHERE id = %s
+    """,
+)
+ARTICLES_SEARCH = hot_query(
+    "articles.search",
+    """
+    SELECT id, title, unit, link, published_on, summary, attachments, created_at
+    FROM articles
+    WHERE article_search_vector(title, unit, summary) @@ article_search_query(%(q)s)
+      AND id < %(before_id)s
+    ORDER BY id DESC
+    LIMIT %(limit)s
+    """,
+)
+ARTICLE_STATS_SUMMARY = hot_query(
+    "articles.stats_summary",
+    """
+    SELECT MIN(min_id) AS min_id,
+           MAX(max_id) AS max_id,
+           MIN(published_on) FILTER (WHERE article_count > 0) AS oldest_date,
+           MAX(published_on) FILTER (WHERE article_count > 0) AS newest_date,
+           COALESCE(SUM(article_count), 0) AS total
+    FROM article_stats
+    """,
+)
+
+
+def _cache_key(kind: str, *parts: Any) -> str:
+    """生成带当前代数的缓存键，例如 articles:v3:page:81:20。"""
+    generation = cache.get_generation(ARTICLES_GEN_KEY) if cache else 0
+    suffix = ":".join(str(part) for part in parts)
+    return f"articles:v{generation}:{kind}:{suffix}" if suffix else f"articles:v{generation}:{kind}"
+
+
+def _article_tags(article_ids: list[Any]) -> list[str]:
+    return [_cache_key("tag", article_id) for article_id in article_ids if article_id is not None]
+
+
+def _cache_articles(
+    cache_key: str,
+    data: Any,
+    expire_seconds: int,
+    article_ids: list[Any],
+    only_if_absent: bool = False,
+) -> None:
+    """写入缓存并登记到相关文章的标签集合。"""
+    cache.set_tagged(
+        cache_key,
+        data,
+        expire_seconds=expire_seconds,
+        tag_keys=_article_tags(article_ids),
+        tag_expire_seconds=max(TODAY_TTL, PAGE_TTL, DETAIL_TTL),
+        only_if_absent=only_if_absent,
+    )
+
+
+def invalidate_article_cache(article_ids: list[int]) -> int:
+    """精确失效包含指定文章的所有缓存（today/page/detail）。"""
+    if not cache:
+        return 0
+    return cache.invalidate_tags(_article_tags(article_ids))
+
+
+def invalidate_all_article_cache() -> int:
+    """整体失效文章缓存：递增代数，旧键等待 TTL 过期。"""
+    if not cache:
+        return -1
+    return cache.bump_generation(ARTICLES_GEN_KEY)
+
 
 def _serialize_value(value: Any) -> Any:
     if isinstance(value, (datetime, date)):
@@ -40,6 +160,51 @@ def _serialize_row(row: dict[str, Any]) -> dict[str, Any]:
     return {key: _serialize_value(val) for key, val in row.items()}
 
 
+def _cached_article_stats() -> dict[str, Any] | None:
+    """一次 HMGET 读取 articles:stats（文章 ID 边界、最早日期与总数），缺失时返回 None。"""
+    if cache:
+        stats = cache.get_hash_fields(STATS_KEY, STATS_FIELDS)
+        if "total" in stats:
+            return stats
+    return None
+
+
+def _store_article_stats(row: dict[str, Any] | None) -> dict[str, Any]:
+    stats = {key: _serialize_value(val) for key, val in (row or {}).items() if val is not None}
+    if cache and stats:
+        cache.set_hash(STATS_KEY, stats)
+    return stats
+
+
+def _query_with_stats(query: Query, params: tuple[Any, ...]) -> tuple[list[dict[str, Any]], dict[str, Any] | None]:
+    """执行列表查询，并取得文章统计。
+
+    统计哈希缺失时，在同一连接上以 pipeline 模式同时发送列表查询与 article_stats 汇总，
+    两条语句只需一次往返，并回填 articles:stats。
+    """
+    stats = _cached_article_stats()
+    with read_session() as conn:
+        rows_cur = conn.cursor()
+        stats_cur = conn.cursor() if stats is None else None
+        with conn.pipeline():
+            execute(rows_cur, query, params)
+            if stats_cur is not None:
+                execute(stats_cur, ARTICLE_STATS_SUMMARY)
+        rows = rows_cur.fetchall()
+        if stats_cur is not None:
+            stats = _store_article_stats(stats_cur.fetchone())
+    return rows, stats
+
+
+def _page_has_more(articles: list[dict[str, Any]], limit: int, stats: dict[str, Any] | None) -> bool:
+    """本页最后一篇之前是否还有文章：与全局最小 ID 比较，统计不可用时退回按页长判断。"""
+    if not articles:
+        return False
+    if stats and stats.get("min_id") is not None:
+        return int(stats["min_id"]) < int(articles[-1]['id'])
+    return len(articles) == limit
+
+
 def _prefetch_next_page(before_id: int, limit: int):
     """异步预缓存下一页（线程安全版本）。
 
@@ -52,28 +217,18 @@ def _prefetch_next_page(before_id: int, limit: int):
     def prefetch():
         with app.app_context():
             try:
-                cache_key = f"articles:page:{before_id}:{limit}"
+                cache_key = _cache_key("page", before_id, limit)
                 if cache and cache.exists(cache_key):
                     return
 
-                sql = """
-                    SELECT id, title, unit, link, published_on, summary, attachments, created_at
-                    FROM articles
-                    WHERE id < %s
-                    ORDER BY id DESC
-                    LIMIT %s
-                """
-
-                with db_session() as conn, conn.cursor() as cur:
-                    cur.execute(sql, (before_id, limit))
-                    rows = cur.fetchall()
+                rows, stats = _query_with_stats(ARTICLES_PAGE, (before_id, limit))
 
                 if not rows:
                     return
 
                 articles = [_serialize_row(row) for row in rows]
                 next_before_id = articles[-1]['id']
-                has_more = len(articles) == limit
+                has_more = _page_has_more(articles, limit, stats)
 
                 result = {
                     "articles": articles,
@@ -82,7 +237,7 @@ def _prefetch_next_page(before_id: int, limit: int):
                 }
 
                 if cache:
-                    cache.set(cache_key, result, expire_seconds=259200)  # 3 days
+                    _cache_articles(cache_key, result, PAGE_TTL, [item['id'] for item in articles])
                     logger.info(f"预缓存成功: {cache_key}")
             except Exception as e:
                 logger.error(f"预缓存失败: {e}")
@@ -99,11 +254,12 @@ def get_today_articles():
         {
             "articles": [...],  # 当天所有文章
             "next_before_id": 81,  # 当天最小 ID，用于加载更早的文章
-            "has_more": true  # 是否存在更早的文章
+            "has_more": true,  # 是否存在更早的文章
+            "total": 1234  # 文章总数
         }
     """
     try:
-        cache_key = "articles:today"
+        cache_key = _cache_key("today")
 
         # 尝试从缓存获取
         if cache:
@@ -120,45 +276,31 @@ def get_today_articles():
 
         # 查询当天所有文章
         today = datetime.now(timezone.utc).date().isoformat()
-        sql = """
-            SELECT id, title, unit, link, published_on, summary, attachments, created_at
-            FROM articles
-            WHERE published_on = %s
-            ORDER BY id DESC
-        """
-
-        with db_session() as conn, conn.cursor() as cur:
-            cur.execute(sql, (today,))
-            rows = cur.fetchall()
+        rows, stats = _query_with_stats(ARTICLES_TODAY, (today,))
 
         articles = [_serialize_row(row) for row in rows]
 
         # 准备响应数据
         next_before_id = articles[-1]['id'] if articles else None
 
-        # 检查是否存在更早的文章（published_on < today）
-        has_more = False
-        if articles:
-            check_sql = """
-                SELECT EXISTS(
-                    SELECT 1 FROM articles
-                    WHERE published_on < %s
-                ) as has_more
-            """
-            with db_session() as conn, conn.cursor() as cur:
-                cur.execute(check_sql, (today,))
-                result = cur.fetchone()
-                has_more = result['has_more'] if result else False
+        # 是否存在更早的文章（published_on < today）：直接比较统计中的最早日期
+        stats = stats or {}
+        oldest_date = stats.get("oldest_date")
+        has_more = bool(articles) and bool(oldest_date) and str(oldest_date) < today
 
         response_data = {
             "articles": articles,
             "next_before_id": next_before_id,
-            "has_more": has_more
+            "has_more": has_more,
+            "total": stats.get("total"),
         }
 
-        # 缓存数据（24小时）
+        # 缓存数据（24小时）；today 快照由 crawler 原子交换维护，这里只在缺失时回填（SET NX），
+        # 避免用可能较旧的查询结果覆盖 crawler 刚写入的快照
         if cache:
-            cache.set(cache_key, response_data, expire_seconds=86400)
+            _cache_articles(
+                cache_key, response_data, TODAY_TTL, [item['id'] for item in articles], only_if_absent=True
+            )
 
         etag = cache.generate_etag(response_data) if cache else ''
         response = jsonify(response_data)
@@ -203,7 +345,7 @@ def get_articles():
             return jsonify({"error": "before_id 参数应为整数"}), 400
 
         # 生成缓存键（包含 limit）
-        cache_key = f"articles:page:{before_id}:{limit}"
+        cache_key = _cache_key("page", before_id, limit)
 
         # 尝试从缓存获取
         if cache:
@@ -218,19 +360,7 @@ def get_articles():
                 response.headers['Cache-Control'] = 'max-age=3600, public'
                 return response, 200
 
-        # 构建SQL查询
-        sql = """
-            SELECT id, title, unit, link, published_on, summary, attachments, created_at
-            FROM articles
-            WHERE id < %s
-            ORDER BY id DESC
-            LIMIT %s
-        """
-        params = (before_id, limit)
-
-        with db_session() as conn, conn.cursor() as cur:
-            cur.execute(sql, params)
-            rows = cur.fetchall()
+        rows, stats = _query_with_stats(ARTICLES_PAGE, (before_id, limit))
 
         articles = [_serialize_row(row) for row in rows]
 
@@ -243,7 +373,7 @@ def get_articles():
             }
         else:
             next_before_id = articles[-1]['id']
-            has_more = len(articles) == limit
+            has_more = _page_has_more(articles, limit, stats)
             response_data = {
                 "articles": articles,
                 "next_before_id": next_before_id,
@@ -256,7 +386,7 @@ def get_articles():
 
         # 缓存数据（3天）
         if cache:
-            cache.set(cache_key, response_data, expire_seconds=259200)
+            _cache_articles(cache_key, response_data, PAGE_TTL, [item['id'] for item in articles])
 
         etag = cache.generate_etag(response_data) if cache else ''
         response = jsonify(response_data)
@@ -272,6 +402,88 @@ def get_articles():
         return jsonify({"error": "获取文章列表失败"}), 500
 
 
+def _normalize_search_query(raw: str) -> str:
+    return " ".join(raw.lower().split())[:SEARCH_MAX_QUERY_LENGTH]
+
+
+@bp.route('/search', methods=['GET'])
+def search_articles():
+    """按关键词检索文章（标题、发布单位、摘要），按 ID 倒序分页。
+
+    中文按相邻二字切分匹配，多个词之间为“且”的关系，不经过 AI 与向量检索。
+
+    查询参数：
+        q: 检索词（必填，最长 64 个字符）
+        before_id: 加载 ID 小于此值的结果（可选，首页不传）
+        limit: 返回数量（可选，默认 20，最多 50）
+
+    返回：
+        {
+            "query": "奖学金",
+            "articles": [...],
+            "next_before_id": 61,
+            "has_more": true
+        }
+    """
+    try:
+        query = _normalize_search_query(request.args.get('q', ''))
+        if not SEARCH_TERM_PATTERN.search(query):
+            return jsonify({"error": "q 参数应包含汉字、字母或数字"}), 400
+
+        try:
+            limit = min(max(int(request.args.get('limit', 20)), 1), 50)
+            before_id_str = request.args.get('before_id')
+            before_id = int(before_id_str) if before_id_str is not None else SEARCH_NO_BEFORE_ID
+        except ValueError:
+            return jsonify({"error": "before_id 与 limit 参数应为整数"}), 400
+
+        digest = hashlib.sha1(query.encode("utf-8")).hexdigest()[:16]
+        cache_key = _cache_key("search", digest, before_id, limit)
+
+        if cache:
+            cached_data = cache.get(cache_key)
+            if cached_data:
+                etag = cache.generate_etag(cached_data)
+                if request.headers.get('If-None-Match') == etag:
+                    return make_response('', 304)
+
+                response = jsonify(cached_data)
+                response.headers['ETag'] = etag
+                response.headers['Cache-Control'] = 'max-age=60, public'
+                return response, 200
+
+        # 多取一条判断是否还有下一页
+        with read_session() as conn, conn.cursor() as cur:
+            execute(cur, ARTICLES_SEARCH, {"q": query, "before_id": before_id, "limit": limit + 1})
+            rows = cur.fetchall()
+
+        articles = [_serialize_row(row) for row in rows[:limit]]
+        has_more = len(rows) > limit
+        response_data = {
+            "query": query,
+            "articles": articles,
+            "next_before_id": articles[-1]['id'] if articles else None,
+            "has_more": has_more,
+        }
+
+        # 只缓存近期被反复检索的词
+        if cache and cache.incr(f"articles:search:hits:{digest}", SEARCH_POPULAR_WINDOW) >= SEARCH_POPULAR_HITS:
+            _cache_articles(cache_key, response_data, SEARCH_TTL, [item['id'] for item in articles])
+
+        etag = cache.generate_etag(response_data) if cache else ''
+        response = jsonify(response_data)
+
+        if etag:
+            response.headers['ETag'] = etag
+            response.headers['Cache-Control'] = 'max-age=60, public'
+
+        return response, 200
+
+    except Exception as e:
+        logger.error(f"检索文章失败: {e}")
+        return jsonify({"error": "检索文章失败"}), 500
+
+
 @bp.route('/<int:article_id>', methods=['GET'])
 def get_article_detail(article_id: int):
     """获取文章详情。
@@ -287,7 +499,7 @@ def get_article_detail(article_id: int):
     """
     try:
         # 生成缓存键
-        cache_key = f"articles:detail:{article_id}"
+        cache_key = _cache_key("detail", article_id)
 
         # 尝试从缓存获取
         if cache:
@@ -306,14 +518,8 @@ def get_article_detail(article_id: int):
                 response.headers['Cache-Control'] = 'max-age=3600, public'
                 return response, 200
 
-        sql = """
-        SELECT id, title, unit, link, published_on, content, summary, attachments, created_at, updated_at
-        FROM articles
-        WHERE id = %s
-        """
-
-        with db_session() as conn, conn.cursor() as cur:
-            cur.execute(sql, (article_id,))
+        with read_session() as conn, conn.cursor() as cur:
+            execute(cur, ARTICLE_DETAIL, (article_id,))
             article = cur.fetchone()
 
         if not article:
@@ -323,7 +529,7 @@ def get_article_detail(article_id: int):
 
         # 缓存数据（3天）
         if cache:
-            cache.set(cache_key, article_data, expire_seconds=259200)
+            _cache_articles(cache_key, article_data, DETAIL_TTL, [article_id])
 
         # 生成ETag并返回响应
         etag = cache.generate_etag(article_data) if cache else ''
@@ -10,7 +10,14 @@ from flask import Blueprint, jsonify, request
 from backend.repository.user_repository import UserRepository
 from backend.services.auth_service import AuthMetadata, AuthService
 from backend.services.campus_auth import CampusAuthenticator
-from backend.services.exceptions import InvalidCredentialsError, UnauthorizedError, ValidationError
+from backend.services.session_compaction import start_compaction_scheduler
+from backend.services.session_store import RedisSessionStore
+from backend.services.exceptions import (
+    InvalidCredentialsError,
+    ServiceBusyError,
+    UnauthorizedError,
+    ValidationError,
+)
 from backend.config import Config
 
 bp = Blueprint("auth", __name__)
@@ -19,7 +26,14 @@ config = Config()
 logger = logging.getLogger(__name__)
 user_repo = UserRepository()
 campus_auth = CampusAuthenticator.from_config(config, logger=logger)
-auth_service = AuthService(config, user_repo, campus_auth, logger=logger)
+session_store = RedisSessionStore.from_config(config, user_repo, logger=logger)
+auth_service = AuthService(config, user_repo, campus_auth, logger=logger, session_store=session_store)
+
+
+@bp.record_once
+def _start_background_tasks(state) -> None:
+    # 只在注册了 auth 蓝图的进程中启动；其他蓝图（如 ai 的 login_required）导入本模块时不启动
+    start_compaction_scheduler(config, user_repo, logger=logger)
 
 
 def _get_auth_metadata() -> AuthMetadata:
@@ -62,6 +76,10 @@ def login():
         return jsonify({"error": str(exc)}), 400
     except InvalidCredentialsError:
         return jsonify({"error": "用户名或密码错误"}), 401
+    except ServiceBusyError as exc:
+        response = jsonify({"error": "登录请求过多，请稍后重试"})
+        response.headers["Retry-After"] = str(exc.retry_after)
+        return response, 503
     except Exception as exc:  # pragma: no cover - 防止泄漏内部信息
         logger.exception("login failed")
         return jsonify({"error": f"登录失败: {exc}"}), 500
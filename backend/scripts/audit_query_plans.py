@@ -0,0 +1,218 @@
+"""列表查询的执行计划审计。
+
+对文章列表、详情、关键词检索与爬虫去重等热点查询执行 EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)，
+检查它们走预期的索引（分区上的本地索引也算），并且不对 articles 分区做顺序扫描；
+标记为 index_only 的查询还必须是仅索引扫描（Index Only Scan）。
+可选先在同一个事务中灌入合成文章并 ANALYZE，审计结束后整体回滚，不会留下数据。
+
+用法：
+    python backend/scripts/audit_query_plans.py --seed 50000 --days 365
+    python backend/scripts/audit_query_plans.py            # 直接审计现有数据
+存在不符合预期的计划时退出码为 1。
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.db import get_connection
+
+# 读取不超过这么多数据块的顺序扫描（空分区、只有几行的小分区）不计为问题
+SEQ_SCAN_BLOCK_ALLOWANCE = 8
+
+
+@dataclass
+class PlanCheck:
+    name: str
+    sql: str
+    expected_index: str
+    index_only: bool = False
+
+
+# 与 backend/routes/articles.py、crawler/db.py 中的查询保持一致
+CHECKS = [
+    PlanCheck(
+        "today",
+        """
+        SELECT id, title, unit, link, published_on, summary, attachments, created_at
+        FROM articles
+        WHERE published_on = %(day)s
+        ORDER BY id DESC
+        """,
+        "idx_articles_published_on_id",
+    ),
+    PlanCheck(
+        "page",
+        """
+        SELECT id, title, unit, link, published_on, summary, attachments, created_at
+        FROM articles
+        WHERE id < %(before_id)s
+        ORDER BY id DESC
+        LIMIT 20
+        """,
+        "articles_pkey",
+    ),
+    PlanCheck(
+        "detail",
+        """
+        SELECT id, title, unit, link, published_on, content, summary, attachments, created_at, updated_at
+        FROM articles
+        WHERE id = %(before_id)s
+        """,
+        "articles_pkey",
+    ),
+    PlanCheck(
+        "search",
+        """
+        SELECT id, title, unit, link, published_on, summary, attachments, created_at
+        FROM articles
+        WHERE article_search_vector(title, unit, summary) @@ article_search_query(%(q)s)
+          AND id < %(no_before_id)s
+        ORDER BY id DESC
+        LIMIT 21
+        """,
+        "idx_articles_search",
+    ),
+    PlanCheck(
+        "crawler_existing_links",
+        "SELECT link FROM articles WHERE published_on = %(day)s",
+        "idx_articles_published_on_id",
+    ),
+    PlanCheck(
+        "crawler_versions",
+        """
+        SELECT id, created_at, updated_at
+        FROM articles
+        WHERE published_on = %(day)s
+        ORDER BY id DESC
+        """,
+        "idx_articles_published_on_id",
+        index_only=True,
+    ),
+]
+
+
+def _seed(cur, rows: int, days: int) -> None:
+    rng = random.Random(42)
+    end = date.today()
+    start = end - timedelta(days=max(days - 1, 0))
+    cur.execute("SELECT ensure_article_partitions(%s, %s)", (start, end))
+    # 按日期顺序写入，与爬虫逐日入库时堆上的物理顺序一致
+    dates = sorted(start + timedelta(days=rng.randrange(max(days, 1))) for _ in range(rows))
+    payload = []
+    for idx, published_on in enumerate(dates):
+        payload.append(
+            (
+                f"审计合成通知 {idx}",
+                "信息中心",
+                f"https://audit.invalid/{idx}",
+                published_on,
+                "正文" * 200,
+                "摘要" * 40,
+            )
+        )
+    cur.executemany(
+        """
+        INSERT INTO articles (title, unit, link, published_on, content, summary)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        """,
+        payload,
+    )
+    cur.execute("ANALYZE articles")
+
+
+def _index_family(cur, index: str) -> set[str]:
+    """索引本身及其在各分区上的本地索引名。"""
+    cur.execute(
+        """
+        SELECT c.relname AS name
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        """,
+        (index,),
+    )
+    return {index, *(row["name"] for row in cur.fetchall())}
+
+
+def _walk(node: dict[str, Any]) -> list[dict[str, Any]]:
+    nodes = [node]
+    for child in node.get("Plans", []):
+        nodes.extend(_walk(child))
+    return nodes
+
+
+def _sample_params(cur) -> dict[str, Any]:
+    cur.execute("SELECT published_on FROM article_stats WHERE article_count > 0 ORDER BY published_on DESC LIMIT 1")
+    row = cur.fetchone()
+    day = row["published_on"] if row else date.today()
+    # 取 ID 区间中点，分页与详情查询落在历史中部
+    cur.execute("SELECT min(id) AS min_id, max(id) AS max_id FROM articles")
+    row = cur.fetchone() or {}
+    middle = ((row.get("min_id") or 1) + (row.get("max_id") or 1)) // 2
+    # 检索词取历史中部一篇文章的标题，选择性与用户按标题查找时相近
+    cur.execute("SELECT title FROM articles WHERE id <= %s ORDER BY id DESC LIMIT 1", (max(middle, 1),))
+    row = cur.fetchone()
+    query = row["title"] if row else "通知"
+    return {"day": day, "before_id": max(middle, 1), "q": query, "no_before_id": 2**63 - 1}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="列表查询执行计划审计")
+    parser.add_argument("--seed", type=int, default=0, help="灌入的合成文章数（事务结束后回滚）")
+    parser.add_argument("--days", type=int, default=365, help="合成文章分布的天数")
+    args = parser.parse_args()
+
+    failures = 0
+    with get_connection() as conn, conn.cursor() as cur:
+        if args.seed > 0:
+            _seed(cur, args.seed, args.days)
+        params = _sample_params(cur)
+        print(f"params: {params}")
+        for check in CHECKS:
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + check.sql, params)
+            plan = cur.fetchone()["QUERY PLAN"][0]
+            nodes = _walk(plan["Plan"])
+            expected = _index_family(cur, check.expected_index)
+            used = {node.get("Index Name") for node in nodes if node.get("Index Name")}
+            index_only_used = {
+                node.get("Index Name") for node in nodes if node["Node Type"] == "Index Only Scan"
+            }
+            # 空分区或只有几行的小分区上，顺序扫描本就是最优计划，不计入
+            seq_scans = [
+                node["Relation Name"]
+                for node in nodes
+                if node["Node Type"] == "Seq Scan"
+                and node.get("Relation Name", "").startswith("articles")
+                and node.get("Shared Hit Blocks", 0) + node.get("Shared Read Blocks", 0) > SEQ_SCAN_BLOCK_ALLOWANCE
+            ]
+            heap_fetches = sum(node.get("Heap Fetches", 0) for node in nodes)
+            scan_types = sorted({node["Node Type"] for node in nodes if "Scan" in node["Node Type"]})
+            ok = bool((index_only_used if check.index_only else used) & expected) and not seq_scans
+            failures += 0 if ok else 1
+            print(
+                f"[{'ok' if ok else 'FAIL'}] {check.name:<24} {plan['Execution Time']:>8.2f} ms  "
+                f"scans={','.join(scan_types)}  heap_fetches={heap_fetches}"
+            )
+            if not ok:
+                expected_scan = "index-only scan on " if check.index_only else ""
+                print(
+                    f"       expected {expected_scan}{check.expected_index}, used {sorted(used) or '-'}, "
+                    f"seq scans {seq_scans or '-'}"
+                )
+        conn.rollback()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
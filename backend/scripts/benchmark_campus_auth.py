@@ -0,0 +1,133 @@
+"""校园 SSO 校验基准测试。
+
+启动本地 CAS 替身服务，以多线程模拟登录洪峰（其中一部分为重复的错误密码），
+对比直接调用 CAS 流程（每次新建会话、无限流、无失败计数）与 CampusAuthenticator
+（会话池 + 并发上限 + 按用户名的失败计数）下打到 SSO 的请求数与登录延迟。
+失败计数存放在 Redis 中，需通过 --redis-url 指定，否则只对比会话池与并发上限。
+
+用法：
+    python backend/scripts/benchmark_campus_auth.py --attempts 400 --threads 32 --delay 0.02 \
+        --redis-url redis://localhost:6379/15
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import redis
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.scripts.fake_cas_server import start_server
+from backend.services.campus_auth import CampusAuthenticator
+from backend.services.cas_client import sso_login_and_get_name
+from backend.services.exceptions import InvalidCredentialsError, ServiceBusyError
+from backend.utils.redis_cache import init_cache
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def _workload(rng: random.Random, attempts: int, bad_ratio: float) -> list[tuple[str, str]]:
+    # 错误密码集中在少数账号上，模拟反复重试或撞库
+    items = []
+    for idx in range(attempts):
+        if rng.random() < bad_ratio:
+            items.append((f"victim{rng.randint(0, 9)}", "wrong-password"))
+        else:
+            items.append((f"student{idx}", "secret"))
+    return items
+
+
+def _run(label: str, server, verify, workload: list[tuple[str, str]], threads: int) -> None:
+    before = server.stats["requests"]
+    outcomes = {"ok": 0, "invalid": 0, "busy": 0, "error": 0}
+    latencies: list[float] = []
+    lock = threading.Lock()
+
+    def _one(item: tuple[str, str]) -> None:
+        started = time.perf_counter()
+        try:
+            verify(*item)
+            outcome = "ok"
+        except InvalidCredentialsError:
+            outcome = "invalid"
+        except ServiceBusyError:
+            outcome = "busy"
+        except Exception:
+            outcome = "error"
+        with lock:
+            outcomes[outcome] += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(_one, workload))
+    elapsed = time.perf_counter() - started
+
+    print(f"[{label}]")
+    print(f"  outcomes          : {outcomes}")
+    print(f"  sso http requests : {server.stats['requests'] - before}")
+    print(f"  latency p50 (ms)  : {statistics.median(latencies):.1f}")
+    print(f"  latency p95 (ms)  : {_percentile(latencies, 95):.1f}")
+    print(f"  wall time (s)     : {elapsed:.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="校园 SSO 校验基准测试")
+    parser.add_argument("--attempts", type=int, default=400, help="登录尝试次数")
+    parser.add_argument("--threads", type=int, default=32, help="并发请求线程数")
+    parser.add_argument("--bad-ratio", type=float, default=0.5, help="错误密码占比")
+    parser.add_argument("--delay", type=float, default=0.02, help="替身服务每个请求的延迟（秒）")
+    parser.add_argument("--max-concurrency", type=int, default=4, help="SSO 并发上限")
+    parser.add_argument("--queue-timeout", type=float, default=5.0, help="排队等待上限（秒）")
+    parser.add_argument("--failure-window", type=int, default=60, help="失败计数窗口（秒）")
+    parser.add_argument("--max-failures", type=int, default=5, help="窗口内允许的失败次数")
+    parser.add_argument("--redis-url", default=None, help="失败计数使用的 Redis，未指定时不计数")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    if args.redis_url:
+        init_cache(redis.Redis.from_url(args.redis_url, decode_responses=True))
+
+    server = start_server(delay=args.delay)
+    workload = _workload(random.Random(args.seed), args.attempts, args.bad_ratio)
+
+    def _direct(username: str, password: str) -> str:
+        try:
+            return sso_login_and_get_name(
+                username, password, service=server.service_url, login_url=server.login_url, timeout=10
+            )
+        except RuntimeError as exc:
+            raise InvalidCredentialsError(str(exc)) from exc
+
+    authenticator = CampusAuthenticator(
+        login_url=server.login_url,
+        timeout=10,
+        max_concurrency=args.max_concurrency,
+        queue_timeout=args.queue_timeout,
+        failure_window=args.failure_window,
+        max_failures=args.max_failures,
+        sso_login_url=server.login_url,
+        service_url=server.service_url,
+    )
+
+    _run("direct", server, _direct, workload, args.threads)
+    _run("authenticator", server, authenticator.verify, workload, args.threads)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
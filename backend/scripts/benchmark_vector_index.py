@@ -0,0 +1,181 @@
+"""向量索引离线基准测试。
+
+在临时表中生成带聚类结构的合成向量语料，按给定参数建立 HNSW 或 IVFFlat 索引（可选 halfvec /
+binary 量化，量化时按放大后的候选数近似检索再用原始向量精排，与线上检索一致），
+再对每个 ef_search / probes 取值统计 recall@k（以关闭索引的精确检索为基准）与 p50/p95 延迟。
+临时表随连接关闭自动删除，不影响业务表。
+
+用法：
+    python backend/scripts/benchmark_vector_index.py --rows 20000 --dim 1024 --queries 100
+    python backend/scripts/benchmark_vector_index.py --index hnsw --m 16 --ef-construction 64 --ef-search 20,40,80,160
+    python backend/scripts/benchmark_vector_index.py --index ivfflat --lists 100 --probes 1,5,10,20
+    python backend/scripts/benchmark_vector_index.py --quantization binary --rescore-factor 8
+建议 --rows 取预计数年后单个月分区的向量数，选出满足召回率目标且 p95 达标的最小取值，
+再据此设置 VECTOR_SEARCH_EF_SEARCH / VECTOR_SEARCH_EF_FACTOR / VECTOR_SEARCH_PROBES。
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.config import Config
+from backend.db import get_connection
+from backend.vector_index import (
+    ann_distance,
+    approx_limit,
+    check_quantization_support,
+    index_using,
+    ivfflat_lists,
+    search_setting,
+)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(int(round(pct / 100 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def _normalize(vec: list[float]) -> list[float]:
+    norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+    return [x / norm for x in vec]
+
+
+def _literal(vec: list[float]) -> str:
+    return "[" + ",".join(f"{x:.6f}" for x in vec) + "]"
+
+
+def _make_vectors(rng: random.Random, rows: int, dim: int, clusters: int, spread: float) -> tuple[list[list[float]], list[list[float]]]:
+    """按若干主题中心加噪声生成向量，近似真实通知按主题聚集的分布。"""
+    centers = [_normalize([rng.gauss(0, 1) for _ in range(dim)]) for _ in range(clusters)]
+    vectors = []
+    for _ in range(rows):
+        center = rng.choice(centers)
+        vectors.append(_normalize([c + rng.gauss(0, spread) for c in center]))
+    return centers, vectors
+
+
+def _timed_ids(cur, sql: str, params: dict) -> tuple[list[int], float]:
+    start = time.perf_counter()
+    cur.execute(sql, params)
+    ids = [row["id"] for row in cur.fetchall()]
+    return ids, (time.perf_counter() - start) * 1000
+
+
+def main() -> None:
+    cfg = Config()
+    parser = argparse.ArgumentParser(description="向量索引离线基准测试")
+    parser.add_argument("--rows", type=int, default=20000, help="合成向量数")
+    parser.add_argument("--dim", type=int, default=cfg.embed_dim, help="向量维度")
+    parser.add_argument("--clusters", type=int, default=50, help="主题中心数")
+    parser.add_argument("--spread", type=float, default=0.05, help="每维噪声标准差（越大聚类越松散）")
+    parser.add_argument("--queries", type=int, default=100, help="查询次数")
+    parser.add_argument("--k", type=int, default=10, help="recall@k 中的 k（对应检索的候选数）")
+    parser.add_argument("--index", choices=["hnsw", "ivfflat"], default=cfg.vector_index_type)
+    parser.add_argument("--m", type=int, default=cfg.vector_index_hnsw_m)
+    parser.add_argument("--ef-construction", type=int, default=cfg.vector_index_hnsw_ef_construction)
+    parser.add_argument("--lists", type=int, default=cfg.vector_index_ivfflat_lists, help="0 表示按行数估算")
+    parser.add_argument("--quantization", choices=["none", "halfvec", "binary"], default=cfg.vector_quantization)
+    parser.add_argument("--rescore-factor", type=int, default=cfg.vector_rescore_factor, help="量化时近似检索多取的倍数")
+    parser.add_argument("--ef-search", type=str, default="10,20,40,80,160,320", help="逗号分隔的 hnsw.ef_search 取值")
+    parser.add_argument("--probes", type=str, default="1,2,5,10,20,50", help="逗号分隔的 ivfflat.probes 取值")
+    parser.add_argument("--maintenance-work-mem", type=str, default="512MB")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    cfg.vector_index_type = args.index
+    cfg.vector_index_hnsw_m = args.m
+    cfg.vector_index_hnsw_ef_construction = args.ef_construction
+    cfg.vector_index_ivfflat_lists = args.lists or ivfflat_lists(args.rows)
+    cfg.vector_quantization = args.quantization
+    cfg.vector_rescore_factor = max(args.rescore_factor, 1)
+    cfg.embed_dim = args.dim
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    centers, vectors = _make_vectors(rng, args.rows, args.dim, args.clusters, args.spread)
+    queries = [
+        _literal(_normalize([c + rng.gauss(0, args.spread) for c in rng.choice(centers)]))
+        for _ in range(args.queries)
+    ]
+    print(f"corpus          : {args.rows} x {args.dim}, {args.clusters} clusters ({time.perf_counter() - started:.1f}s)")
+
+    exact_sql = "SELECT id FROM bench_vectors ORDER BY embedding <=> %(query)s::vector LIMIT %(k)s"
+    search_sql = f"""
+        WITH approx AS (
+            SELECT id, embedding
+            FROM bench_vectors
+            ORDER BY {ann_distance(cfg, "embedding", "%(query)s")}
+            LIMIT %(approx_limit)s
+        )
+        SELECT id FROM approx ORDER BY embedding <=> %(query)s::vector LIMIT %(k)s
+    """
+    fetch = approx_limit(args.k, cfg)
+    with get_connection() as conn:
+        conn.autocommit = True
+        problem = check_quantization_support(conn, cfg)
+        if problem:
+            print(problem)
+            sys.exit(1)
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE TEMP TABLE bench_vectors (id INT PRIMARY KEY, embedding vector({args.dim}))")
+            with cur.copy("COPY bench_vectors (id, embedding) FROM STDIN") as copy:
+                for idx, vec in enumerate(vectors):
+                    copy.write_row((idx, _literal(vec)))
+            cur.execute("ANALYZE bench_vectors")
+
+            # 精确检索基准：关闭索引扫描，顺序扫描全表排序
+            cur.execute("SET enable_indexscan = off")
+            exact: list[list[int]] = []
+            exact_ms: list[float] = []
+            for query in queries:
+                ids, elapsed = _timed_ids(cur, exact_sql, {"query": query, "k": args.k})
+                exact.append(ids)
+                exact_ms.append(elapsed)
+            cur.execute("RESET enable_indexscan")
+            print(f"exact           : p50={statistics.median(exact_ms):.2f} ms p95={_percentile(exact_ms, 95):.2f} ms")
+
+            using = index_using(cfg, args.rows)
+            cur.execute("SELECT set_config('maintenance_work_mem', %s, false)", (args.maintenance_work_mem,))
+            started = time.perf_counter()
+            cur.execute(f"CREATE INDEX bench_vectors_embedding_idx ON bench_vectors {using}")
+            build_s = time.perf_counter() - started
+            cur.execute("SELECT pg_relation_size('bench_vectors_embedding_idx') AS bytes")
+            size_mib = cur.fetchone()["bytes"] / 1024 / 1024
+            print(f"index           : {using}")
+            print(f"approx fetch    : {fetch} candidates, rescored to top {args.k}")
+            print(f"build           : {build_s:.1f}s, {size_mib:.1f} MiB")
+
+            setting = "hnsw.ef_search" if args.index == "hnsw" else "ivfflat.probes"
+            values = args.ef_search if args.index == "hnsw" else args.probes
+            print(f"{setting:<16}  recall@{args.k:<4} p50 ms   p95 ms")
+            for value in [int(part) for part in values.split(",") if part.strip()]:
+                cur.execute("SELECT set_config(%s, %s, false)", (setting, str(value)))
+                hits = 0
+                latencies = []
+                for query, truth in zip(queries, exact):
+                    ids, elapsed = _timed_ids(cur, search_sql, {"query": query, "k": args.k, "approx_limit": fetch})
+                    hits += len(set(ids) & set(truth))
+                    latencies.append(elapsed)
+                recall = hits / (len(queries) * args.k)
+                print(
+                    f"{value:<16}  {recall:<11.3f} {statistics.median(latencies):<8.2f} "
+                    f"{_percentile(latencies, 95):.2f}"
+                )
+
+    name, value = search_setting(fetch, cfg)
+    print(f"当前配置下 {args.k} 个候选使用 {name}={value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""只读副本路由检查。
+
+按 backend/.env 或环境变量中的 DATABASE_URL 与 DATABASE_REPLICA_URLS 建立连接池，验证：
+1. read_session() 在副本延迟正常时落在副本上；
+2. 延迟超出 DB_REPLICA_MAX_LAG 时回落到主库；
+3. 副本不可达时暂停该副本并回落到主库，不向调用方抛错；
+4. db_session()（认证读写所用）始终落在主库。
+不需要真正的流复制：两个独立的本地 PostgreSQL 实例即可（检查只执行只读的系统查询）。
+
+用法：
+    DATABASE_URL=postgresql://postgres@/postgres?host=/tmp/pg-primary \\
+    DATABASE_REPLICA_URLS=postgresql://postgres@/postgres?host=/tmp/pg-replica \\
+    python backend/scripts/check_read_routing.py
+存在不符合预期的路由时退出码为 1。
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend import db
+
+
+def _endpoint(conn) -> tuple[str, int]:
+    return conn.info.host, conn.info.port
+
+
+def _reset_replicas(urls: list[str]) -> None:
+    """按新的副本列表重建进程内的副本连接池。"""
+    for replica in db._replicas:
+        replica.pool.close()
+    db.cfg.database_replica_urls = urls
+    db._replicas = []
+    db._replicas_pid = None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="只读副本路由检查")
+    parser.add_argument(
+        "--unreachable",
+        default="postgresql://postgres@127.0.0.1:1/postgres",
+        help="用于模拟副本故障的不可达 DSN",
+    )
+    args = parser.parse_args()
+
+    cfg = db.cfg
+    if not cfg.database_replica_urls:
+        print("DATABASE_REPLICA_URLS 未配置，无副本可检查")
+        sys.exit(1)
+    replica_urls = list(cfg.database_replica_urls)
+
+    with db.get_connection() as conn:
+        primary = _endpoint(conn)
+    print(f"primary: {primary}")
+
+    failures = 0
+
+    def report(name: str, ok: bool, detail: str) -> None:
+        nonlocal failures
+        failures += 0 if ok else 1
+        print(f"[{'ok' if ok else 'FAIL'}] {name:<20} {detail}")
+
+    with db.read_session() as conn:
+        target = _endpoint(conn)
+        read_only = conn.execute("SHOW transaction_read_only").fetchone()["transaction_read_only"]
+    report("replica_read", target != primary and read_only == "on", f"target={target} read_only={read_only}")
+
+    max_lag = cfg.db_replica_max_lag
+    cfg.db_replica_max_lag = -1.0
+    for replica in db._get_replicas():
+        replica.checked_at = None
+    with db.read_session() as conn:
+        target = _endpoint(conn)
+    report("lag_fallback", target == primary, f"target={target} status={db.replica_status()}")
+    cfg.db_replica_max_lag = max_lag
+
+    _reset_replicas([args.unreachable])
+    with db.read_session() as conn:
+        target = _endpoint(conn)
+    down = [status["down"] for status in db.replica_status()]
+    report("down_fallback", target == primary and all(down), f"target={target} down={down}")
+
+    _reset_replicas(replica_urls)
+    with db.db_session() as conn:
+        target = _endpoint(conn)
+    report("primary_session", target == primary, f"target={target}")
+
+    _reset_replicas([])
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""清理过期与已吊销的刷新会话。
+
+按小批次删除（或归档到 sessions_archive）过期会话与超过保留期的已吊销会话，
+输出回收行数与耗时。与进程内调度共用咨询锁，可安全地放进 cron。
+
+用法：
+    python backend/scripts/compact_sessions.py --batch-size 1000 --revoked-grace 86400
+    python backend/scripts/compact_sessions.py --archive
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import timedelta
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.config import Config
+from backend.repository.user_repository import UserRepository
+from backend.services.session_compaction import compact_sessions_locked
+
+
+def main() -> None:
+    cfg = Config()
+    parser = argparse.ArgumentParser(description="清理过期与已吊销的刷新会话")
+    parser.add_argument("--batch-size", type=int, default=cfg.auth_session_compact_batch, help="每批处理的行数")
+    parser.add_argument(
+        "--revoked-grace",
+        type=int,
+        default=cfg.auth_session_revoked_grace,
+        help="已吊销会话的保留时长（秒）",
+    )
+    parser.add_argument("--max-batches", type=int, default=1000, help="单次运行的最大批次数")
+    parser.add_argument("--pause", type=float, default=0.05, help="批次间暂停（秒）")
+    parser.add_argument("--archive", action="store_true", help="移动到 sessions_archive 而不是直接删除")
+    args = parser.parse_args()
+
+    report = compact_sessions_locked(
+        UserRepository(),
+        batch_size=max(args.batch_size, 1),
+        revoked_grace=timedelta(seconds=max(args.revoked_grace, 0)),
+        archive=args.archive,
+        max_batches=max(args.max_batches, 1),
+        pause_seconds=max(args.pause, 0.0),
+    )
+    if report.skipped:
+        print("另一个压缩任务正在运行，已跳过")
+        return
+    print(f"expired sessions  : {report.expired}")
+    print(f"revoked sessions  : {report.revoked}")
+    print(f"total reclaimed   : {report.total}")
+    print(f"batches           : {report.batches}")
+    print(f"duration (ms)     : {report.duration_ms}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""本地 CAS 替身服务。
+
+模拟校园 SSO 的登录页、表单提交（302 携带 ticket）、ticket 校验与首页用户名，
+供基准测试与联调使用，不依赖真实的 sso.stu.edu.cn。可设置每个请求的人工延迟。
+
+用法：
+    python backend/scripts/fake_cas_server.py --port 8765 --delay 0.2 --password secret
+"""
+
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlparse
+
+LOGIN_PAGE = """<html><body><h1>LOGIN</h1>
+<form id="fm1" action="/login?service={service}" method="post">
+<input type="text" name="username"/>
+<input type="password" name="password"/>
+<input type="hidden" name="execution" value="e1s1"/>
+<input type="hidden" name="_eventId" value="submit"/>
+</form></body></html>"""
+
+HOME_PAGE = """<html><body><span class="user-name">{name}</span></body></html>"""
+
+
+class FakeCasServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], password: str = "secret", delay: float = 0.0) -> None:
+        super().__init__(address, FakeCasHandler)
+        self.password = password
+        self.delay = max(delay, 0.0)
+        self.tickets: dict[str, str] = {}
+        self.stats = {"requests": 0, "logins_ok": 0, "logins_failed": 0}
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def service_url(self) -> str:
+        return f"{self.base_url}/default.aspx"
+
+    @property
+    def login_url(self) -> str:
+        return f"{self.base_url}/login?service={quote(self.service_url, safe='')}"
+
+    def count(self, key: str) -> None:
+        with self.lock:
+            self.stats[key] += 1
+
+
+class FakeCasHandler(BaseHTTPRequestHandler):
+    server: FakeCasServer
+
+    def log_message(self, format: str, *args) -> None:  # noqa: A002 - 覆盖基类签名
+        pass
+
+    def _begin(self) -> None:
+        self.server.count("requests")
+        if self.server.delay:
+            time.sleep(self.server.delay)
+
+    def _send(self, status: int, body: str = "", headers: dict[str, str] | None = None) -> None:
+        payload = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self) -> None:  # noqa: N802
+        self._begin()
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        if parsed.path == "/login":
+            service = query.get("service", [self.server.service_url])[0]
+            self._send(200, LOGIN_PAGE.format(service=quote(service, safe="")))
+            return
+        if parsed.path == "/default.aspx":
+            ticket = query.get("ticket", [None])[0]
+            if ticket:
+                with self.server.lock:
+                    username = self.server.tickets.pop(ticket, None)
+                if username is None:
+                    self._send(403, "invalid ticket")
+                    return
+                self._send(302, headers={"Location": "/default.aspx", "Set-Cookie": f"svc_user={username}; Path=/"})
+                return
+            cookie = self.headers.get("Cookie", "")
+            username = next(
+                (part.split("=", 1)[1] for part in cookie.split("; ") if part.startswith("svc_user=")),
+                "",
+            )
+            self._send(200, HOME_PAGE.format(name=f"测试用户{username}" if username else ""))
+            return
+        self._send(404, "not found")
+
+    def do_POST(self) -> None:  # noqa: N802
+        self._begin()
+        parsed = urlparse(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        if parsed.path != "/login":
+            self._send(404, "not found")
+            return
+        username = form.get("username", [""])[0]
+        password = form.get("password", [""])[0]
+        service = parse_qs(parsed.query).get("service", [self.server.service_url])[0]
+        if password != self.server.password:
+            self.server.count("logins_failed")
+            self._send(200, LOGIN_PAGE.format(service=quote(service, safe="")))
+            return
+        self.server.count("logins_ok")
+        ticket = f"ST-{uuid.uuid4().hex}"
+        with self.server.lock:
+            self.server.tickets[ticket] = username
+        self._send(302, headers={"Location": f"{service}?ticket={ticket}"})
+
+
+def start_server(host: str = "127.0.0.1", port: int = 0, password: str = "secret", delay: float = 0.0) -> FakeCasServer:
+    """在后台线程启动替身服务并返回服务对象（port=0 时自动分配端口）。"""
+    server = FakeCasServer((host, port), password=password, delay=delay)
+    thread = threading.Thread(target=server.serve_forever, name="fake-cas", daemon=True)
+    thread.start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="本地 CAS 替身服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--password", default="secret", help="视为正确的密码（任意用户名）")
+    parser.add_argument("--delay", type=float, default=0.0, help="每个请求的人工延迟（秒）")
+    args = parser.parse_args()
+
+    server = FakeCasServer((args.host, args.port), password=args.password, delay=args.delay)
+    print(f"login url  : {server.login_url}")
+    print(f"service url: {server.service_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
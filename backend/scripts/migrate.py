@@ -0,0 +1,94 @@
+"""执行数据库结构迁移。
+
+部署时（滚动重启之前）运行一次；持有咨询锁，多个部署任务并发执行也只会迁移一次。
+应用进程启动时只检查 schema_version，不再执行 DDL。
+
+用法：
+    python backend/scripts/migrate.py            # 执行所有待执行的迁移
+    python backend/scripts/migrate.py --status   # 只查看当前版本
+    python backend/scripts/migrate.py --target 2 # 迁移到指定版本
+    python backend/scripts/migrate.py --months-ahead 6           # 同时预建未来 6 个月的分区
+    python backend/scripts/migrate.py --detach-before 2023-09-01  # 分离更早的整月分区以便归档
+    python backend/scripts/migrate.py --check-indexes             # 只检查热点查询依赖的索引，缺失时退出码为 1
+
+articles / vectors 按月分区；建议每月通过 cron 运行一次，保证未来月份的分区已存在。
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.db import get_connection
+from backend.migrations import (
+    MIGRATIONS,
+    PARTITIONED_SINCE_VERSION,
+    apply_migrations,
+    check_indexes,
+    check_schema,
+    detach_partitions_before,
+    ensure_partitions,
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="执行数据库结构迁移")
+    parser.add_argument("--status", action="store_true", help="只显示当前版本与待执行的迁移")
+    parser.add_argument("--check-indexes", action="store_true", help="只检查必需索引，缺失或无效时退出码为 1")
+    parser.add_argument("--target", type=int, default=None, help="迁移到指定版本（默认最新）")
+    parser.add_argument("--months-ahead", type=int, default=3, help="预建未来几个月的文章分区")
+    parser.add_argument(
+        "--detach-before",
+        type=date.fromisoformat,
+        default=None,
+        help="分离整月早于该日期（YYYY-MM-DD）的文章/向量分区",
+    )
+    args = parser.parse_args()
+
+    with get_connection() as conn:
+        status = check_schema(conn)
+    print(f"current version : {status.current}")
+    print(f"latest version  : {status.latest}")
+    pending = [m for m in MIGRATIONS if m.version > status.current]
+    for migration in pending:
+        print(f"  pending       : {migration.version}_{migration.name}")
+    if args.check_indexes:
+        sys.exit(1 if _report_indexes() else 0)
+    if args.status:
+        return
+
+    applied = apply_migrations(target=args.target)
+    if not applied:
+        print("没有需要执行的迁移")
+    for version in applied:
+        print(f"  applied       : {version}")
+
+    with get_connection() as conn:
+        partitioned = check_schema(conn).current >= PARTITIONED_SINCE_VERSION
+    if partitioned:
+        print(f"partitions created : {ensure_partitions(args.months_ahead)}")
+        if args.detach_before:
+            for name in detach_partitions_before(args.detach_before):
+                print(f"  detached      : {name}")
+    if _report_indexes():
+        sys.exit(1)
+
+
+def _report_indexes() -> list[str]:
+    with get_connection() as conn:
+        problems = check_indexes(conn)
+    if not problems:
+        print("indexes         : ok")
+    for problem in problems:
+        print(f"  index problem : {problem}")
+    return problems
+
+
+if __name__ == "__main__":
+    main()
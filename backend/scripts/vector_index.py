@@ -0,0 +1,55 @@
+"""向量索引的查看与在线重建。
+
+按 VECTOR_INDEX_TYPE 及其构建参数重建 vectors.embedding 上的索引：逐个分区并发建索引，
+建好后替换旧索引，重建期间检索与爬虫写入照常进行。
+
+用法：
+    python backend/scripts/vector_index.py                      # 查看现有向量索引
+    python backend/scripts/vector_index.py --rebuild            # 按当前配置重建
+    python backend/scripts/vector_index.py --rebuild --maintenance-work-mem 1GB
+构建参数的取舍可先用 scripts/benchmark_vector_index.py 在合成语料上评估。
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.config import Config
+from backend.db import get_connection
+from backend.vector_index import index_status, index_using, rebuild_index
+
+
+def _report() -> None:
+    with get_connection() as conn:
+        rows = index_status(conn)
+    if not rows:
+        print("vectors 上没有向量索引")
+    for row in rows:
+        print(
+            f"{row['name']}: valid={row['valid']} partitions={row['valid_partitions']}/{row['partitions']} "
+            f"size={row['bytes'] / 1024 / 1024:.1f} MiB"
+        )
+        print(f"  {row['definition']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="向量索引的查看与在线重建")
+    parser.add_argument("--rebuild", action="store_true", help="按当前配置重建向量索引")
+    parser.add_argument("--maintenance-work-mem", type=str, default=None, help="重建时的 maintenance_work_mem，如 1GB")
+    args = parser.parse_args()
+
+    cfg = Config()
+    print(f"configured      : {cfg.vector_index_type} {index_using(cfg)}")
+    if args.rebuild:
+        rebuild_index(cfg, maintenance_work_mem=args.maintenance_work_mem)
+    _report()
+
+
+if __name__ == "__main__":
+    main()
@@ -3,20 +3,26 @@ from __future__ import annotations
 import base64
 import logging
 import os
+import time
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from hashlib import sha256
 from typing import Any, Optional
 from uuid import UUID, uuid4
 
-import bcrypt
 import jwt
 
 from backend.models.auth import Session, User
 from backend.repository.user_repository import NotFoundError, UserRepository
 from backend.services.campus_auth import CampusAuthenticator
+from backend.services.password_hasher import DEFAULT_PASSWORD_COST, PasswordHasher
+from backend.services.session_store import RedisSessionStore
+from backend.services.token_cache import VerifiedTokenCache
 from backend.services.exceptions import InvalidCredentialsError, UnauthorizedError, ValidationError
 from backend.config import Config
+from backend.utils.redis_cache import get_cache
+
+REVOKED_BEFORE_KEY = "auth:revoked_before:{sub}"
 
 
 @dataclass
@@ -39,11 +45,16 @@ class AuthService:
         repo: UserRepository,
         campus: Optional[CampusAuthenticator] = None,
         logger: Optional[logging.Logger] = None,
+        hasher: Optional[PasswordHasher] = None,
+        session_store: Optional[RedisSessionStore] = None,
     ) -> None:
         self.cfg = cfg
         self.repo = repo
         self.campus = campus
         self.log = logger or logging.getLogger(__name__)
+        self.hasher = hasher or PasswordHasher.from_config(cfg, logger=self.log)
+        self.sessions = session_store
+        self.token_cache = VerifiedTokenCache(max_entries=getattr(cfg, "auth_token_cache_size", 4096))
 
         if not self.cfg.auth_jwt_secret:
             raise RuntimeError("AUTH_JWT_SECRET 未配置")
@@ -56,7 +67,7 @@ class AuthService:
             raise ValidationError("username and password are required")
 
         try:
-            cred = self.repo.get_credential(username)
+            user = self.repo.get_login_user(username)
         except NotFoundError:
             if not self.cfg.auth_allow_auto_user_creation or self.campus is None:
                 raise InvalidCredentialsError("invalid credentials")
@@ -70,29 +81,23 @@ class AuthService:
                 display_name=display_name or username,
             )
             self.log.info("campus authentication success, user created", extra={"username": username, "user_id": str(user.id)})
-            cred = self.repo.get_credential(username)
         else:
-            if not bcrypt.checkpw(password.encode("utf-8"), cred.password_hash.encode("utf-8")):
+            if not self.hasher.verify(password, user.password_hash):
                 if self.campus is None:
                     raise InvalidCredentialsError("invalid credentials")
                 display_name = self._verify_with_campus(username, password)
                 hashed = self._hash_password(password)
-                self.repo.update_credentials(
-                    user_id=cred.user_id,
+                user = self.repo.update_credentials(
+                    user_id=user.id,
                     password_hash=hashed,
                     password_algo="bcrypt",
                     password_cost=self._password_cost(),
                     display_name=display_name or username,
                 )
-                cred = self.repo.get_credential(username)
-
-        try:
-            self.repo.record_login(cred.user_id)
-        except Exception as exc:  # pragma: no cover - best effort
-            self.log.warning("record login failed", extra={"user_id": str(cred.user_id), "error": str(exc)})
+            elif self._needs_rehash(user):
+                user = self._rehash(user, password)
 
-        user = self.repo.get_by_id(cred.user_id)
-        return self._issue_tokens(user, meta)
+        return self._issue_tokens(user, meta, record_login=True)
 
     def refresh(self, refresh_token: str, meta: AuthMetadata) -> AuthResult:
         token = (refresh_token or "").strip()
@@ -100,8 +105,20 @@ class AuthService:
             raise ValidationError("refresh token missing")
 
         hashed = self._hash_refresh_token(token)
+        if self.sessions is not None:
+            # 快路径：Redis 中原子轮换，一次往返；写库由后台批量完成
+            new_token, new_session = self._new_refresh_session(None, meta)
+            rotated = self.sessions.rotate(hashed, new_session)
+            if rotated is not None:
+                new_session, user = rotated
+                return AuthResult(
+                    access_token=self._sign_access_token(user),
+                    refresh_token=new_token,
+                    user=user,
+                )
+
         try:
-            session = self.repo.get_session_by_hash(hashed)
+            session, user = self.repo.get_session_with_user(hashed)
         except NotFoundError:
             raise UnauthorizedError("session not found")
 
@@ -109,10 +126,7 @@ class AuthService:
             raise UnauthorizedError("session revoked")
         if datetime.now(timezone.utc) > session.expires_at:
             raise UnauthorizedError("session expired")
-
-        try:
-            user = self.repo.get_by_id(session.user_id)
-        except NotFoundError:
+        if user is None:
             raise UnauthorizedError("user missing")
 
         self.repo.revoke_session(session.id)
@@ -124,15 +138,28 @@ class AuthService:
             raise ValidationError("refresh token missing")
 
         hashed = self._hash_refresh_token(token)
-        try:
-            session = self.repo.get_session_by_hash(hashed)
-        except NotFoundError:
-            return
-        self.repo.revoke_session(session.id)
+        user_id = self.sessions.revoke(hashed) if self.sessions is not None else None
+        if user_id is None:
+            try:
+                session = self.repo.get_session_by_hash(hashed)
+            except NotFoundError:
+                return
+            self.repo.revoke_session(session.id)
+            user_id = session.user_id
+        self._mark_tokens_revoked(user_id)
 
     def parse_access_token(self, token: str) -> dict[str, Any]:
         if not token:
             raise UnauthorizedError("token missing")
+        claims = self.token_cache.get(token)
+        if claims is None:
+            claims = self._decode_access_token(token)
+            self.token_cache.put(token, claims)
+        if self.cfg.auth_token_revocation_check and self._is_revoked(claims):
+            raise UnauthorizedError("token revoked")
+        return claims
+
+    def _decode_access_token(self, token: str) -> dict[str, Any]:
         try:
             payload = jwt.decode(
                 token,
@@ -146,15 +173,46 @@ class AuthService:
             raise UnauthorizedError("token invalid") from exc
         return payload
 
+    def _mark_tokens_revoked(self, user_id: UUID) -> None:
+        """记录用户的吊销时间点，此前签发的访问令牌在开启检查时失效。"""
+        if not self.cfg.auth_token_revocation_check:
+            return
+        cache = get_cache()
+        if cache is None or not cache.enabled:
+            return
+        cache.set(
+            REVOKED_BEFORE_KEY.format(sub=user_id),
+            int(time.time()),
+            expire_seconds=max(int(self._access_ttl().total_seconds()), 1),
+        )
+
+    def _is_revoked(self, claims: dict[str, Any]) -> bool:
+        cache = get_cache()
+        if cache is None or not cache.enabled:
+            return False
+        revoked_before = cache.get(REVOKED_BEFORE_KEY.format(sub=claims["sub"]))
+        if revoked_before is None:
+            return False
+        try:
+            return int(claims["iat"]) < int(revoked_before)
+        except (TypeError, ValueError):
+            return False
+
     def _verify_with_campus(self, username: str, password: str) -> str:
         if self.campus is None:
             raise InvalidCredentialsError("campus auth disabled")
         return self.campus.verify(username, password)
 
-    def _issue_tokens(self, user: User, meta: AuthMetadata) -> AuthResult:
+    def _issue_tokens(self, user: User, meta: AuthMetadata, record_login: bool = False) -> AuthResult:
         access_token = self._sign_access_token(user)
         refresh_token, session = self._generate_refresh_token(user, meta)
-        self.repo.create_session(session)
+        if record_login:
+            # 登录时间与会话写入合并为一次往返
+            self.repo.create_session_with_login(session)
+        else:
+            self.repo.create_session(session)
+        if self.sessions is not None:
+            self.sessions.put(session, user)
         return AuthResult(access_token=access_token, refresh_token=refresh_token, user=user)
 
     def _sign_access_token(self, user: User) -> str:
@@ -169,13 +227,16 @@ class AuthService:
         return jwt.encode(payload, self.cfg.auth_jwt_secret, algorithm="HS256")
 
     def _generate_refresh_token(self, user: User, meta: AuthMetadata) -> tuple[str, Session]:
+        return self._new_refresh_session(user.id, meta)
+
+    def _new_refresh_session(self, user_id: Optional[UUID], meta: AuthMetadata) -> tuple[str, Session]:
         raw_bytes = os.urandom(48)
         raw_token = base64.urlsafe_b64encode(raw_bytes).decode("ascii").rstrip("=")
 
         now = datetime.now(timezone.utc)
         session = Session(
             id=uuid4(),
-            user_id=user.id,
+            user_id=user_id,  # type: ignore[arg-type]
             refresh_token_sha=self._hash_refresh_token(raw_token),
             expires_at=now + self._refresh_ttl(),
             user_agent=meta.user_agent,
@@ -191,14 +252,34 @@ class AuthService:
         return base64.urlsafe_b64encode(digest).decode("ascii").rstrip("=")
 
     def _hash_password(self, password: str) -> str:
-        cost = self._password_cost()
-        hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=cost))
-        return hashed.decode("utf-8")
+        return self.hasher.hash(password, self._password_cost())
 
     def _password_cost(self) -> int:
         if 4 <= self.cfg.auth_password_cost <= 31:
             return self.cfg.auth_password_cost
-        return 12
+        return DEFAULT_PASSWORD_COST
+
+    def _needs_rehash(self, user: User) -> bool:
+        return user.password_algo != "bcrypt" or user.password_cost != self._password_cost()
+
+    def _rehash(self, user: User, password: str) -> User:
+        """密码校验通过后按当前配置的 cost 重新哈希；失败不影响本次登录。"""
+        try:
+            hashed = self._hash_password(password)
+            updated = self.repo.update_credentials(
+                user_id=user.id,
+                password_hash=hashed,
+                password_algo="bcrypt",
+                password_cost=self._password_cost(),
+            )
+        except Exception as exc:
+            self.log.warning("password rehash skipped", extra={"user_id": str(user.id), "error": str(exc)})
+            return user
+        self.log.info(
+            "password rehashed",
+            extra={"user_id": str(user.id), "from_cost": user.password_cost, "to_cost": updated.password_cost},
+        )
+        return updated
 
     def _access_ttl(self) -> timedelta:
         return self.cfg.auth_access_token_ttl or timedelta(hours=1)
@@ -1,20 +1,113 @@
 from __future__ import annotations
 
+import contextlib
 import logging
-from typing import Optional
+import queue
+import threading
+from typing import Iterator, Optional
 
 import requests
 
 from backend.services.cas_client import sso_login_and_get_name
-from backend.services.exceptions import InvalidCredentialsError
+from backend.services.exceptions import InvalidCredentialsError, ServiceBusyError
+from backend.utils.http_client import build_session
+from backend.utils.redis_cache import RedisCache, get_cache
+
+FAILURE_KEY = "auth:campus_failures:{username}"
+
+
+class SessionPool:
+    """可复用的 requests 会话池（每个工作进程一份）。
+
+    会话保留底层 TCP/TLS 连接，归还时清空 cookie，避免不同用户的 CAS 登录态互相串用。
+    """
+
+    def __init__(self, size: int = 4) -> None:
+        self.size = max(size, 1)
+        self._idle: queue.LifoQueue[requests.Session] = queue.LifoQueue(maxsize=self.size)
+
+    @contextlib.contextmanager
+    def session(self) -> Iterator[requests.Session]:
+        try:
+            sess = self._idle.get_nowait()
+        except queue.Empty:
+            # CAS 表单提交不可重放，关闭适配器层重试
+            sess = build_session(pool_size=2, max_retries=0)
+        try:
+            yield sess
+        finally:
+            sess.cookies.clear()
+            try:
+                self._idle.put_nowait(sess)
+            except queue.Full:
+                sess.close()
+
+
+class LoginFailureCounter:
+    """按用户名统计的 SSO 登录失败计数（存放在共享 Redis 中，所有工作进程共用）。
+
+    窗口内失败次数达到上限后直接拒绝该用户名的登录，窗口到期自动解除；
+    未启用 Redis 时不做限制。
+    """
+
+    def __init__(self, window_seconds: int = 60, max_failures: int = 5) -> None:
+        self.window = max(int(window_seconds), 0)
+        self.max_failures = max(int(max_failures), 1)
+
+    @staticmethod
+    def _key(username: str) -> str:
+        return FAILURE_KEY.format(username=username)
+
+    def _cache(self) -> Optional[RedisCache]:
+        if self.window <= 0:
+            return None
+        cache = get_cache()
+        if cache is None or not cache.enabled:
+            return None
+        return cache
+
+    def blocked(self, username: str) -> bool:
+        cache = self._cache()
+        if cache is None:
+            return False
+        try:
+            return int(cache.get(self._key(username)) or 0) >= self.max_failures
+        except (TypeError, ValueError):
+            return False
+
+    def add(self, username: str) -> None:
+        cache = self._cache()
+        if cache is not None:
+            cache.incr(self._key(username), self.window)
+
+    def reset(self, username: str) -> None:
+        cache = self._cache()
+        if cache is not None:
+            cache.delete(self._key(username))
 
 
 class CampusAuthenticator:
-    def __init__(self, login_url: str, timeout: int = 10, logger: Optional[logging.Logger] = None) -> None:
+    def __init__(
+        self,
+        login_url: str,
+        timeout: int = 10,
+        logger: Optional[logging.Logger] = None,
+        max_concurrency: int = 4,
+        queue_timeout: float = 5.0,
+        failure_window: int = 60,
+        max_failures: int = 5,
+        sso_login_url: str | None = None,
+        service_url: str | None = None,
+    ) -> None:
         self.login_url = login_url.strip()
         self.timeout = timeout if timeout > 0 else 10
-        self.session = requests.Session()
         self.log = logger or logging.getLogger(__name__)
+        self.queue_timeout = max(queue_timeout, 0.0)
+        self.sso_login_url = sso_login_url
+        self.service_url = service_url
+        self._slots = threading.BoundedSemaphore(max(max_concurrency, 1))
+        self.sessions = SessionPool(size=max(max_concurrency, 1))
+        self.failures = LoginFailureCounter(window_seconds=failure_window, max_failures=max_failures)
 
     @classmethod
     def from_config(cls, cfg, logger: Optional[logging.Logger] = None) -> Optional["CampusAuthenticator"]:
@@ -23,14 +116,42 @@ class CampusAuthenticator:
         login_url = (cfg.campus_auth_url or "").strip()
         if not login_url:
             return None
-        return cls(login_url=login_url, timeout=getattr(cfg, "campus_auth_timeout", 10), logger=logger)
+        return cls(
+            login_url=login_url,
+            timeout=getattr(cfg, "campus_auth_timeout", 10),
+            logger=logger,
+            max_concurrency=getattr(cfg, "campus_auth_max_concurrency", 4),
+            queue_timeout=getattr(cfg, "campus_auth_queue_timeout", 5.0),
+            failure_window=getattr(cfg, "campus_auth_failure_window", 60),
+            max_failures=getattr(cfg, "campus_auth_max_failures", 5),
+        )
 
     def verify(self, username: str, password: str) -> str:
+        # 同一用户名短时间内失败过多时不再转发给 SSO，窗口到期后自动解除
+        if self.failures.blocked(username):
+            raise ServiceBusyError("too many failed sso attempts", retry_after=max(self.failures.window, 1))
+
+        # 限制同时发往 SSO 的登录流程数，排队超时则让客户端稍后重试
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self.log.warning("SSO 并发已满，拒绝登录请求")
+            raise ServiceBusyError("campus sso saturated", retry_after=max(int(self.queue_timeout), 1))
         try:
-            display_name = sso_login_and_get_name(username, password, timeout=self.timeout)
+            with self.sessions.session() as session:
+                display_name = sso_login_and_get_name(
+                    username,
+                    password,
+                    service=self.service_url,
+                    login_url=self.sso_login_url,
+                    timeout=self.timeout,
+                    session=session,
+                )
         except requests.RequestException as exc:
             raise RuntimeError("campus sso unavailable") from exc
         except RuntimeError as exc:
             self.log.debug("SSO 登录失败", extra={"error": str(exc)})
+            self.failures.add(username)
             raise InvalidCredentialsError("单点登录失败") from exc
+        finally:
+            self._slots.release()
+        self.failures.reset(username)
         return display_name
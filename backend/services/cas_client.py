@@ -155,6 +155,7 @@ def sso_login_and_get_name(
     service: str | None = None,
     login_url: str | None = None,
     timeout: int = 10,
+    session: requests.Session | None = None,
 ) -> str:
     service_url = service or DEFAULT_SERVICE_URL
     login_target = login_url or (DEFAULT_LOGIN_URL_PREFIX + requests.utils.quote(service_url))
@@ -164,6 +165,7 @@ def sso_login_and_get_name(
         username,
         password,
         service_url,
+        session=session,
         timeout=timeout,
     )
 
@@ -8,3 +8,9 @@ class UnauthorizedError(Exception):
 
 class InvalidCredentialsError(Exception):
     pass
+
+
+class ServiceBusyError(Exception):
+    def __init__(self, message: str = "service busy", retry_after: int = 1) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
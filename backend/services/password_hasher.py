@@ -0,0 +1,194 @@
+"""bcrypt 专用执行器。
+
+bcrypt 计算期间会释放 GIL，放到固定大小的线程池中可以按 CPU 核数并行，
+同时通过在途任务上限做准入控制：上限已满时立即拒绝并提示客户端稍后重试，
+避免登录洪峰把 CPU 和 Web 工作线程全部占住。
+
+上限按主机计算：同一主机上的所有 Web 进程在 Redis 有序集合 auth:bcrypt:slots:{host} 中
+登记在途任务，总数不超过 CPU 核数 + AUTH_BCRYPT_MAX_QUEUE；每个成员带租约，进程崩溃后
+到期自动清理。每个进程的线程池取 CPU 核数 / 进程数（WEB_CONCURRENCY），整机的 bcrypt
+线程总数不超过核数。Redis 不可用时退回进程内上限。
+
+请求线程在等待哈希结果期间仍被占用，因此部署时应让认证接口单独使用一组线程 worker，
+见 docs/deployment.md。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+import bcrypt
+
+from backend.services.exceptions import ServiceBusyError
+from backend.utils.redis_cache import get_cache
+
+T = TypeVar("T")
+
+DEFAULT_PASSWORD_COST = 12
+HOST_SLOTS_KEY = "auth:bcrypt:slots:{host}"
+# 单个在途任务的租约：远大于一次 bcrypt 加排队的耗时，只用于回收崩溃进程遗留的成员
+HOST_SLOT_LEASE_SECONDS = 30
+
+# KEYS: 主机的在途任务集合
+# ARGV: now(ms), 租约(ms), 上限, 成员
+ACQUIRE_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', tonumber(ARGV[1]) - tonumber(ARGV[2]))
+if redis.call('ZCARD', KEYS[1]) >= tonumber(ARGV[3]) then
+    return 0
+end
+redis.call('ZADD', KEYS[1], ARGV[1], ARGV[4])
+redis.call('PEXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+
+def cpu_count() -> int:
+    """可用 CPU 核数（优先考虑进程亲和性）。"""
+    try:
+        return max(len(os.sched_getaffinity(0)), 1)
+    except (AttributeError, OSError):
+        return max(os.cpu_count() or 1, 1)
+
+
+def default_workers() -> int:
+    """单个进程的 bcrypt 线程数：CPU 核数按同机 Web 进程数（WEB_CONCURRENCY）均分。"""
+    try:
+        processes = max(int(os.environ.get("WEB_CONCURRENCY") or 1), 1)
+    except ValueError:
+        processes = 1
+    return max(cpu_count() // processes, 1)
+
+
+class HostSlots:
+    """同一主机上所有进程共享的在途任务上限。"""
+
+    def __init__(
+        self,
+        limit: int,
+        lease_seconds: int = HOST_SLOT_LEASE_SECONDS,
+        host: Optional[str] = None,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.limit = max(limit, 1)
+        self.lease_ms = max(lease_seconds, 1) * 1000
+        self.key = HOST_SLOTS_KEY.format(host=host or socket.gethostname())
+        self.log = logger or logging.getLogger(__name__)
+        self._scripts: dict[int, Any] = {}
+
+    def _client(self):
+        cache = get_cache()
+        if cache is None or not cache.enabled:
+            return None
+        return cache.redis_client
+
+    def acquire(self, member: str) -> Optional[bool]:
+        """登记一个在途任务：成功返回 True，上限已满返回 False，Redis 不可用返回 None。"""
+        client = self._client()
+        if client is None:
+            return None
+        try:
+            script = self._scripts.get(id(client))
+            if script is None:
+                script = self._scripts[id(client)] = client.register_script(ACQUIRE_SCRIPT)
+            now_ms = int(time.time() * 1000)
+            return bool(script(keys=[self.key], args=[now_ms, self.lease_ms, self.limit, member]))
+        except Exception as exc:
+            self.log.warning("bcrypt 主机级准入不可用，退回进程内上限: %s", exc)
+            return None
+
+    def release(self, member: str) -> None:
+        client = self._client()
+        if client is None:
+            return
+        try:
+            client.zrem(self.key, member)
+        except Exception as exc:
+            # 释放失败时成员在租约到期后清理
+            self.log.warning("释放 bcrypt 主机级名额失败: %s", exc)
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        workers: int | None = None,
+        max_queue: int = 8,
+        retry_after: int = 2,
+        host_slots: Optional[HostSlots] = None,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.workers = max(workers or default_workers(), 1)
+        self.max_queue = max(max_queue, 0)
+        self.retry_after = max(retry_after, 1)
+        self.log = logger or logging.getLogger(__name__)
+        # 在途任务 = 正在计算 + 排队等待；进程内上限只在 Redis 不可用时起作用
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self.host_slots = host_slots
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+
+    @classmethod
+    def from_config(cls, cfg, logger: Optional[logging.Logger] = None) -> "PasswordHasher":
+        max_queue = getattr(cfg, "auth_bcrypt_max_queue", 8)
+        return cls(
+            workers=getattr(cfg, "auth_bcrypt_workers", None),
+            max_queue=max_queue,
+            retry_after=getattr(cfg, "auth_bcrypt_retry_after", 2),
+            host_slots=HostSlots(cpu_count() + max_queue, logger=logger),
+            logger=logger,
+        )
+
+    def _admit(self) -> Callable[[], None]:
+        """占用一个在途名额，返回释放函数；名额已满时抛出 ServiceBusyError。"""
+        host_slots = self.host_slots
+        if host_slots is not None:
+            member = uuid.uuid4().hex
+            acquired = host_slots.acquire(member)
+            if acquired:
+                return lambda: host_slots.release(member)
+            if acquired is False:
+                self.log.warning("bcrypt 主机级在途任务已满，拒绝登录请求")
+                raise ServiceBusyError("password hashing saturated", retry_after=self.retry_after)
+        if not self._slots.acquire(blocking=False):
+            self.log.warning("bcrypt 执行器已满，拒绝登录请求")
+            raise ServiceBusyError("password hashing saturated", retry_after=self.retry_after)
+        return self._slots.release
+
+    def _run(self, func: Callable[..., T], *args: Any) -> T:
+        release = self._admit()
+        try:
+            future = self._executor.submit(func, *args)
+        except BaseException:
+            release()
+            raise
+        future.add_done_callback(lambda _: release())
+        return future.result()
+
+    def verify(self, password: str, password_hash: str) -> bool:
+        return self._run(_checkpw, password, password_hash)
+
+    def hash(self, password: str, cost: int = DEFAULT_PASSWORD_COST) -> str:
+        return self._run(_hashpw, password, cost)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _checkpw(password: str, password_hash: str) -> bool:
+    try:
+        return bcrypt.checkpw(password.encode("utf-8"), password_hash.encode("utf-8"))
+    except ValueError:
+        # 存储的哈希格式损坏时视为校验失败
+        return False
+
+
+def _hashpw(password: str, cost: int) -> str:
+    return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(rounds=cost)).decode("utf-8")
+
+
+__all__ = ["DEFAULT_PASSWORD_COST", "HostSlots", "PasswordHasher", "cpu_count", "default_workers"]
@@ -0,0 +1,117 @@
+"""刷新会话压缩任务。
+
+sessions 表每次刷新都会新增一行并吊销旧行，需定期清理过期与已吊销的会话，
+让表与 refresh_token_sha 唯一索引保持小而常驻缓存。清理按小批次短事务进行，
+可通过脚本手动执行，也可在进程内按间隔调度（多实例下由咨询锁保证只有一个在跑）。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from backend.db import get_connection
+from backend.repository.user_repository import UserRepository
+
+# pg_try_advisory_lock 使用的固定键
+COMPACTION_LOCK_KEY = 704_202_035
+
+
+@dataclass
+class CompactionReport:
+    expired: int = 0
+    revoked: int = 0
+    batches: int = 0
+    duration_ms: float = 0.0
+    skipped: bool = False
+
+    @property
+    def total(self) -> int:
+        return self.expired + self.revoked
+
+
+def compact_sessions(
+    repo: UserRepository,
+    batch_size: int = 1000,
+    revoked_grace: timedelta = timedelta(days=1),
+    archive: bool = False,
+    max_batches: int = 1000,
+    pause_seconds: float = 0.05,
+) -> CompactionReport:
+    """循环清理直到没有可回收的行或达到批次上限。
+
+    已吊销的会话保留 revoked_grace（覆盖 Redis 写回延迟与令牌重放排查），过期会话立即回收。
+    """
+    started = time.perf_counter()
+    report = CompactionReport()
+    now = datetime.now(timezone.utc)
+    while report.batches < max_batches:
+        expired, revoked = repo.purge_sessions(
+            expired_before=now,
+            revoked_before=now - revoked_grace,
+            batch_size=batch_size,
+            archive=archive,
+        )
+        report.batches += 1
+        report.expired += expired
+        report.revoked += revoked
+        if expired < batch_size and revoked < batch_size:
+            break
+        # 批次间短暂让出，降低对在线写入与复制的影响
+        time.sleep(pause_seconds)
+    report.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+    return report
+
+
+def compact_sessions_locked(repo: UserRepository, **kwargs) -> CompactionReport:
+    """持有咨询锁时执行压缩；锁被其他实例占用则跳过。"""
+    with get_connection() as conn:
+        row = conn.execute("SELECT pg_try_advisory_lock(%s) AS locked", (COMPACTION_LOCK_KEY,)).fetchone()
+        if not row or not row["locked"]:
+            return CompactionReport(skipped=True)
+        try:
+            return compact_sessions(repo, **kwargs)
+        finally:
+            conn.execute("SELECT pg_advisory_unlock(%s)", (COMPACTION_LOCK_KEY,))
+
+
+def start_compaction_scheduler(cfg, repo: UserRepository, logger: Optional[logging.Logger] = None) -> Optional[threading.Thread]:
+    """按 AUTH_SESSION_COMPACT_INTERVAL 周期执行压缩，间隔为 0 时不启动。"""
+    interval = getattr(cfg, "auth_session_compact_interval", 0)
+    if not interval or interval <= 0:
+        return None
+    log = logger or logging.getLogger(__name__)
+    kwargs = {
+        "batch_size": getattr(cfg, "auth_session_compact_batch", 1000),
+        "revoked_grace": timedelta(seconds=getattr(cfg, "auth_session_revoked_grace", 86400)),
+    }
+
+    def _loop() -> None:
+        while True:
+            time.sleep(interval)
+            try:
+                report = compact_sessions_locked(repo, **kwargs)
+            except Exception as exc:
+                log.error(f"会话压缩失败: {exc}")
+                continue
+            if not report.skipped:
+                log.info(
+                    f"会话压缩完成: 过期 {report.expired} 行, 吊销 {report.revoked} 行, "
+                    f"{report.batches} 批, 耗时 {report.duration_ms}ms"
+                )
+
+    thread = threading.Thread(target=_loop, name="session-compaction", daemon=True)
+    thread.start()
+    return thread
+
+
+__all__ = [
+    "CompactionReport",
+    "compact_sessions",
+    "compact_sessions_locked",
+    "start_compaction_scheduler",
+]
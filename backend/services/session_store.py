@@ -0,0 +1,395 @@
+"""基于 Redis 的刷新会话存储。
+
+活跃会话以 auth:session:{refresh_token_sha} 哈希保存（含用户快照），
+刷新令牌轮换与吊销由 Lua 脚本原子完成，只需一次 Redis 往返；
+变更事件追加到写回队列，由后台线程批量落库到 Postgres。
+
+Redis 不可用或未命中时返回 None，调用方回退到 Postgres 路径。
+被轮换/吊销的旧会话保留为墓碑，至少保留到会话原定的过期时间，防止写回尚未落库时
+旧令牌经 Postgres 回退被重放。
+
+每个 Web 进程都有自己的写回线程，不同进程取出的批次落库顺序不确定，因此吊销事件
+携带完整的会话字段，以 upsert 落库：吊销先于对应会话的插入落库时，会直接插入一条已吊销的行，
+之后的插入因主键冲突被忽略。取出的批次先原子移入处理中列表，落库后才删除；
+进程在落库前退出时，批次在租约到期后由任一写回线程放回队列重放（落库是幂等的）。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Optional
+from uuid import UUID, uuid4
+
+from backend.models.auth import Session, User
+from backend.repository.user_repository import UserRepository
+from backend.services.exceptions import UnauthorizedError
+from backend.utils.redis_cache import get_cache
+
+SESSION_KEY_PREFIX = "auth:session:"
+WRITE_BEHIND_KEY = "auth:session:wb"
+# 处理中批次：有序集合记录各批次列表键及取出时间
+WRITE_BEHIND_INFLIGHT_KEY = "auth:session:wb:inflight"
+WRITE_BEHIND_PROCESSING_PREFIX = "auth:session:wb:processing:"
+# 批次取出后超过该时长仍未确认，视为写回线程已退出
+WRITE_BEHIND_LEASE_SECONDS = 60
+
+# KEYS: 旧会话, 新会话, 写回队列
+# ARGV: now, 新会话 id, 新会话 expires_at, 新会话 TTL, 墓碑 TTL, 新会话 JSON, 旧会话 refresh_token_sha
+ROTATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {0}
+end
+local f = redis.call('HMGET', KEYS[1], 'id', 'user_id', 'expires_at', 'user', 'revoked')
+if f[5] == '1' then
+    return {-1}
+end
+if tonumber(f[3]) <= tonumber(ARGV[1]) then
+    return {-2}
+end
+redis.call('HSET', KEYS[1], 'revoked', '1')
+redis.call('EXPIRE', KEYS[1], math.max(tonumber(ARGV[5]), math.ceil(tonumber(f[3]) - tonumber(ARGV[1]))))
+redis.call('HSET', KEYS[2], 'id', ARGV[2], 'user_id', f[2], 'expires_at', ARGV[3], 'user', f[4], 'revoked', '0')
+redis.call('EXPIRE', KEYS[2], tonumber(ARGV[4]))
+redis.call('RPUSH', KEYS[3],
+    '{"op":"rotate","old_id":"' .. f[1] .. '","old_sha":"' .. ARGV[7] .. '","old_expires_at":' .. f[3] ..
+    ',"user_id":"' .. f[2] .. '","at":' .. ARGV[1] .. ',"session":' .. ARGV[6] .. '}')
+return {1, f[2], f[4]}
+"""
+
+# KEYS: 会话, 写回队列
+# ARGV: now, 墓碑 TTL, 会话 refresh_token_sha
+REVOKE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+local f = redis.call('HMGET', KEYS[1], 'id', 'revoked', 'user_id', 'expires_at')
+if f[2] ~= '1' then
+    redis.call('HSET', KEYS[1], 'revoked', '1')
+    redis.call('EXPIRE', KEYS[1], math.max(tonumber(ARGV[2]), math.ceil(tonumber(f[4]) - tonumber(ARGV[1]))))
+    redis.call('RPUSH', KEYS[2],
+        '{"op":"revoke","id":"' .. f[1] .. '","sha":"' .. ARGV[3] .. '","expires_at":' .. f[4] ..
+        ',"user_id":"' .. f[3] .. '","at":' .. ARGV[1] .. '}')
+end
+return f[3]
+"""
+
+# KEYS: 写回队列, 处理中集合, 本批处理中列表
+# ARGV: 批大小, now
+CLAIM_SCRIPT = """
+local events = redis.call('LRANGE', KEYS[1], 0, tonumber(ARGV[1]) - 1)
+if #events == 0 then
+    return events
+end
+redis.call('LTRIM', KEYS[1], #events, -1)
+redis.call('RPUSH', KEYS[3], unpack(events))
+redis.call('ZADD', KEYS[2], ARGV[2], KEYS[3])
+return events
+"""
+
+# KEYS: 写回队列, 处理中集合, 处理中列表
+REQUEUE_SCRIPT = """
+local events = redis.call('LRANGE', KEYS[3], 0, -1)
+if #events > 0 then
+    redis.call('RPUSH', KEYS[1], unpack(events))
+end
+redis.call('DEL', KEYS[3])
+redis.call('ZREM', KEYS[2], KEYS[3])
+return #events
+"""
+
+
+def _session_key(refresh_token_sha: str) -> str:
+    return f"{SESSION_KEY_PREFIX}{refresh_token_sha}"
+
+
+def _user_snapshot(user: User) -> str:
+    return json.dumps(
+        {
+            "id": str(user.id),
+            "username": user.username,
+            "display_name": user.display_name,
+            "roles": user.roles,
+            "created_at": user.created_at.isoformat() if user.created_at else None,
+        },
+        ensure_ascii=False,
+    )
+
+
+def _user_from_snapshot(raw: Any) -> User:
+    data = json.loads(raw)
+    created_at = data.get("created_at")
+    return User(
+        id=UUID(data["id"]),
+        username=data["username"],
+        display_name=data["display_name"],
+        password_hash="",
+        password_algo="",
+        password_cost=0,
+        roles=data.get("roles") or [],
+        created_at=datetime.fromisoformat(created_at) if created_at else datetime.now(timezone.utc),
+        updated_at=None,
+        last_login_at=None,
+    )
+
+
+def _from_timestamp(value: Any) -> datetime:
+    return datetime.fromtimestamp(float(value), tz=timezone.utc)
+
+
+def _revoked_session(session_id: str, user_id: str, refresh_token_sha: str, expires_at: Any, at: datetime) -> Session:
+    """吊销事件对应的完整会话行，用于 upsert。"""
+    return Session(
+        id=UUID(session_id),
+        user_id=UUID(user_id),
+        refresh_token_sha=refresh_token_sha,
+        expires_at=_from_timestamp(expires_at),
+        user_agent=None,
+        ip=None,
+        revoked_at=at,
+        created_at=at,
+    )
+
+
+def _session_payload(session: Session) -> str:
+    """写回事件中的新会话字段（user_id 由脚本从旧会话补齐）。"""
+    return json.dumps(
+        {
+            "id": str(session.id),
+            "refresh_token_sha": session.refresh_token_sha,
+            "expires_at": session.expires_at.timestamp(),
+            "user_agent": session.user_agent,
+            "ip": session.ip,
+            "created_at": session.created_at.timestamp(),
+        },
+        ensure_ascii=False,
+    )
+
+
+class RedisSessionStore:
+    def __init__(
+        self,
+        repo: UserRepository,
+        tombstone_seconds: int = 86400,
+        flush_interval: float = 1.0,
+        flush_batch: int = 500,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        self.repo = repo
+        self.tombstone_seconds = max(tombstone_seconds, 60)
+        self.flush_interval = max(flush_interval, 0.1)
+        self.flush_batch = max(flush_batch, 1)
+        self.log = logger or logging.getLogger(__name__)
+        self._scripts: dict[str, Any] = {}
+        self._flusher_pid: int | None = None
+        self._flusher_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, cfg, repo: UserRepository, logger: Optional[logging.Logger] = None) -> Optional["RedisSessionStore"]:
+        if (getattr(cfg, "auth_session_store", "postgres") or "postgres").lower() != "redis":
+            return None
+        return cls(
+            repo,
+            tombstone_seconds=getattr(cfg, "auth_session_tombstone_seconds", 86400),
+            flush_interval=getattr(cfg, "auth_session_flush_interval", 1.0),
+            flush_batch=getattr(cfg, "auth_session_flush_batch", 500),
+            logger=logger,
+        )
+
+    def _client(self):
+        cache = get_cache()
+        if cache is None or not cache.enabled:
+            return None
+        return cache.redis_client
+
+    def _script(self, client, name: str, source: str):
+        # register_script 会缓存 SHA，调用时优先 EVALSHA
+        key = f"{id(client)}:{name}"
+        script = self._scripts.get(key)
+        if script is None:
+            script = client.register_script(source)
+            self._scripts[key] = script
+        return script
+
+    def put(self, session: Session, user: User) -> None:
+        """缓存一个已在 Postgres 落库的会话（登录或回退刷新后调用）。"""
+        client = self._client()
+        if client is None:
+            return
+        self._ensure_flusher()
+        ttl = int((session.expires_at - datetime.now(timezone.utc)).total_seconds())
+        if ttl <= 0:
+            return
+        key = _session_key(session.refresh_token_sha)
+        try:
+            pipe = client.pipeline(transaction=True)
+            pipe.hset(
+                key,
+                mapping={
+                    "id": str(session.id),
+                    "user_id": str(session.user_id),
+                    "expires_at": str(session.expires_at.timestamp()),
+                    "user": _user_snapshot(user),
+                    "revoked": "0",
+                },
+            )
+            pipe.expire(key, ttl)
+            pipe.execute()
+        except Exception as exc:
+            self.log.warning(f"缓存会话失败: {exc}")
+
+    def rotate(self, refresh_token_sha: str, new_session: Session) -> Optional[tuple[Session, User]]:
+        """原子轮换刷新会话。
+
+        返回补齐 user_id 的新会话与用户快照；未命中或 Redis 不可用时返回 None。
+        旧会话已吊销或过期时抛出 UnauthorizedError。
+        """
+        client = self._client()
+        if client is None:
+            return None
+        self._ensure_flusher()
+        now = time.time()
+        ttl = int(new_session.expires_at.timestamp() - now)
+        try:
+            result = self._script(client, "rotate", ROTATE_SCRIPT)(
+                keys=[_session_key(refresh_token_sha), _session_key(new_session.refresh_token_sha), WRITE_BEHIND_KEY],
+                args=[
+                    repr(now),
+                    str(new_session.id),
+                    repr(new_session.expires_at.timestamp()),
+                    max(ttl, 1),
+                    self.tombstone_seconds,
+                    _session_payload(new_session),
+                    refresh_token_sha,
+                ],
+            )
+        except Exception as exc:
+            self.log.warning(f"Redis 会话轮换失败，回退数据库: {exc}")
+            return None
+
+        status = int(result[0])
+        if status == 0:
+            return None
+        if status == -1:
+            raise UnauthorizedError("session revoked")
+        if status == -2:
+            raise UnauthorizedError("session expired")
+        user_id = result[1].decode("utf-8") if isinstance(result[1], bytes) else result[1]
+        new_session.user_id = UUID(user_id)
+        return new_session, _user_from_snapshot(result[2])
+
+    def revoke(self, refresh_token_sha: str) -> Optional[UUID]:
+        """吊销会话并返回所属用户 ID；Redis 中不存在该会话时返回 None，由调用方回退数据库。"""
+        client = self._client()
+        if client is None:
+            return None
+        self._ensure_flusher()
+        try:
+            user_id = self._script(client, "revoke", REVOKE_SCRIPT)(
+                keys=[_session_key(refresh_token_sha), WRITE_BEHIND_KEY],
+                args=[repr(time.time()), self.tombstone_seconds, refresh_token_sha],
+            )
+        except Exception as exc:
+            self.log.warning(f"Redis 会话吊销失败，回退数据库: {exc}")
+            return None
+        if not user_id:
+            return None
+        return UUID(user_id.decode("utf-8") if isinstance(user_id, bytes) else user_id)
+
+    def flush(self) -> int:
+        """取出一批写回事件并落库，返回处理的事件数；落库失败时事件放回队列。"""
+        client = self._client()
+        if client is None:
+            return 0
+        self._requeue_expired(client)
+        processing = f"{WRITE_BEHIND_PROCESSING_PREFIX}{uuid4().hex}"
+        keys = [WRITE_BEHIND_KEY, WRITE_BEHIND_INFLIGHT_KEY, processing]
+        raw_events = self._script(client, "claim", CLAIM_SCRIPT)(keys=keys, args=[self.flush_batch, time.time()])
+        if not raw_events:
+            return 0
+
+        created: list[Session] = []
+        revoked: list[Session] = []
+        # 旧格式事件缺少令牌摘要与过期时间，只能按 id 更新已有行
+        revoked_ids: list[tuple[UUID, datetime]] = []
+        for raw in raw_events:
+            try:
+                event = json.loads(raw)
+                at = datetime.fromtimestamp(float(event["at"]), tz=timezone.utc)
+                if event["op"] == "rotate":
+                    data = event["session"]
+                    created.append(
+                        Session(
+                            id=UUID(data["id"]),
+                            user_id=UUID(event["user_id"]),
+                            refresh_token_sha=data["refresh_token_sha"],
+                            expires_at=_from_timestamp(data["expires_at"]),
+                            user_agent=data.get("user_agent"),
+                            ip=data.get("ip"),
+                            revoked_at=None,
+                            created_at=_from_timestamp(data["created_at"]),
+                        )
+                    )
+                    if "old_sha" in event:
+                        revoked.append(
+                            _revoked_session(event["old_id"], event["user_id"], event["old_sha"], event["old_expires_at"], at)
+                        )
+                    else:
+                        revoked_ids.append((UUID(event["old_id"]), at))
+                elif event["op"] == "revoke":
+                    if "sha" in event:
+                        revoked.append(_revoked_session(event["id"], event["user_id"], event["sha"], event["expires_at"], at))
+                    else:
+                        revoked_ids.append((UUID(event["id"]), at))
+            except (KeyError, TypeError, ValueError) as exc:
+                self.log.error(f"丢弃无法解析的会话写回事件: {exc}")
+
+        try:
+            self.repo.apply_session_events(created, revoked, revoked_ids)
+        except Exception:
+            self._script(client, "requeue", REQUEUE_SCRIPT)(keys=keys)
+            raise
+        pipe = client.pipeline(transaction=True)
+        pipe.delete(processing)
+        pipe.zrem(WRITE_BEHIND_INFLIGHT_KEY, processing)
+        pipe.execute()
+        return len(raw_events)
+
+    def _requeue_expired(self, client) -> None:
+        """把租约已过期（取出它的写回线程已退出）的批次放回队列。"""
+        deadline = time.time() - WRITE_BEHIND_LEASE_SECONDS
+        for processing in client.zrangebyscore(WRITE_BEHIND_INFLIGHT_KEY, "-inf", deadline):
+            count = self._script(client, "requeue", REQUEUE_SCRIPT)(
+                keys=[WRITE_BEHIND_KEY, WRITE_BEHIND_INFLIGHT_KEY, processing]
+            )
+            if count:
+                self.log.warning(f"重放 {count} 条未确认的会话写回事件")
+
+    def _ensure_flusher(self) -> None:
+        # 按进程启动（兼容 fork 型 worker）
+        pid = os.getpid()
+        if self._flusher_pid == pid:
+            return
+        with self._flusher_lock:
+            if self._flusher_pid == pid:
+                return
+            thread = threading.Thread(target=self._flush_loop, name="session-write-behind", daemon=True)
+            thread.start()
+            self._flusher_pid = pid
+
+    def _flush_loop(self) -> None:
+        while True:
+            try:
+                processed = self.flush()
+            except Exception as exc:
+                self.log.error(f"会话写回落库失败: {exc}")
+                processed = 0
+            if processed < self.flush_batch:
+                time.sleep(self.flush_interval)
+
+
+__all__ = ["RedisSessionStore", "SESSION_KEY_PREFIX", "WRITE_BEHIND_INFLIGHT_KEY", "WRITE_BEHIND_KEY"]
@@ -0,0 +1,57 @@
+"""已验证访问令牌缓存。
+
+login_required 每次请求都要做 HMAC 验签与声明校验，流式与轮询接口尤为频繁。
+这里按令牌摘要缓存解码后的声明（有界 LRU），命中时只需一次字典查找，
+条目在令牌 exp 到期后失效，不会延长令牌寿命。
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from hashlib import sha256
+from typing import Any, Optional
+
+
+class VerifiedTokenCache:
+    def __init__(self, max_entries: int = 4096) -> None:
+        self.max_entries = max(max_entries, 0)
+        self._items: OrderedDict[bytes, dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        # 只保存摘要，内存中不留原始令牌
+        return sha256(token.encode("utf-8")).digest()
+
+    def get(self, token: str) -> Optional[dict[str, Any]]:
+        if not self.max_entries:
+            return None
+        key = self._key(token)
+        with self._lock:
+            claims = self._items.get(key)
+            if claims is None:
+                return None
+            if claims["exp"] <= time.time():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return claims
+
+    def put(self, token: str, claims: dict[str, Any]) -> None:
+        if not self.max_entries:
+            return
+        key = self._key(token)
+        with self._lock:
+            self._items[key] = claims
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+
+__all__ = ["VerifiedTokenCache"]
@@ -0,0 +1,176 @@
+"""检索上下文构建工具。
+
+该模块负责把向量检索得到的文章装配进固定的 token 预算，
+优先保留排序靠前文章中与问题最相关的段落，其余文章截断或仅保留摘要。
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Iterable
+
+# 中日韩字符及全角标点，近似按 1 字符 = 1 token 估算
+_CJK_PATTERN = re.compile(r"[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]")
+# 段落切分：换行或中文句末标点
+_PASSAGE_PATTERN = re.compile(r"(?<=[。！？；!?;])|\n+")
+# 每篇文档 JSON 结构（键名、引号等）的固定开销
+_DOC_OVERHEAD_TOKENS = 16
+# 截断正文的最小保留 token 数，低于该值时只保留摘要
+_MIN_CONTENT_TOKENS = 48
+
+
+@dataclass
+class ContextResult:
+    """上下文装配结果。"""
+
+    documents: list[dict[str, Any]]
+    tokens_used: int
+    budget: int
+    truncated_ids: list[Any] = field(default_factory=list)
+    dropped_ids: list[Any] = field(default_factory=list)
+
+
+def estimate_tokens(text: str | None) -> int:
+    """本地快速估算文本 token 数。
+
+    中文字符按 1 token 计，其余字符按 4 字符 = 1 token 计，
+    与常见 BPE 分词器在中英文混排文本上的结果误差在可接受范围内。
+    """
+    if not text:
+        return 0
+    cjk = len(_CJK_PATTERN.findall(text))
+    rest = len(text) - cjk
+    return cjk + (rest + 3) // 4
+
+
+def char_bigrams(text: str) -> set[str]:
+    """去掉空白并转小写后的字符二元组集合，用于段落筛选与检索重排的词面重叠度。"""
+    normalized = "".join(text.lower().split())
+    if len(normalized) < 2:
+        return {normalized} if normalized else set()
+    return {normalized[i : i + 2] for i in range(len(normalized) - 1)}
+
+
+def _split_passages(content: str) -> list[str]:
+    return [part.strip() for part in _PASSAGE_PATTERN.split(content) if part and part.strip()]
+
+
+def _cut_to_tokens(text: str, limit: int) -> str:
+    tokens = estimate_tokens(text)
+    if tokens <= limit:
+        return text
+    # 按比例换算字符数，再逐步收缩直到满足预算
+    cut = max(int(len(text) * limit / max(tokens, 1)), 0)
+    while cut > 0 and estimate_tokens(text[:cut]) > limit:
+        cut = int(cut * 0.9)
+    return f"{text[:cut].rstrip()}…" if cut else ""
+
+
+def select_passages(content: str, query: str, token_limit: int) -> str:
+    """在 token 限制内挑选与问题最相关的段落，并按原文顺序拼接。"""
+    if token_limit <= 0 or not content:
+        return ""
+    if estimate_tokens(content) <= token_limit:
+        return content
+
+    passages = _split_passages(content)
+    if not passages:
+        return ""
+    query_grams = char_bigrams(query or "")
+    scored = []
+    for index, passage in enumerate(passages):
+        grams = char_bigrams(passage)
+        overlap = len(grams & query_grams) / len(query_grams) if query_grams else 0.0
+        scored.append((overlap, -index, index, passage))
+    # 相关度优先，相关度相同则靠前的段落优先
+    scored.sort(reverse=True)
+
+    chosen: list[tuple[int, str]] = []
+    remaining = token_limit
+    for _, _, index, passage in scored:
+        # 额外 1 token 预留给段落间的换行与省略号
+        cost = estimate_tokens(passage) + 1
+        if cost <= remaining:
+            chosen.append((index, passage))
+            remaining -= cost
+        elif not chosen and remaining >= _MIN_CONTENT_TOKENS:
+            chosen.append((index, _cut_to_tokens(passage, remaining - 1)))
+            remaining = 0
+        if remaining <= 0:
+            break
+
+    chosen.sort()
+    parts: list[str] = []
+    last_index = None
+    for index, passage in chosen:
+        if last_index is not None and index != last_index + 1:
+            parts.append("…")
+        parts.append(passage)
+        last_index = index
+    return "\n".join(parts)
+
+
+def build_context(
+    documents: Iterable[dict[str, Any]],
+    query: str,
+    token_budget: int,
+    content_key: str = "content",
+) -> ContextResult:
+    """把文档装配进 token 预算。
+
+    文档需已按相关度排好序。先为每篇文档保留标题、摘要等元信息，
+    再按顺序为正文分配剩余预算：放得下则保留全文，放不下则挑选相关段落，
+    预算耗尽后其余文档只保留摘要；连元信息都放不下的文档会被丢弃。
+
+    参数：
+        documents: 已排序的文档列表（包含 content 字段）
+        query: 用户检索问题，用于挑选相关段落
+        token_budget: token 预算
+        content_key: 正文字段名
+
+    返回：
+        ContextResult，包含装配后的文档与实际使用的 token 数
+    """
+    budget = max(int(token_budget), 0)
+    docs = [dict(doc) for doc in documents]
+    contents = [doc.pop(content_key, None) or "" for doc in docs]
+
+    kept: list[tuple[dict[str, Any], str]] = []
+    dropped: list[Any] = []
+    used = 0
+    for doc, content in zip(docs, contents):
+        header_cost = _DOC_OVERHEAD_TOKENS + sum(
+            estimate_tokens(value) for value in doc.values() if isinstance(value, str)
+        )
+        if used + header_cost > budget:
+            dropped.append(doc.get("id"))
+            continue
+        used += header_cost
+        kept.append((doc, content))
+
+    truncated: list[Any] = []
+    result_docs: list[dict[str, Any]] = []
+    for doc, content in kept:
+        remaining = budget - used
+        content_cost = estimate_tokens(content)
+        if content_cost <= remaining:
+            doc[content_key] = content
+            used += content_cost
+        else:
+            excerpt = select_passages(content, query, remaining) if remaining >= _MIN_CONTENT_TOKENS else ""
+            doc[content_key] = excerpt
+            used += estimate_tokens(excerpt)
+            truncated.append(doc.get("id"))
+        result_docs.append(doc)
+
+    return ContextResult(
+        documents=result_docs,
+        tokens_used=used,
+        budget=budget,
+        truncated_ids=truncated,
+        dropped_ids=dropped,
+    )
+
+
+__all__ = ["ContextResult", "build_context", "char_bigrams", "estimate_tokens", "select_passages"]
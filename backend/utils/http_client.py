@@ -0,0 +1,175 @@
+"""共享HTTP客户端层。
+
+为嵌入服务与大模型对话服务提供带连接池、keep-alive、超时、重试与熔断的客户端，
+避免每次请求都重新建立 TCP/TLS 连接，也避免上游故障时请求线程长时间堆积。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, TypeVar
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 可重试的上游状态码（限流与网关类错误）
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class CircuitOpenError(RuntimeError):
+    """熔断器处于打开状态时抛出，调用方应直接降级。"""
+
+
+class CircuitBreaker:
+    """线程安全的熔断器。
+
+    连续失败达到阈值后进入打开状态，在冷却时间内直接拒绝调用；
+    冷却结束后放行一次试探调用（半开），成功则关闭，失败则重新打开。
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+        self.name = name
+        self.failure_threshold = max(failure_threshold, 1)
+        self.reset_timeout = max(reset_timeout, 1.0)
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._half_open_probe = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def _before_call(self) -> None:
+        with self._lock:
+            if self._opened_at is None:
+                return
+            if time.monotonic() - self._opened_at < self.reset_timeout or self._half_open_probe:
+                raise CircuitOpenError(f"{self.name} 熔断中，暂不可用")
+            # 冷却结束，仅放行一个试探请求
+            self._half_open_probe = True
+
+    def _on_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._half_open_probe = False
+
+    def _on_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._half_open_probe or self._failures >= self.failure_threshold:
+                logger.warning("上游服务熔断: %s (连续失败 %s 次)", self.name, self._failures)
+                self._opened_at = time.monotonic()
+            self._half_open_probe = False
+
+    def call(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """通过熔断器执行调用。"""
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self._on_failure()
+            raise
+        self._on_success()
+        return result
+
+
+def build_session(pool_size: int = 10, max_retries: int = 2, backoff_factor: float = 0.5) -> requests.Session:
+    """创建带连接池与重试策略的 requests 会话。"""
+    retry = Retry(
+        total=max(max_retries, 0),
+        connect=max(max_retries, 0),
+        read=0,  # 读超时不重试，避免放大慢请求
+        status=max(max_retries, 0),
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({"GET", "POST"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def build_httpx_client(pool_size: int = 10, timeout: float = 60.0) -> httpx.Client:
+    """创建带连接池与 keep-alive 的 httpx 客户端（供 OpenAI SDK 使用）。"""
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=60.0,
+        ),
+        timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+    )
+
+
+class ServiceClient:
+    """面向单个上游服务的 HTTP 客户端（连接池 + 超时 + 重试 + 熔断）。"""
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float = 10.0,
+        pool_size: int = 10,
+        max_retries: int = 2,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ) -> None:
+        self.name = name
+        self.timeout = timeout
+        self.session = build_session(pool_size=pool_size, max_retries=max_retries)
+        self.breaker = CircuitBreaker(name, failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+
+    def post_json(self, url: str, payload: Any, headers: dict[str, str] | None = None) -> Any:
+        """POST JSON 并返回解析后的响应体，非 2xx 状态抛出 requests.HTTPError。"""
+
+        def _do_post() -> Any:
+            response = self.session.post(url, json=payload, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+            return response.json()
+
+        return self.breaker.call(_do_post)
+
+
+_clients: dict[str, ServiceClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_service_client(name: str, **kwargs: Any) -> ServiceClient:
+    """获取（必要时创建）按名称共享的服务客户端，同一进程内复用连接池。"""
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(name)
+        if client is None:
+            client = ServiceClient(name, **kwargs)
+            _clients[name] = client
+    return client
+
+
+__all__ = [
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "ServiceClient",
+    "build_httpx_client",
+    "build_session",
+    "get_service_client",
+]
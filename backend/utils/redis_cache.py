@@ -14,6 +14,25 @@ import redis
 
 logger = logging.getLogger(__name__)
 
+# SCAN 每次迭代的建议返回数量，以及 UNLINK 每批删除的键数
+SCAN_BATCH_SIZE = 500
+
+# 命名空间代数在进程内的缓存时间（秒），避免每次读缓存都多一次 GET
+GENERATION_CACHE_SECONDS = 2.0
+
+
+def _serialize(value: Any) -> str:
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def _deserialize(value: Any) -> Any:
+    try:
+        return json.loads(value)
+    except json.JSONDecodeError:
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+
 
 class RedisCache:
     """Redis缓存工具类。
@@ -29,6 +48,7 @@ class RedisCache:
         """
         self.redis_client = redis_client
         self.enabled = redis_client is not None
+        self._generations: dict[str, tuple[int, float]] = {}
     
     def set(self, key: str, value: Any, expire_seconds: int = 3600) -> bool:
         """设置缓存。
@@ -45,13 +65,7 @@ class RedisCache:
             return False
         
         try:
-            # 序列化值
-            if isinstance(value, (dict, list)):
-                serialized_value = json.dumps(value, ensure_ascii=False)
-            else:
-                serialized_value = str(value)
-            
-            self.redis_client.setex(key, expire_seconds, serialized_value)
+            self.redis_client.setex(key, expire_seconds, _serialize(value))
             return True
         except Exception as e:
             logger.error(f"设置缓存失败 (键: {key}): {e}")
@@ -75,12 +89,8 @@ class RedisCache:
             if value is None:
                 return default
             
-            # 尝试反序列化JSON
-            try:
-                return json.loads(value)
-            except json.JSONDecodeError:
-                # 如果不是JSON，返回原始字符串
-                return value.decode('utf-8') if isinstance(value, bytes) else value
+            # 尝试反序列化JSON，不是JSON时返回原始字符串
+            return _deserialize(value)
                 
         except Exception as e:
             logger.error(f"获取缓存失败 (键: {key}): {e}")
@@ -123,27 +133,381 @@ class RedisCache:
             logger.error(f"检查缓存存在性失败 (键: {key}): {e}")
             return False
     
+    def push_list(self, key: str, values: list[Any], max_len: int, expire_seconds: int = 3600) -> bool:
+        """向列表尾部追加元素，并裁剪长度、刷新过期时间。
+
+        RPUSH + LTRIM + EXPIRE 在同一个事务管道中执行，
+        并发追加不会互相覆盖，也只需一次网络往返。
+
+        参数：
+            key: 缓存键
+            values: 要追加的元素（dict/list 会序列化为JSON）
+            max_len: 列表保留的最大长度（保留最新的元素）
+            expire_seconds: 过期时间（秒）
+
+        返回：
+            追加是否成功
+        """
+        if not self.enabled or not values:
+            return False
+
+        try:
+            serialized = [_serialize(value) for value in values]
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.rpush(key, *serialized)
+            if max_len > 0:
+                pipe.ltrim(key, -max_len, -1)
+            pipe.expire(key, expire_seconds)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"追加列表缓存失败 (键: {key}): {e}")
+            return False
+
+    def get_list(self, key: str, start: int = 0, end: int = -1) -> list[Any]:
+        """读取列表缓存的指定区间。
+
+        参数：
+            key: 缓存键
+            start: 起始下标（支持负数）
+            end: 结束下标（包含，支持负数）
+
+        返回：
+            反序列化后的元素列表，失败或不存在时返回空列表
+        """
+        if not self.enabled:
+            return []
+
+        try:
+            items = self.redis_client.lrange(key, start, end)
+        except Exception as e:
+            logger.error(f"读取列表缓存失败 (键: {key}): {e}")
+            return []
+
+        return [_deserialize(item) for item in items]
+
+    def mget(self, keys: list[str], default: Any = None) -> list[Any]:
+        """批量获取缓存（一次 MGET 往返）。
+
+        参数：
+            keys: 缓存键列表
+            default: 键不存在时的默认值
+
+        返回：
+            与 keys 顺序一致的值列表
+        """
+        if not self.enabled or not keys:
+            return [default for _ in keys]
+
+        try:
+            values = self.redis_client.mget(keys)
+        except Exception as e:
+            logger.error(f"批量获取缓存失败 (键数: {len(keys)}): {e}")
+            return [default for _ in keys]
+        return [default if value is None else _deserialize(value) for value in values]
+
+    def mset(self, mapping: dict[str, Any], expire_seconds: int = 3600) -> bool:
+        """批量设置缓存，所有键使用相同的过期时间。
+
+        参数：
+            mapping: 键值映射
+            expire_seconds: 过期时间（秒）
+
+        返回：
+            设置是否成功
+        """
+        return self.set_many([(key, value, expire_seconds) for key, value in mapping.items()])
+
+    def set_many(self, items: list[tuple[str, Any, int]], transaction: bool = False) -> bool:
+        """批量设置缓存，每个键可指定过期时间，整批在一个管道中发送。
+
+        MSET 不支持过期时间，这里用管道中的 SET EX 代替，仍只需一次网络往返。
+
+        参数：
+            items: (键, 值, 过期秒数) 列表
+            transaction: 是否以 MULTI/EXEC 包裹，保证读者不会看到写了一半的批次
+
+        返回：
+            设置是否成功
+        """
+        if not self.enabled or not items:
+            return False
+
+        try:
+            pipe = self.redis_client.pipeline(transaction=transaction)
+            for key, value, expire_seconds in items:
+                pipe.set(key, _serialize(value), ex=expire_seconds)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"批量设置缓存失败 (键数: {len(items)}): {e}")
+            return False
+
+    def exists_many(self, keys: list[str]) -> list[bool]:
+        """批量检查缓存是否存在。
+
+        参数：
+            keys: 缓存键列表
+
+        返回：
+            与 keys 顺序一致的布尔列表
+        """
+        if not self.enabled or not keys:
+            return [False for _ in keys]
+
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for key in keys:
+                pipe.exists(key)
+            return [bool(result) for result in pipe.execute()]
+        except Exception as e:
+            logger.error(f"批量检查缓存存在性失败 (键数: {len(keys)}): {e}")
+            return [False for _ in keys]
+
+    def delete_many(self, keys: list[str]) -> int:
+        """批量删除缓存（UNLINK，在后台线程释放内存）。
+
+        参数：
+            keys: 缓存键列表
+
+        返回：
+            删除的缓存数量
+        """
+        if not self.enabled or not keys:
+            return 0
+
+        try:
+            return self._unlink(keys)
+        except Exception as e:
+            logger.error(f"批量删除缓存失败 (键数: {len(keys)}): {e}")
+            return 0
+
+    def get_hash_fields(self, key: str, fields: list[str]) -> dict[str, Any]:
+        """读取哈希的指定字段（一次 HMGET 往返），不存在的字段不出现在结果中。
+
+        参数：
+            key: 哈希键
+            fields: 字段列表
+
+        返回：
+            字段到值的映射
+        """
+        if not self.enabled or not fields:
+            return {}
+
+        try:
+            values = self.redis_client.hmget(key, fields)
+        except Exception as e:
+            logger.error(f"读取哈希字段失败 (键: {key}): {e}")
+            return {}
+        return {
+            field: _deserialize(value)
+            for field, value in zip(fields, values)
+            if value is not None
+        }
+
+    def set_hash(self, key: str, mapping: dict[str, Any], expire_seconds: Optional[int] = None) -> bool:
+        """写入哈希字段，可选地设置整个哈希的过期时间。
+
+        参数：
+            key: 哈希键
+            mapping: 字段到值的映射
+            expire_seconds: 过期时间（秒），None 表示不过期
+
+        返回：
+            设置是否成功
+        """
+        if not self.enabled or not mapping:
+            return False
+
+        try:
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.hset(key, mapping={field: _serialize(value) for field, value in mapping.items()})
+            if expire_seconds:
+                pipe.expire(key, expire_seconds)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"写入哈希失败 (键: {key}): {e}")
+            return False
+
+    def incr(self, key: str, expire_seconds: int) -> int:
+        """计数器加一；键首次创建时设置过期时间，形成固定长度的计数窗口。
+
+        参数：
+            key: 计数器键
+            expire_seconds: 计数窗口长度（秒）
+
+        返回：
+            加一后的计数，失败时返回 0
+        """
+        if not self.enabled:
+            return 0
+
+        try:
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.incr(key)
+            pipe.ttl(key)
+            count, ttl = pipe.execute()
+            # 不依赖 Redis 7 的 EXPIRE NX：只在计数器还没有过期时间时补设
+            if ttl == -1:
+                self.redis_client.expire(key, expire_seconds)
+            return int(count)
+        except Exception as e:
+            logger.error(f"计数器加一失败 (键: {key}): {e}")
+            return 0
+
+    def _unlink(self, keys: list[Any]) -> int:
+        try:
+            return self.redis_client.unlink(*keys)
+        except redis.ResponseError:
+            # Redis < 4.0 不支持 UNLINK
+            return self.redis_client.delete(*keys)
+
+    def get_generation(self, namespace_key: str) -> int:
+        """读取命名空间的当前代数（键不存在时为 0）。
+
+        缓存键中嵌入代数，整体失效只需 INCR 一次，旧代的键由 TTL 自然过期。
+        进程内短暂缓存代数，代价是失效最多延迟 GENERATION_CACHE_SECONDS 秒。
+
+        参数：
+            namespace_key: 存放代数的键
+
+        返回：
+            当前代数
+        """
+        if not self.enabled:
+            return 0
+
+        cached = self._generations.get(namespace_key)
+        now = time.monotonic()
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        try:
+            value = self.redis_client.get(namespace_key)
+            generation = int(value) if value is not None else 0
+        except Exception as e:
+            logger.error(f"读取缓存代数失败 (键: {namespace_key}): {e}")
+            return cached[0] if cached else 0
+        self._generations[namespace_key] = (generation, now + GENERATION_CACHE_SECONDS)
+        return generation
+
+    def bump_generation(self, namespace_key: str) -> int:
+        """递增命名空间代数，使该命名空间下的所有缓存键一次性失效。
+
+        参数：
+            namespace_key: 存放代数的键
+
+        返回：
+            新的代数，失败时返回 -1
+        """
+        if not self.enabled:
+            return -1
+
+        try:
+            generation = int(self.redis_client.incr(namespace_key))
+        except Exception as e:
+            logger.error(f"递增缓存代数失败 (键: {namespace_key}): {e}")
+            return -1
+        self._generations.pop(namespace_key, None)
+        return generation
+
+    def set_tagged(
+        self,
+        key: str,
+        value: Any,
+        expire_seconds: int,
+        tag_keys: list[str],
+        tag_expire_seconds: Optional[int] = None,
+        only_if_absent: bool = False,
+    ) -> bool:
+        """设置缓存并登记到标签集合，便于按标签精确失效。
+
+        SET 与各标签的 SADD/EXPIRE 在同一个事务管道中完成。标签过期时间应不短于
+        其下最长的成员 TTL，默认取 expire_seconds。only_if_absent 为真时使用 SET NX，
+        不覆盖已存在的值（例如 crawler 原子交换的快照）。
+
+        参数：
+            key: 缓存键
+            value: 缓存值
+            expire_seconds: 过期时间（秒）
+            tag_keys: 标签集合的键
+            tag_expire_seconds: 标签集合的过期时间（秒）
+            only_if_absent: 仅在键不存在时写入
+
+        返回：
+            设置是否成功
+        """
+        if not self.enabled:
+            return False
+
+        tag_ttl = max(tag_expire_seconds or 0, expire_seconds)
+        try:
+            pipe = self.redis_client.pipeline(transaction=True)
+            pipe.set(key, _serialize(value), ex=expire_seconds, nx=only_if_absent)
+            for tag_key in tag_keys:
+                pipe.sadd(tag_key, key)
+                pipe.expire(tag_key, tag_ttl)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.error(f"设置标签缓存失败 (键: {key}): {e}")
+            return False
+
+    def invalidate_tags(self, tag_keys: list[str]) -> int:
+        """删除标签集合登记的所有缓存键以及标签本身。
+
+        代价只与标签下的键数有关，与键空间大小无关。
+
+        参数：
+            tag_keys: 标签集合的键
+
+        返回：
+            删除的键数量（含标签集合本身）
+        """
+        if not self.enabled or not tag_keys:
+            return 0
+
+        try:
+            pipe = self.redis_client.pipeline(transaction=False)
+            for tag_key in tag_keys:
+                pipe.smembers(tag_key)
+            members: set[Any] = set()
+            for result in pipe.execute():
+                members.update(result or ())
+            return self._unlink(list(members) + list(tag_keys))
+        except Exception as e:
+            logger.error(f"按标签失效缓存失败 (标签数: {len(tag_keys)}): {e}")
+            return 0
+
     def clear_pattern(self, pattern: str) -> int:
         """删除匹配模式的所有缓存。
-        
+
+        使用 SCAN 增量遍历并按批 UNLINK，不会像 KEYS 那样长时间阻塞 Redis。
+
         参数：
             pattern: 缓存键匹配模式
-            
+
         返回：
             删除的缓存数量
         """
         if not self.enabled:
             return 0
-        
+
+        deleted = 0
         try:
-            keys = self.redis_client.keys(pattern)
-            if not keys:
-                return 0
-            
-            return self.redis_client.delete(*keys)
+            batch: list[Any] = []
+            for key in self.redis_client.scan_iter(match=pattern, count=SCAN_BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= SCAN_BATCH_SIZE:
+                    deleted += self._unlink(batch)
+                    batch = []
+            if batch:
+                deleted += self._unlink(batch)
+            return deleted
         except Exception as e:
             logger.error(f"删除匹配模式的缓存失败 (模式: {pattern}): {e}")
-            return 0
+            return deleted
     
     def generate_etag(self, value: Any) -> str:
         """生成内容的ETag。
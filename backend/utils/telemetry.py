@@ -0,0 +1,188 @@
+"""轻量级请求追踪与指标工具。
+
+为一次请求分配 trace id，记录各步骤（LLM、工具、嵌入、SQL 等）的耗时与 token 用量，
+并在进程内聚合为 Prometheus 文本格式的指标。不依赖外部 APM，开销仅为几次计时与加锁。
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional
+
+# 延迟直方图的桶边界（毫秒）
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+
+@dataclass
+class Span:
+    name: str
+    duration_ms: float
+    attrs: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Trace:
+    """单次请求的追踪上下文。"""
+
+    trace_id: str
+    sampled: bool = False
+    started_at: float = field(default_factory=time.perf_counter)
+    spans: list[Span] = field(default_factory=list)
+    counters: dict[str, float] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add_span(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started_at) * 1000
+
+    def summary(self) -> dict[str, Any]:
+        """按步骤名汇总次数与耗时，用于请求结束时输出一行结构化日志。"""
+        with self._lock:
+            grouped: dict[str, dict[str, float]] = {}
+            for span in self.spans:
+                item = grouped.setdefault(span.name, {"count": 0, "total_ms": 0.0})
+                item["count"] += 1
+                item["total_ms"] = round(item["total_ms"] + span.duration_ms, 2)
+            return {
+                "trace_id": self.trace_id,
+                "total_ms": round(self.elapsed_ms(), 2),
+                "spans": grouped,
+                "counters": dict(self.counters),
+            }
+
+
+class MetricsRegistry:
+    """进程内指标聚合（计数器 + 延迟直方图），输出 Prometheus 文本格式。"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: dict[tuple[str, tuple[tuple[str, str], ...]], float] = {}
+        self._histograms: dict[tuple[str, tuple[tuple[str, str], ...]], list[float]] = {}
+
+    @staticmethod
+    def _key(name: str, labels: Optional[dict[str, str]]) -> tuple[str, tuple[tuple[str, str], ...]]:
+        return name, tuple(sorted((labels or {}).items()))
+
+    def incr(self, name: str, value: float = 1, labels: Optional[dict[str, str]] = None) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value_ms: float, labels: Optional[dict[str, str]] = None) -> None:
+        key = self._key(name, labels)
+        with self._lock:
+            # 结构：[各桶计数..., +Inf 计数, sum]
+            state = self._histograms.get(key)
+            if state is None:
+                state = [0.0] * (len(LATENCY_BUCKETS_MS) + 2)
+                self._histograms[key] = state
+            for idx, bound in enumerate(LATENCY_BUCKETS_MS):
+                if value_ms <= bound:
+                    state[idx] += 1
+            state[-2] += 1
+            state[-1] += value_ms
+
+    @staticmethod
+    def _format_labels(labels: tuple[tuple[str, str], ...], extra: str = "") -> str:
+        parts = [f'{k}="{v}"' for k, v in labels]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def render_prometheus(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                lines.append(f"{name}{self._format_labels(labels)} {value}")
+            for (name, labels), state in sorted(self._histograms.items()):
+                for idx, bound in enumerate(LATENCY_BUCKETS_MS):
+                    le = f'le="{bound}"'
+                    lines.append(f"{name}_bucket{self._format_labels(labels, le)} {state[idx]}")
+                le = 'le="+Inf"'
+                lines.append(f"{name}_bucket{self._format_labels(labels, le)} {state[-2]}")
+                lines.append(f"{name}_count{self._format_labels(labels)} {state[-2]}")
+                lines.append(f"{name}_sum{self._format_labels(labels)} {round(state[-1], 3)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+_current_trace: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("oap_trace", default=None)
+
+
+def start_trace(trace_id: str | None = None, sample_rate: float = 0.0) -> Trace:
+    """开始一次追踪并绑定到当前上下文。"""
+    trace = Trace(
+        trace_id=trace_id or uuid.uuid4().hex,
+        sampled=sample_rate > 0 and random.random() < sample_rate,
+    )
+    _current_trace.set(trace)
+    return trace
+
+
+def end_trace() -> Optional[Trace]:
+    """结束当前追踪并解除绑定，返回追踪对象。"""
+    trace = _current_trace.get()
+    _current_trace.set(None)
+    return trace
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def incr(name: str, value: float = 1, labels: Optional[dict[str, str]] = None) -> None:
+    """同时累加当前请求的计数与进程级指标。"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.incr(name, value)
+    metrics.incr(name, value, labels)
+
+
+@contextlib.contextmanager
+def span(name: str, **attrs: Any) -> Iterator[dict[str, Any]]:
+    """记录一个步骤的耗时。
+
+    产出的字典可在步骤内补充属性（如 token 数），会写入追踪与日志。
+    """
+    started = time.perf_counter()
+    extra: dict[str, Any] = dict(attrs)
+    status = "ok"
+    try:
+        yield extra
+    except Exception:
+        status = "error"
+        raise
+    finally:
+        duration_ms = (time.perf_counter() - started) * 1000
+        extra["status"] = status
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add_span(Span(name=name, duration_ms=duration_ms, attrs=extra))
+        metrics.observe("oap_span_duration_ms", duration_ms, {"span": name, "status": status})
+
+
+__all__ = [
+    "MetricsRegistry",
+    "Span",
+    "Trace",
+    "current_trace",
+    "end_trace",
+    "incr",
+    "metrics",
+    "span",
+    "start_trace",
+]
@@ -0,0 +1,245 @@
+"""向量索引管理。
+
+vectors.embedding 上的近似最近邻索引可选 HNSW 或 IVFFlat，构建参数来自配置：
+- 查询侧：每次检索前以 set_config(..., true)（等价于 SET LOCAL）设置 hnsw.ef_search /
+  ivfflat.probes，只作用于当前事务，不会污染池化连接；
+- 维护侧：rebuild_index() 按当前配置在线重建索引。分区表先在父表上建 ON ONLY 的空壳索引，
+  再逐个分区 CREATE INDEX CONCURRENTLY 并挂到父索引上，最后替换旧索引，全程不阻塞写入。
+
+VECTOR_QUANTIZATION 为 halfvec / binary 时，索引建在表达式 embedding::halfvec(n) 或
+binary_quantize(embedding)::bit(n) 上，表中仍保留原始精度的向量：检索先按量化距离多取一批候选，
+再用原始向量精确重排。1024 维时每条索引项约 2 KB（halfvec）或 128 字节（binary），原始为 4 KB。
+
+IVFFlat 的聚类中心在建索引时按已有数据训练，新月份的分区建在空表上，需要定期重建；
+默认的 HNSW 没有这个问题。
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Any, Callable, Optional
+
+import psycopg
+
+from backend.config import Config
+from backend.db import get_connection
+from backend.queries import Query, hot_query
+
+
+INDEX_NAMES = {
+    "hnsw": "idx_vectors_embedding_hnsw",
+    "ivfflat": "idx_vectors_embedding_ivfflat",
+}
+REBUILD_SUFFIX = "_rebuild"
+# 量化表示需要的最低 pgvector 版本（halfvec 与 binary_quantize 均自 0.7.0 引入）
+QUANTIZATION_MIN_VERSION = (0, 7, 0)
+
+VECTOR_SEARCH_SETTING = hot_query("vector.search_setting", "SELECT set_config(%s, %s, true)")
+
+
+def index_name(index_type: str, quantization: str = "none") -> str:
+    name = INDEX_NAMES[index_type]
+    return name if quantization == "none" else f"{name}_{quantization}"
+
+
+def index_key(cfg: Config, column: str = "embedding") -> tuple[str, str]:
+    """索引键表达式与操作符类。"""
+    dim = cfg.embed_dim
+    if cfg.vector_quantization == "halfvec":
+        return f"({column}::halfvec({dim}))", "halfvec_cosine_ops"
+    if cfg.vector_quantization == "binary":
+        return f"(binary_quantize({column})::bit({dim}))", "bit_hamming_ops"
+    return column, "vector_cosine_ops"
+
+
+def ann_distance(cfg: Config, column: str, query: str) -> str:
+    """与索引键一致的距离表达式，用于 ORDER BY 以命中索引；query 为 SQL 中的参数占位。"""
+    dim = cfg.embed_dim
+    if cfg.vector_quantization == "halfvec":
+        return f"{column}::halfvec({dim}) <=> {query}::halfvec({dim})"
+    if cfg.vector_quantization == "binary":
+        return f"binary_quantize({column})::bit({dim}) <~> binary_quantize({query}::vector)"
+    return f"{column} <=> {query}::vector"
+
+
+def approx_limit(candidate_limit: int, cfg: Config) -> int:
+    """近似检索阶段取回的条数：量化时按 VECTOR_RESCORE_FACTOR 放大，留给精排挑选。"""
+    if cfg.vector_quantization == "none":
+        return candidate_limit
+    return candidate_limit * cfg.vector_rescore_factor
+
+
+def check_quantization_support(conn: psycopg.Connection, cfg: Config) -> Optional[str]:
+    """配置了量化但 pgvector 版本不支持时返回问题描述。"""
+    if cfg.vector_quantization == "none":
+        return None
+    with conn.cursor() as cur:
+        cur.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+        row = cur.fetchone()
+    version = row["extversion"] if row else "0"
+    parts = tuple(int(part) for part in version.split(".") if part.isdigit())
+    if parts < QUANTIZATION_MIN_VERSION:
+        return f"VECTOR_QUANTIZATION={cfg.vector_quantization} 需要 pgvector >= 0.7.0，当前为 {version}"
+    return None
+
+
+def ivfflat_lists(rows: int) -> int:
+    """pgvector 推荐的聚类数：百万行以内取 行数/1000，以上取 sqrt(行数)。"""
+    if rows <= 1_000_000:
+        return max(rows // 1000, 1)
+    return int(math.sqrt(rows))
+
+
+def index_using(cfg: Config, rows: int = 0) -> str:
+    """CREATE INDEX 中 USING 之后的部分（访问方法、操作符类与构建参数）。"""
+    key, opclass = index_key(cfg)
+    if cfg.vector_index_type == "ivfflat":
+        lists = cfg.vector_index_ivfflat_lists or ivfflat_lists(rows)
+        return f"USING ivfflat ({key} {opclass}) WITH (lists = {lists})"
+    return (
+        f"USING hnsw ({key} {opclass}) "
+        f"WITH (m = {cfg.vector_index_hnsw_m}, ef_construction = {cfg.vector_index_hnsw_ef_construction})"
+    )
+
+
+def search_setting(candidate_limit: int, cfg: Config) -> tuple[str, str]:
+    """本次检索的 (参数名, 取值)。
+
+    HNSW 每个索引扫描最多返回 ef_search 个结果，因此取 候选数 × 系数，并限制在配置的
+    下限与上限之间：候选多的请求多付一点延迟换召回，其余请求保持下限的低延迟。
+    """
+    if cfg.vector_index_type == "ivfflat":
+        return "ivfflat.probes", str(cfg.vector_search_probes)
+    floor = cfg.vector_search_ef_search
+    ceiling = max(cfg.vector_search_ef_search_max, floor)
+    ef_search = min(max(math.ceil(candidate_limit * cfg.vector_search_ef_factor), floor), ceiling)
+    return "hnsw.ef_search", str(ef_search)
+
+
+def search_setting_query(candidate_limit: int, cfg: Config) -> tuple[Query, tuple[str, str]]:
+    """与检索语句放在同一事务（可同一 pipeline）中执行的 set_config 语句及参数。"""
+    return VECTOR_SEARCH_SETTING, search_setting(approx_limit(candidate_limit, cfg), cfg)
+
+
+def _relkind(cur: psycopg.Cursor, table: str) -> Optional[str]:
+    cur.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+    row = cur.fetchone()
+    return row["relkind"] if row else None
+
+
+def _partitions(cur: psycopg.Cursor) -> list[dict[str, Any]]:
+    cur.execute(
+        """
+        SELECT c.relname AS name, GREATEST(c.reltuples, 0)::bigint AS rows
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'vectors'::regclass
+        ORDER BY c.relname
+        """
+    )
+    return cur.fetchall()
+
+
+def index_status(conn: psycopg.Connection) -> list[dict[str, Any]]:
+    """vectors 上现有的向量索引：名称、定义、是否有效，以及分区上有效本地索引的数量。"""
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            SELECT c.relname AS name,
+                   pg_get_indexdef(c.oid) AS definition,
+                   i.indisvalid AS valid,
+                   (SELECT count(*)
+                    FROM pg_inherits ii
+                    JOIN pg_index pi ON pi.indexrelid = ii.inhrelid
+                    WHERE ii.inhparent = c.oid AND pi.indisvalid) AS valid_partitions,
+                   (SELECT count(*) FROM pg_inherits t WHERE t.inhparent = 'vectors'::regclass) AS partitions,
+                   pg_total_relation_size(c.oid)
+                     + COALESCE((SELECT sum(pg_total_relation_size(ii.inhrelid))
+                                 FROM pg_inherits ii WHERE ii.inhparent = c.oid), 0) AS bytes
+            FROM pg_index i
+            JOIN pg_class c ON c.oid = i.indexrelid
+            JOIN pg_am am ON am.oid = c.relam
+            WHERE i.indrelid = 'vectors'::regclass AND am.amname IN ('hnsw', 'ivfflat')
+            ORDER BY c.relname
+            """
+        )
+        return cur.fetchall()
+
+
+def rebuild_index(
+    cfg: Optional[Config] = None,
+    maintenance_work_mem: Optional[str] = None,
+    log: Callable[[str], None] = print,
+) -> str:
+    """按当前配置在线重建向量索引，返回新索引名。
+
+    新索引先以临时名建好，再删除旧索引（包括另一种类型的索引）并改回正式名；
+    中断后重新执行会清理上次残留的临时索引。
+    """
+    cfg = cfg or Config()
+    final = index_name(cfg.vector_index_type, cfg.vector_quantization)
+    suffix = final[len("idx_vectors"):]
+    with get_connection() as conn:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            if maintenance_work_mem:
+                cur.execute("SELECT set_config('maintenance_work_mem', %s, false)", (maintenance_work_mem,))
+            kind = _relkind(cur, "vectors")
+            if kind is None:
+                raise RuntimeError("vectors 表不存在，请先运行 scripts/migrate.py")
+            problem = check_quantization_support(conn, cfg)
+            if problem:
+                raise RuntimeError(problem)
+            existing = {row["name"] for row in index_status(conn)}
+            build = final + REBUILD_SUFFIX if final in existing else final
+            if build != final:
+                cur.execute(f'DROP INDEX IF EXISTS "{build}"')
+
+            if kind == "p":
+                partitions = _partitions(cur)
+                rows = max((part["rows"] for part in partitions), default=0)
+                using = index_using(cfg, rows)
+                cur.execute(f'CREATE INDEX "{build}" ON ONLY vectors {using}')
+                for part in partitions:
+                    child = f"{part['name']}{suffix}{REBUILD_SUFFIX if build != final else ''}"
+                    cur.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{child}"')
+                    cur.execute(f'CREATE INDEX CONCURRENTLY "{child}" ON "{part["name"]}" {using}')
+                    cur.execute(f'ALTER INDEX "{build}" ATTACH PARTITION "{child}"')
+                    log(f"  {part['name']}: {child}")
+            else:
+                cur.execute("SELECT count(*) AS rows FROM vectors")
+                using = index_using(cfg, cur.fetchone()["rows"])
+                cur.execute(f'CREATE INDEX CONCURRENTLY "{build}" ON vectors {using}')
+            log(f"已建立 {build}: {using}")
+
+            # 分区索引不支持 DROP INDEX CONCURRENTLY；删除只修改目录，锁持有时间很短
+            for old in sorted(existing):
+                if old != build:
+                    concurrently = "" if kind == "p" else "CONCURRENTLY "
+                    cur.execute(f'DROP INDEX {concurrently}IF EXISTS "{old}"')
+                    log(f"已删除旧索引 {old}")
+            if build != final:
+                cur.execute(f'ALTER INDEX "{build}" RENAME TO "{final}"')
+                if kind == "p":
+                    for part in _partitions(cur):
+                        cur.execute(
+                            f'ALTER INDEX IF EXISTS "{part["name"]}{suffix}{REBUILD_SUFFIX}" '
+                            f'RENAME TO "{part["name"]}{suffix}"'
+                        )
+    return final
+
+
+__all__ = [
+    "INDEX_NAMES",
+    "ann_distance",
+    "approx_limit",
+    "check_quantization_support",
+    "index_key",
+    "index_name",
+    "index_status",
+    "index_using",
+    "ivfflat_lists",
+    "rebuild_index",
+    "search_setting",
+    "search_setting_query",
+]
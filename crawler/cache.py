@@ -1,16 +1,66 @@
 from __future__ import annotations
 
 import logging
+import threading
+import uuid
+from typing import Callable
 
 import redis
 import json
 
-from datetime import datetime, date, timedelta
+from datetime import datetime, date
 
-from crawler.config import Config
+from crawler.config import get_config
 
 
 DEFAULT_CACHE_DAYS = 3
+TODAY_TTL_SECONDS = 86400
+
+# 与 backend/routes/articles.py 保持一致：缓存键嵌入代数，整体失效只需 INCR
+ARTICLES_GEN_KEY = "articles:gen"
+TAG_TTL_SECONDS = DEFAULT_CACHE_DAYS * 86400
+
+# 文章边界与计数（min_id/max_id/oldest_date/newest_date/total/day:{date}），不随代数变化
+ARTICLES_STATS_KEY = "articles:stats"
+
+# today 快照交换：只有日期更新或同日修订号更大的候选才会 RENAME 覆盖快照，
+# 否则丢弃临时键，保证读者看到的列表不会回退
+TODAY_SWAP_SCRIPT = """
+local meta = redis.call('GET', KEYS[3])
+if meta and redis.call('EXISTS', KEYS[2]) == 1 then
+  local sep = string.find(meta, '|', 1, true)
+  local current_date = string.sub(meta, 1, sep - 1)
+  local current_rev = tonumber(string.sub(meta, sep + 1))
+  if current_date > ARGV[1] or (current_date == ARGV[1] and current_rev >= tonumber(ARGV[2])) then
+    redis.call('DEL', KEYS[1])
+    return 0
+  end
+end
+redis.call('RENAME', KEYS[1], KEYS[2])
+redis.call('SET', KEYS[3], ARGV[1] .. '|' .. ARGV[2], 'EX', tonumber(ARGV[3]))
+return 1
+"""
+
+# 爬虫进程内共享的 Redis 客户端（底层为连接池）
+_client: redis.Redis | None = None
+_client_lock = threading.Lock()
+
+
+def _generation(client: redis.Redis) -> int:
+    value = client.get(ARTICLES_GEN_KEY)
+    return int(value) if value is not None else 0
+
+
+def _cache_key(generation: int, kind: str, *parts) -> str:
+    suffix = ":".join(str(part) for part in parts)
+    return f"articles:v{generation}:{kind}:{suffix}" if suffix else f"articles:v{generation}:{kind}"
+
+
+def _tag_entry(pipe, generation: int, article_id, cache_key: str) -> None:
+    """把缓存键登记到文章的标签集合，供按文章精确失效。"""
+    tag_key = _cache_key(generation, "tag", article_id)
+    pipe.sadd(tag_key, cache_key)
+    pipe.expire(tag_key, TAG_TTL_SECONDS)
 
 
 def _serialize_value(value):
@@ -27,202 +77,309 @@ def _serialize_row(row: dict) -> dict:
     return {key: _serialize_value(val) for key, val in row.items()}
 
 
-def _build_redis_client(cfg: Config) -> redis.Redis:
-    return redis.Redis(
-        host=cfg.redis_host,
-        port=cfg.redis_port,
-        db=cfg.redis_db,
-        password=cfg.redis_password,
-        socket_timeout=3,
-        decode_responses=True,
-    )
-
-
-def refresh_today_cache(
-    articles: list[dict],
-    target_date: str,
-    logger: logging.Logger | None = None,
-) -> int:
-    """刷新当天文章缓存（首页专用）。
-
-    缓存键: articles:today
-    TTL: 86400 秒（24 小时）- crawler 覆盖写入会重置 TTL
-
-    Args:
-        articles: 文章列表（当天所有文章）
-        target_date: 目标日期（用于日志）
-        logger: 日志记录器
+def get_redis_client() -> redis.Redis | None:
+    """获取爬虫共享的 Redis 客户端，未配置 REDIS_HOST 时返回 None。
 
-    Returns:
-        成功写入返回 1，失败返回 0
+    客户端在首次调用时创建，之后所有缓存刷新复用同一个连接池。
     """
-    cfg = Config()
-    log = logger or logging.getLogger(__name__)
-
+    global _client
+    cfg = get_config()
     if not cfg.redis_host:
-        return 0
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                pool = redis.ConnectionPool(
+                    host=cfg.redis_host,
+                    port=cfg.redis_port,
+                    db=cfg.redis_db,
+                    password=cfg.redis_password,
+                    socket_timeout=3,
+                    decode_responses=True,
+                    max_connections=4,
+                )
+                _client = redis.Redis(connection_pool=pool)
+    return _client
+
 
-    client = _build_redis_client(cfg)
+def _today_index_key(generation: int, target_date: str) -> str:
+    return _cache_key(generation, "today", "ids", target_date)
 
-    # 写入 articles:today（包含完整响应结构，所有文章）
-    serialized = [_serialize_row(item) for item in articles]
 
-    # 计算 next_before_id 和 has_more
-    next_before_id = None
-    has_more = False
+def _today_rev_key(generation: int, target_date: str) -> str:
+    return _cache_key(generation, "today", "rev", target_date)
 
-    if serialized:
-        # 最后一个元素的 id 作为 next_before_id
-        next_before_id = serialized[-1].get("id")
 
+def _queue_today_index(pipe, generation: int, target_date: str, serialized: list[dict]) -> int:
+    """在管道中把文章登记到 today 有序集合（score = id）与逐篇哈希，返回写入条数。
+
+    新增一篇文章只需一次 ZADD 与一次 HSET，不重写整个列表；修订号随之递增，
+    供快照交换判断新旧。
+    """
+    index_key = _today_index_key(generation, target_date)
+    written = 0
+    for item in serialized:
+        article_id = item.get("id")
+        if article_id is None:
+            continue
+        item_key = _cache_key(generation, "item", article_id)
+        pipe.zadd(index_key, {str(article_id): article_id})
+        pipe.hset(
+            item_key,
+            mapping={k: json.dumps(v, ensure_ascii=False) for k, v in item.items() if k != "content"},
+        )
+        pipe.expire(item_key, TAG_TTL_SECONDS)
+        _tag_entry(pipe, generation, article_id, item_key)
+        written += 1
+    if written:
+        pipe.expire(index_key, TODAY_TTL_SECONDS)
+        rev_key = _today_rev_key(generation, target_date)
+        pipe.incr(rev_key)
+        pipe.expire(rev_key, TODAY_TTL_SECONDS)
+    return written
+
+
+def _rebuild_today_snapshot(client: redis.Redis, generation: int, target_date: str) -> int | None:
+    """由有序集合与逐篇哈希物化 articles:v{n}:today 快照。
+
+    快照先写入临时键，再由 TODAY_SWAP_SCRIPT 原子地 RENAME 覆盖；读者要么看到旧快照，
+    要么看到完整的新快照。返回 next_before_id；快照较新而未交换时返回 None。
+    """
+    index_key = _today_index_key(generation, target_date)
+    pipe = client.pipeline(transaction=True)
+    pipe.get(_today_rev_key(generation, target_date))
+    pipe.zrevrange(index_key, 0, -1)
+    pipe.hmget(ARTICLES_STATS_KEY, ["oldest_date", "total"])
+    rev, ids, (oldest_date, total) = pipe.execute()
+
+    pipe = client.pipeline(transaction=False)
+    for article_id in ids:
+        pipe.hgetall(_cache_key(generation, "item", article_id))
+    articles: list[dict] = []
+    missing: list[str] = []
+    for article_id, fields in zip(ids, pipe.execute()):
+        if not fields:
+            # 单篇失效会删除逐篇哈希，顺带从有序集合移除
+            missing.append(article_id)
+            continue
+        articles.append({k: json.loads(v) for k, v in fields.items()})
+    if missing:
+        client.zrem(index_key, *missing)
+
+    next_before_id = articles[-1].get("id") if articles else None
     payload = {
-        "articles": [{k: v for k, v in item.items() if k != "content"} for item in serialized],
+        "articles": articles,
         "next_before_id": next_before_id,
-        "has_more": has_more,  # crawler 无法判断是否有更早文章，由 backend 查询时确定
+        # 由 articles:stats 判断是否存在更早的文章；统计缺失时保守返回 False
+        "has_more": bool(oldest_date) and oldest_date < target_date,
+        "total": int(total) if total is not None else None,
     }
+    today_key = _cache_key(generation, "today")
+    temp_key = f"{today_key}:tmp:{uuid.uuid4().hex}"
+    pipe = client.pipeline(transaction=True)
+    pipe.setex(temp_key, TODAY_TTL_SECONDS, json.dumps(payload, ensure_ascii=False))
+    for item in articles:
+        _tag_entry(pipe, generation, item["id"], today_key)
+    pipe.execute()
+
+    swapped = client.eval(
+        TODAY_SWAP_SCRIPT,
+        3,
+        temp_key,
+        today_key,
+        _cache_key(generation, "today", "meta"),
+        target_date,
+        int(rev or 0),
+        TODAY_TTL_SECONDS,
+    )
+    return next_before_id if swapped else None
 
-    try:
-        client.setex("articles:today", 86400, json.dumps(payload, ensure_ascii=False))
-        log.info(
-            "刷新 today 缓存成功",
-            extra={"date": target_date, "count": len(articles), "next_before_id": next_before_id},
-        )
-        return 1
-    except Exception as exc:
-        log.warning(
-            "刷新 today 缓存失败: %s" % exc,
-            extra={"date": target_date},
-        )
-        return 0
 
+def _queue_details(pipe, generation: int, serialized: list[dict], ttl_seconds: int) -> int:
+    """在管道中写入 articles:v{n}:detail:{id}，返回排队写入的条数。"""
+    queued = 0
+    for article in serialized:
+        article_id = article.get("id")
+        if article_id is None:
+            continue
+        detail_key = _cache_key(generation, "detail", article_id)
+        pipe.setex(detail_key, ttl_seconds, json.dumps(article, ensure_ascii=False))
+        _tag_entry(pipe, generation, article_id, detail_key)
+        queued += 1
+    return queued
 
-def refresh_article_detail_cache(
-    articles: list[dict],
+
+def _stamp(row: dict) -> str:
+    """文章版本戳：updated_at 的 ISO 字符串（缺失时退回 created_at）。"""
+    value = row.get("updated_at") or row.get("created_at")
+    return _serialize_value(value) if value is not None else ""
+
+
+def refresh_article_cache_incremental(
+    versions: list[dict],
+    load_listing: Callable[[list[int]], list[dict]],
+    load_details: Callable[[list[int]], list[dict]],
     target_date: str,
     logger: logging.Logger | None = None,
     days: int = DEFAULT_CACHE_DAYS,
-) -> int:
-    """刷新文章详情缓存。
+) -> tuple[int, int, int]:
+    """增量刷新 today 列表与文章详情缓存。
 
-    为每篇文章生成 articles:detail:{id} 缓存。
+    articles:v{n}:stamps:{date} 哈希记录每篇已缓存详情的 updated_at；只有新增、
+    updated_at 变化或详情键已丢失的文章才通过 load_details 读取正文并重写，
+    其余详情键只在同一个 MULTI/EXEC 中 EXPIRE 续期；today 索引也只为变化或缺失的文章
+    通过 load_listing 读取列表项重新登记。单次爬取写入 Redis 与读取 Postgres 的量随新增
+    文章数增长，而不是随当天文章总数增长。
 
     Args:
-        articles: 文章列表
-        target_date: 目标日期（用于日志）
+        versions: 当天文章的 id / created_at / updated_at（仅索引扫描即可取得）
+        load_listing: 按 ID 列表读取不含 content 的文章列表项
+        load_details: 按 ID 列表读取含 content 的文章详情
+        target_date: 目标日期
         logger: 日志记录器
-        days: 缓存天数（默认 3 天）
+        days: 详情缓存天数（默认 3 天）
 
     Returns:
-        成功写入的缓存数量
+        (today 快照是否重建 1/0, 重写的详情数量, 续期的详情数量)
     """
-    cfg = Config()
     log = logger or logging.getLogger(__name__)
+    client = get_redis_client()
+    if client is None:
+        return 0, 0, 0
 
-    if not cfg.redis_host:
-        return 0
-
-    client = _build_redis_client(cfg)
     ttl_seconds = max(days, 1) * 86400
-
-    serialized = [_serialize_row(item) for item in articles]
-    updated = 0
-
     try:
-        pipe = client.pipeline()
-        for article in serialized:
-            article_id = article.get("id")
-            if article_id is None:
-                continue
-            detail_key = f"articles:detail:{article_id}"
-            pipe.setex(
-                detail_key,
-                ttl_seconds,
-                json.dumps(article, ensure_ascii=False),
-            )
+        generation = _generation(client)
+        stamps_key = _cache_key(generation, "stamps", target_date)
+        ids = [row["id"] for row in versions if row.get("id") is not None]
+
+        # 一次往返读取版本戳、today 快照与索引，以及详情键、逐篇哈希是否仍存在
+        pipe = client.pipeline(transaction=False)
+        pipe.hgetall(stamps_key)
+        pipe.exists(_cache_key(generation, "today"))
+        pipe.exists(_today_index_key(generation, target_date))
+        for article_id in ids:
+            pipe.exists(_cache_key(generation, "detail", article_id))
+            pipe.exists(_cache_key(generation, "item", article_id))
         results = pipe.execute()
-        updated = sum(1 for result in results if result)
+        cached_stamps = results[0] or {}
+        snapshot_present, index_present = results[1], results[2]
+        present = dict(zip(ids, results[3::2]))
+        indexed = dict(zip(ids, results[4::2]))
+
+        stamps = {row["id"]: _stamp(row) for row in versions if row.get("id") is not None}
+        changed = [
+            article_id
+            for article_id in ids
+            if not present.get(article_id) or cached_stamps.get(str(article_id)) != stamps[article_id]
+        ]
+        changed_set = set(changed)
+        unchanged = [article_id for article_id in ids if article_id not in changed_set]
+
+        reindex_ids = [
+            article_id
+            for article_id in ids
+            if not index_present or not indexed.get(article_id) or article_id in changed_set
+        ]
+        reindex = [_serialize_row(row) for row in load_listing(reindex_ids)] if reindex_ids else []
+
+        details = [_serialize_row(item) for item in load_details(changed)] if changed else []
+
+        pipe = client.pipeline(transaction=True)
+        _queue_today_index(pipe, generation, target_date, reindex)
+        rewritten = _queue_details(pipe, generation, details, ttl_seconds)
+        for article_id in unchanged:
+            pipe.expire(_cache_key(generation, "detail", article_id), ttl_seconds)
+        written_stamps = {str(item["id"]): stamps[item["id"]] for item in details if item.get("id") in stamps}
+        if written_stamps:
+            pipe.hset(stamps_key, mapping=written_stamps)
+        if ids:
+            pipe.expire(stamps_key, ttl_seconds)
+        pipe.execute()
+
+        # 索引无变化且快照仍在时无需重建快照
+        today_refreshed = 0
+        next_before_id = None
+        if reindex or not snapshot_present:
+            next_before_id = _rebuild_today_snapshot(client, generation, target_date)
+            today_refreshed = 1 if next_before_id is not None else 0
         log.info(
-            "刷新 article detail 缓存成功",
-            extra={"date": target_date, "updated": updated},
+            "增量刷新文章缓存成功",
+            extra={
+                "date": target_date,
+                "count": len(versions),
+                "indexed": len(reindex),
+                "rewritten": rewritten,
+                "extended": len(unchanged),
+                "next_before_id": next_before_id,
+            },
         )
+        return today_refreshed, rewritten, len(unchanged)
     except Exception as exc:
         log.warning(
-            "刷新 article detail 缓存失败: %s" % exc,
-            extra={"date": target_date, "error": str(exc)},
+            "增量刷新文章缓存失败: %s" % exc,
+            extra={"date": target_date},
         )
-    return updated
+        return 0, 0, 0
 
 
-def clear_article_list_cache(target_date: str, logger: logging.Logger | None = None) -> int:
-    """清除指定日期的文章列表缓存（旧版兼容，实际清除 articles:list:*）。
+def write_article_stats(
+    stats: dict,
+    target_date: str,
+    logger: logging.Logger | None = None,
+) -> int:
+    """把 article_stats 汇总写入 articles:stats 哈希，供 backend 直接回答 has_more / total。
 
     Args:
-        target_date: 目标日期
+        stats: refresh_article_stats 返回的汇总
+        target_date: 目标日期（写入 day:{date} 计数）
         logger: 日志记录器
 
     Returns:
-        删除的缓存键数量
+        成功写入返回 1，失败返回 0
     """
-    cfg = Config()
     log = logger or logging.getLogger(__name__)
-
-    if not cfg.redis_host:
+    client = get_redis_client()
+    if client is None:
         return 0
 
-    client = _build_redis_client(cfg)
-
-    pattern = f"articles:list:{target_date}:*"
-    deleted = 0
+    mapping = {
+        field: str(_serialize_value(stats[field]))
+        for field in ("min_id", "max_id", "oldest_date", "newest_date", "total")
+        if stats.get(field) is not None
+    }
+    mapping[f"day:{target_date}"] = str(stats.get("day_count") or 0)
     try:
-        keys = list(client.scan_iter(match=pattern))
-        if keys:
-            deleted = client.delete(*keys)
-            log.info("redis cache cleared", extra={"pattern": pattern, "deleted": deleted})
-        deleted += clear_outdated_list_cache(client, days=DEFAULT_CACHE_DAYS, logger=log)
+        client.hset(ARTICLES_STATS_KEY, mapping=mapping)
+        log.info("写入文章统计成功", extra={"date": target_date, **mapping})
+        return 1
     except Exception as exc:
-        log.warning("redis cache clear failed", extra={"pattern": pattern, "error": str(exc)})
-    return deleted
+        log.warning("写入文章统计失败: %s" % exc, extra={"date": target_date})
+        return 0
 
 
-def clear_outdated_list_cache(
-    client: redis.Redis,
-    days: int,
-    logger: logging.Logger | None = None,
-) -> int:
-    """清除过期的文章列表缓存（旧版兼容）。
+def clear_article_list_cache(target_date: str, logger: logging.Logger | None = None) -> int:
+    """整体失效文章缓存（today/page/detail）。
+
+    递增 articles:gen 代数，旧代的键不再被读取，由 TTL 自然过期；
+    代价为一次 INCR，与缓存键数量无关。
 
     Args:
-        client: Redis 客户端
-        days: 保留天数
+        target_date: 目标日期（用于日志）
         logger: 日志记录器
 
     Returns:
-        删除的缓存键数量
+        新的代数，失败返回 -1
     """
     log = logger or logging.getLogger(__name__)
-    if days <= 0:
-        return 0
+    client = get_redis_client()
+    if client is None:
+        return -1
 
-    cutoff = datetime.now().date() - timedelta(days=days - 1)
-    deleted = 0
     try:
-        for key in client.scan_iter(match="articles:list:*"):
-            parts = key.split(":")
-            if len(parts) < 3:
-                continue
-            date_str = parts[2]
-            try:
-                date_value = datetime.strptime(date_str, "%Y-%m-%d").date()
-            except ValueError:
-                continue
-            if date_value < cutoff:
-                if client.delete(key):
-                    deleted += 1
-        if deleted:
-            log.info(
-                "redis cache cleanup complete",
-                extra={"deleted": deleted, "cutoff": cutoff.isoformat()},
-            )
+        generation = int(client.incr(ARTICLES_GEN_KEY))
+        log.info("redis cache generation bumped", extra={"date": target_date, "generation": generation})
+        return generation
     except Exception as exc:
-        log.warning("redis cache cleanup failed", extra={"error": str(exc)})
-    return deleted
+        log.warning("redis cache invalidation failed", extra={"date": target_date, "error": str(exc)})
+        return -1
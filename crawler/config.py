@@ -7,6 +7,7 @@
 from __future__ import annotations
 
 import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
@@ -273,4 +274,10 @@ class Config:
             self.redis_password = value or None
 
 
-__all__ = ["Config"]  # 此模块的公共API
+@lru_cache(maxsize=1)
+def get_config() -> Config:
+    """返回进程内共享的配置实例（env 文件只读取一次）。"""
+    return Config()
+
+
+__all__ = ["Config", "get_config"]  # 此模块的公共API
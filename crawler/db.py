@@ -19,7 +19,7 @@ import psycopg
 from psycopg.rows import dict_row
 from psycopg.types.json import Json
 
-from crawler.config import Config
+from crawler.config import get_config
 from crawler.models import ArticleRecord
 
 
@@ -32,13 +32,43 @@ def get_connection() -> psycopg.Connection:
     异常：
         RuntimeError: 当 DATABASE_URL 未配置时抛出
     """
-    cfg = Config()
+    cfg = get_config()
     if not cfg.database_url:
         raise RuntimeError("DATABASE_URL 未配置，无法连接数据库")
     # 添加连接超时设置（5秒）
     return psycopg.connect(cfg.database_url, row_factory=dict_row, connect_timeout=5)
 
 
+def schema_is_managed(conn: psycopg.Connection) -> bool:
+    """数据库结构是否已由 backend 的版本化迁移管理（存在 schema_version 表）。
+
+    已管理时爬虫无需每次运行都执行 CREATE 语句，只做这一次只读查询。
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('schema_version') IS NOT NULL AS present")
+        row = cur.fetchone()
+    conn.commit()
+    return bool(row and row["present"])
+
+
+def ensure_partitions(conn: psycopg.Connection, target_date: str) -> int:
+    """确保目标日期所在月份的 articles / vectors 分区存在，返回新建的分区数。
+
+    仅在 backend 迁移已把表改为分区表时生效（存在 ensure_article_partitions 函数），
+    分区已存在时只是一次只读调用。
+    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regprocedure('ensure_article_partitions(date, date)') IS NOT NULL AS present")
+        row = cur.fetchone()
+        if not row or not row["present"]:
+            conn.commit()
+            return 0
+        cur.execute("SELECT ensure_article_partitions(%s, %s) AS created", (target_date, target_date))
+        row = cur.fetchone()
+    conn.commit()
+    return int(row["created"]) if row else 0
+
+
 def init_db(conn: psycopg.Connection) -> None:
     """初始化数据库表结构（如果不存在）。
     
@@ -46,11 +76,12 @@ def init_db(conn: psycopg.Connection) -> None:
     - vector 扩展：用于存储和查询向量
     - articles 表：存储文章信息
     - vectors 表：存储文章向量（仅当日文章）
+    - article_stats 表：每日文章数与 ID 边界
     
     参数：
         conn: 数据库连接对象
     """
-    dim = Config().embed_dim  # 获取配置的向量维度
+    dim = get_config().embed_dim  # 获取配置的向量维度
     statements = [
         "CREATE EXTENSION IF NOT EXISTS vector;",  # 创建向量扩展
         """
@@ -80,6 +111,16 @@ def init_db(conn: psycopg.Connection) -> None:
         """,
         "CREATE INDEX IF NOT EXISTS idx_vectors_published_on ON vectors (published_on);",  #-- 发布日期索引
         "CREATE UNIQUE INDEX IF NOT EXISTS idx_vectors_article ON vectors(article_id);",  #-- 文章ID唯一索引
+        "CREATE INDEX IF NOT EXISTS idx_vectors_embedding_hnsw ON vectors USING hnsw (embedding vector_cosine_ops);",  #-- 向量近邻索引
+        """
+        CREATE TABLE IF NOT EXISTS article_stats (
+            published_on DATE PRIMARY KEY,         -- 发布日期
+            article_count INT NOT NULL DEFAULT 0,  -- 当天文章数
+            min_id BIGINT,                         -- 当天最小文章ID
+            max_id BIGINT,                         -- 当天最大文章ID
+            updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        );
+        """,
     ]
     
     with conn.cursor() as cur:
@@ -106,7 +147,11 @@ def fetch_existing_links(conn: psycopg.Connection, target_date: str) -> set[str]
 
 
 def insert_articles(conn: psycopg.Connection, records: Iterable[ArticleRecord]) -> int:
-    """批量插入文章记录，已存在的链接会被忽略（基于UNIQUE约束）。
+    """批量插入文章记录，已存在的链接会被忽略。
+    
+    分区表上的唯一约束只能是 (link, published_on)，因此存在 article_links 登记表时
+    先在登记表中按链接领取文章 id，链接已登记（改期重发或跨日重爬）时整条跳过；
+    未分区的旧表结构仍依靠 link 的 UNIQUE 约束去重。
     
     参数：
         conn: 数据库连接对象
@@ -115,26 +160,42 @@ def insert_articles(conn: psycopg.Connection, records: Iterable[ArticleRecord])
     返回：
         int: 成功插入的记录数
     """
-    sql = """
-    INSERT INTO articles (title, unit, link, published_on, content, summary, attachments)
-    VALUES (%s, %s, %s, %s, %s, %s, %s)
-    ON CONFLICT (link) DO NOTHING  -- 链接冲突时忽略
-    """
+    with conn.cursor() as cur:
+        cur.execute("SELECT to_regclass('article_links') IS NOT NULL AS present")
+        row = cur.fetchone()
+    if row and row["present"]:
+        sql = """
+        WITH claimed AS (
+            INSERT INTO article_links (link, article_id, published_on)
+            VALUES (%(link)s, nextval('articles_id_seq'), %(published_on)s)
+            ON CONFLICT (link) DO NOTHING  -- 链接已登记时跳过
+            RETURNING article_id, published_on
+        )
+        INSERT INTO articles (id, title, unit, link, published_on, content, summary, attachments)
+        SELECT article_id, %(title)s, %(unit)s, %(link)s, published_on, %(content)s, %(summary)s, %(attachments)s
+        FROM claimed
+        """
+    else:
+        sql = """
+        INSERT INTO articles (title, unit, link, published_on, content, summary, attachments)
+        VALUES (%(title)s, %(unit)s, %(link)s, %(published_on)s, %(content)s, %(summary)s, %(attachments)s)
+        ON CONFLICT DO NOTHING  -- 链接冲突时忽略（基于UNIQUE约束）
+        """
     
     count = 0
     with conn.cursor() as cur:
         for rec in records:
             cur.execute(
                 sql,
-                (
-                    rec.title,          # 文章标题
-                    rec.unit,           # 发布单位
-                    rec.link,           # 文章链接
-                    rec.published_on,   # 发布日期
-                    rec.content,        # 文章内容
-                    rec.summary,        # 文章摘要
-                    Json(rec.attachments),  # 附件信息（转换为JSONB）
-                ),
+                {
+                    "title": rec.title,                    # 文章标题
+                    "unit": rec.unit,                      # 发布单位
+                    "link": rec.link,                      # 文章链接
+                    "published_on": rec.published_on,      # 发布日期
+                    "content": rec.content,                # 文章内容
+                    "summary": rec.summary,                # 文章摘要
+                    "attachments": Json(rec.attachments),  # 附件信息（转换为JSONB）
+                },
             )
             count += cur.rowcount  # 累加受影响的行数
     
@@ -163,13 +224,16 @@ def fetch_article_ids(conn: psycopg.Connection, links: list[str]) -> list[dict[s
     return list(rows)
 
 
-def fetch_articles_by_date(conn: psycopg.Connection, target_date: str) -> list[dict[str, Any]]:
-    """获取指定日期的完整文章信息（用于缓存预热）。"""
+def fetch_article_versions_by_date(conn: psycopg.Connection, target_date: str) -> list[dict[str, Any]]:
+    """获取指定日期文章的 ID 与版本时间，用于增量比对缓存。
+
+    只读 idx_articles_published_on_id 中的列，可以走仅索引扫描，不回表。
+    """
     sql = """
-    SELECT id, title, unit, link, published_on, summary, attachments, created_at, updated_at, content
+    SELECT id, created_at, updated_at
     FROM articles
     WHERE published_on = %s
-    ORDER BY created_at DESC, id DESC
+    ORDER BY id DESC
     """
     with conn.cursor() as cur:
         cur.execute(sql, (target_date,))
@@ -177,6 +241,78 @@ def fetch_articles_by_date(conn: psycopg.Connection, target_date: str) -> list[d
     return list(rows)
 
 
+def fetch_article_listing_by_ids(conn: psycopg.Connection, target_date: str, article_ids: list[int]) -> list[dict[str, Any]]:
+    """按 ID 获取指定日期的文章列表项（不含正文），只为需要重新登记到 today 索引的文章读取。"""
+    if not article_ids:
+        return []
+    sql = """
+    SELECT id, title, unit, link, published_on, summary, attachments, created_at, updated_at
+    FROM articles
+    WHERE published_on = %s AND id = ANY(%s)
+    ORDER BY id DESC
+    """
+    with conn.cursor() as cur:
+        cur.execute(sql, (target_date, article_ids))
+        rows = cur.fetchall()
+    return list(rows)
+
+
+def fetch_articles_by_ids(conn: psycopg.Connection, article_ids: list[int]) -> list[dict[str, Any]]:
+    """按 ID 获取完整文章信息（含正文），用于增量刷新详情缓存。"""
+    if not article_ids:
+        return []
+    sql = """
+    SELECT id, title, unit, link, published_on, summary, attachments, created_at, updated_at, content
+    FROM articles
+    WHERE id = ANY(%s)
+    """
+    with conn.cursor() as cur:
+        cur.execute(sql, (article_ids,))
+        rows = cur.fetchall()
+    return list(rows)
+
+
+def refresh_article_stats(conn: psycopg.Connection, target_date: str) -> dict[str, Any]:
+    """重新统计目标日期的文章数与 ID 边界，并返回全部文章的汇总。
+
+    单日统计只扫描目标日期（分区表上只命中一个分区）；汇总来自 article_stats 这张小表。
+
+    返回：
+        dict: min_id、max_id、oldest_date、newest_date、total 以及当天的 day_count
+    """
+    with conn.cursor() as cur:
+        cur.execute(
+            """
+            INSERT INTO article_stats (published_on, article_count, min_id, max_id, updated_at)
+            SELECT %s, COUNT(*), MIN(id), MAX(id), now()
+            FROM articles
+            WHERE published_on = %s
+            ON CONFLICT (published_on) DO UPDATE
+            SET article_count = EXCLUDED.article_count,
+                min_id = EXCLUDED.min_id,
+                max_id = EXCLUDED.max_id,
+                updated_at = now()
+            RETURNING article_count
+            """,
+            (target_date, target_date),
+        )
+        day = cur.fetchone()
+        cur.execute(
+            """
+            SELECT MIN(min_id) AS min_id,
+                   MAX(max_id) AS max_id,
+                   MIN(published_on) FILTER (WHERE article_count > 0) AS oldest_date,
+                   MAX(published_on) FILTER (WHERE article_count > 0) AS newest_date,
+                   COALESCE(SUM(article_count), 0) AS total
+            FROM article_stats
+            """
+        )
+        summary = dict(cur.fetchone() or {})
+    conn.commit()
+    summary["day_count"] = day["article_count"] if day else 0
+    return summary
+
+
 def insert_embeddings(conn: psycopg.Connection, payloads: Iterable[dict[str, Any]]) -> int:
     """批量插入文章向量记录，已存在的article_id会被忽略。
     
@@ -193,7 +329,7 @@ def insert_embeddings(conn: psycopg.Connection, payloads: Iterable[dict[str, Any
     sql = """
     INSERT INTO vectors (article_id, embedding, published_on)
     VALUES (%(article_id)s, %(embedding)s::vector, %(published_on)s)
-    ON CONFLICT (article_id) DO NOTHING  -- article_id冲突时忽略
+    ON CONFLICT DO NOTHING  -- article_id冲突时忽略（分区表上唯一约束为 (article_id, published_on)）
     """
     
     count = 0
@@ -19,14 +19,14 @@ import datetime
 import time
 from typing import List
 
-from crawler.config import Config
+from crawler.config import get_config
 from crawler.embeddings import Embedder
 from crawler.fetcher import fetch_detail, fetch_list
 from crawler.models import ArticleRecord, ArticleMeta
 from crawler.storage import ArticleRepository
 from crawler.summarizer import Summarizer
 from crawler.db import db_session
-from crawler.cache import refresh_today_cache, refresh_article_detail_cache
+from crawler.cache import refresh_article_cache_incremental, write_article_stats
 
 
 
@@ -59,7 +59,7 @@ class Crawler:
         参数：
             target_date: 目标日期，格式为 YYYY-MM-DD；若为 None 则使用当前日期
         """
-        self.config = Config()
+        self.config = get_config()
         self.target_date = _normalize_date(target_date)
         self.summarizer = Summarizer(self.config)  # 摘要生成器
         self.embedder = Embedder(self.config)  # 向量生成器
@@ -113,6 +113,7 @@ class Crawler:
             # 确保数据库结构存在
             print("正在检查数据库结构...")
             self.repo.ensure_schema(conn)
+            self.repo.ensure_partitions(conn, self.target_date)
             print("✅ 数据库结构检查完成")
             
             # 获取已存在的链接（用于去重）
@@ -198,15 +199,24 @@ class Crawler:
                     inserted = self.repo.insert_articles(conn, records)
                     print(f"✅ 入库完成，新增 {inserted} 条")
                     if inserted > 0:
-                        cached_articles = self.repo.fetch_for_cache(conn, self.target_date)
+                        # 先更新边界与计数，today 快照据此给出准确的 has_more
+                        stats = self.repo.refresh_stats(conn, self.target_date)
+                        write_article_stats(stats, self.target_date)
 
-                        # 刷新 today 缓存（新逻辑）
-                        today_refreshed = refresh_today_cache(cached_articles, self.target_date)
+                        versions = self.repo.fetch_versions_for_cache(conn, self.target_date)
 
-                        # 刷新 article detail 缓存
-                        detail_refreshed = refresh_article_detail_cache(cached_articles, self.target_date)
+                        # 只为新增或变更的文章读取列表项与正文，其余详情仅续期
+                        today_refreshed, detail_refreshed, detail_extended = refresh_article_cache_incremental(
+                            versions,
+                            lambda ids: self.repo.fetch_listing_for_cache(conn, self.target_date, ids),
+                            lambda ids: self.repo.fetch_details_for_cache(conn, ids),
+                            self.target_date,
+                        )
 
-                        print(f"✅ 已刷新文章缓存: today={today_refreshed}, detail={detail_refreshed}")
+                        print(
+                            f"✅ 已刷新文章缓存: today={today_refreshed}, "
+                            f"detail={detail_refreshed}, extended={detail_extended}"
+                        )
 
                     # 为新增文章生成向量
                     print("正在生成文章向量...")
@@ -12,12 +12,17 @@ from typing import Any, Iterable, List
 import psycopg
 
 from crawler.db import (
+    ensure_partitions,
     fetch_article_ids,
-    fetch_articles_by_date,
+    fetch_article_listing_by_ids,
+    fetch_article_versions_by_date,
+    fetch_articles_by_ids,
     fetch_existing_links,
     init_db,
+    schema_is_managed,
     insert_articles,
     insert_embeddings,
+    refresh_article_stats,
 )
 from crawler.models import ArticleRecord
 
@@ -39,8 +44,23 @@ class ArticleRepository:
         参数：
             conn: 数据库连接对象
         """
+        # 由 backend/scripts/migrate.py 管理结构时跳过 DDL
+        if schema_is_managed(conn):
+            return
         init_db(conn)
 
+    def ensure_partitions(self, conn: psycopg.Connection, target_date: str) -> int:
+        """确保目标日期所在月份的分区存在（未分区时为空操作）。
+        
+        参数：
+            conn: 数据库连接对象
+            target_date: 目标日期，格式为 YYYY-MM-DD
+            
+        返回：
+            int: 新建的分区数
+        """
+        return ensure_partitions(conn, target_date)
+
     def existing_links(self, conn: psycopg.Connection, target_date: str) -> set[str]:
         """获取指定日期已存在的文章链接集合（用于去重）。
         
@@ -89,6 +109,20 @@ class ArticleRepository:
         """
         return insert_embeddings(conn, payloads)
 
-    def fetch_for_cache(self, conn: psycopg.Connection, target_date: str) -> List[dict[str, Any]]:
-        """获取指定日期的文章列表与详情，用于Redis缓存预热。"""
-        return fetch_articles_by_date(conn, target_date)
+    def fetch_versions_for_cache(self, conn: psycopg.Connection, target_date: str) -> List[dict[str, Any]]:
+        """获取指定日期文章的 ID 与 updated_at，用于增量刷新时比对版本。"""
+        return fetch_article_versions_by_date(conn, target_date)
+
+    def fetch_listing_for_cache(
+        self, conn: psycopg.Connection, target_date: str, article_ids: List[int]
+    ) -> List[dict[str, Any]]:
+        """按 ID 获取文章列表项（不含正文），只为需要重新登记到 today 索引的文章读取。"""
+        return fetch_article_listing_by_ids(conn, target_date, article_ids)
+
+    def fetch_details_for_cache(self, conn: psycopg.Connection, article_ids: List[int]) -> List[dict[str, Any]]:
+        """按 ID 获取含正文的文章详情，只为新增或变更的文章读取正文。"""
+        return fetch_articles_by_ids(conn, article_ids)
+
+    def refresh_stats(self, conn: psycopg.Connection, target_date: str) -> dict[str, Any]:
+        """更新目标日期的 article_stats 行，并返回全局汇总（ID 边界、最早日期、总数）。"""
+        return refresh_article_stats(conn, target_date)